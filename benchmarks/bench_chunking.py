@@ -0,0 +1,81 @@
+"""Mide la deduplicación y la velocidad del modo de archivos grandes.
+
+Uso (desde la raíz del repositorio):
+
+    python3 benchmarks/bench_chunking.py [--size MB] [--versions N] [--chunk-size BYTES]
+
+Se genera un archivo binario (parecido a una imagen de disco o un volcado de
+base de datos) y varias versiones con cambios locales: sobrescrituras,
+inserciones y borrados que desplazan el resto del contenido. Cada versión se
+guarda con ObjectStore.write_chunked y se reporta el MB/s del chunking y la
+proporción entre bytes lógicos y bytes realmente guardados.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.classes.object_store import ObjectStore
+from src.classes.chunker import Chunker
+
+def mutate(rng, data):
+    # Pocos cambios locales por versión
+    data = bytearray(data)
+    for _ in range(3):
+        pos = rng.randrange(len(data))
+        kind = rng.choice(["overwrite", "insert", "delete"])
+        if kind == "overwrite":
+            data[pos:pos + 4096] = rng.randbytes(4096)
+        elif kind == "insert":
+            data[pos:pos] = rng.randbytes(rng.randint(1, 2048))
+        else:
+            del data[pos:pos + rng.randint(1, 2048)]
+    return bytes(data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of content-defined chunking")
+    parser.add_argument("--size", type=int, default=32, help="Size of the file in MB")
+    parser.add_argument("--versions", type=int, default=5, help="Number of versions")
+    parser.add_argument("--chunk-size", type=int, default=256 * 1024, help="Average chunk size in bytes")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    work_dir = tempfile.mkdtemp(prefix="sbac-bench-")
+    try:
+        store = ObjectStore(os.path.join(work_dir, "objects"), compression_level=0)
+        chunker = Chunker(args.chunk_size)
+        path = os.path.join(work_dir, "disk.img")
+
+        data = rng.randbytes(args.size * 1024 * 1024)
+        logical = 0
+        stored = 0
+        elapsed = 0.0
+        print(f"{'version':<8} {'MB':>8} {'new MB':>8} {'MB/s':>8}")
+        for version in range(args.versions):
+            if version:
+                data = mutate(rng, data)
+            with open(path, "wb") as f:
+                f.write(data)
+
+            start = time.perf_counter()
+            _, total, new = store.write_chunked(path, chunker)
+            seconds = time.perf_counter() - start
+
+            logical += total
+            stored += new
+            elapsed += seconds
+            mb = total / (1024 * 1024)
+            print(f"{version:<8} {mb:>8.1f} {new / (1024 * 1024):>8.2f} {mb / seconds:>8.1f}")
+
+        print(f"\nlogical {logical / (1024 * 1024):.1f} MB, stored {stored / (1024 * 1024):.1f} MB, "
+              f"dedup ratio {logical / stored:.2f}, throughput {logical / (1024 * 1024) / elapsed:.1f} MB/s")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
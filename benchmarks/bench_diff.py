@@ -0,0 +1,117 @@
+"""Compara los algoritmos de 'diff' (myers, patience, histogram) con difflib.
+
+Uso (desde la raíz del repositorio):
+
+    python3 benchmarks/bench_diff.py [--lines N] [--pair VIEJO NUEVO ...] [--rev REV]
+
+Casos sintéticos con N líneas: un archivo generado con pocas líneas distintas
+que se repiten mucho (el caso en que SequenceMatcher se degrada), otro con
+código repetitivo y valores únicos, y uno con bloques movidos. Como casos
+reales se comparan los pares indicados con --pair y, si el directorio es un
+repositorio git, los archivos de src/ en la revisión --rev contra su versión
+actual. Para cada caso se reporta el tiempo de cada algoritmo, la mejora
+frente a difflib y el número de líneas cambiadas (+/-) del diff. El formato
+es el de difflib.unified_diff, pero los hunks pueden diferir: difflib busca
+el bloque común más largo y Myers el diff con menos líneas cambiadas.
+"""
+import os
+import sys
+import time
+import random
+import difflib
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.classes.line_diff import DIFF_ALGORITHMS, unified_diff
+
+def edit(rng, lines, vocabulary, count):
+    # Cambios locales dispersos: reemplazos, inserciones y borrados
+    lines = list(lines)
+    for _ in range(count):
+        pos = rng.randrange(len(lines))
+        kind = rng.random()
+        if kind < 0.4:
+            lines[pos] = rng.choice(vocabulary)
+        elif kind < 0.7:
+            lines.insert(pos, rng.choice(vocabulary))
+        else:
+            del lines[pos]
+    return lines
+
+def synthetic_cases(rng, size):
+    # Pocas líneas distintas, cada una por debajo del umbral de autojunk de difflib
+    vocabulary = [f"    field_{i} = default;\n" for i in range(max(size // 60, 1))]
+    repeated = [rng.choice(vocabulary) for _ in range(size)]
+    yield "repeated lines", repeated, edit(rng, repeated, vocabulary, size // 200)
+
+    boilerplate = ["{\n", "}\n", "\n", "    return 0;\n", "    x++;\n", "    // generated\n"]
+    generated = [rng.choice(boilerplate) if rng.random() < 0.7 else f"    value_{i} = {rng.randint(0, 999)};\n"
+                 for i in range(size)]
+    yield "generated code", generated, edit(rng, generated, boilerplate, size // 1000)
+
+    blocks = [[f"def function_{i}():\n"] + [f"    step_{i}_{k}()\n" for k in range(20)] + ["\n"]
+              for i in range(size // 22)]
+    moved = list(blocks)
+    for _ in range(len(blocks) // 50):
+        moved.insert(rng.randrange(len(moved)), moved.pop(rng.randrange(len(moved))))
+    yield "moved blocks", [line for block in blocks for line in block], [line for block in moved for line in block]
+
+def git_cases(rev):
+    """Archivos de src/ en 'rev' contra su versión actual (si hay un repositorio git)"""
+    try:
+        names = subprocess.run(["git", "ls-files", "src"], capture_output=True, text=True, check=True).stdout.split()
+    except (OSError, subprocess.CalledProcessError):
+        return
+    for name in names:
+        if not name.endswith(".py"):
+            continue
+        old = subprocess.run(["git", "show", f"{rev}:{name}"], capture_output=True, text=True)
+        if old.returncode != 0:
+            continue
+        with open(name, "r") as f:
+            new = f.read()
+        if old.stdout != new:
+            yield f"{name} ({rev})", old.stdout.splitlines(keepends=True), new.splitlines(keepends=True)
+
+def file_cases(pairs):
+    for old_path, new_path in pairs:
+        with open(old_path, "r", errors="replace") as f:
+            old = f.readlines()
+        with open(new_path, "r", errors="replace") as f:
+            new = f.readlines()
+        yield f"{os.path.basename(old_path)} -> {os.path.basename(new_path)}", old, new
+
+def measure(function):
+    """(segundos, líneas cambiadas) de un diff unificado"""
+    start = time.perf_counter()
+    output = list(function())
+    seconds = time.perf_counter() - start
+    changed = sum(1 for line in output if line[:1] in "+-" and line[:3] not in ("+++", "---"))
+    return seconds, changed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of the line diff algorithms against difflib")
+    parser.add_argument("--lines", type=int, default=200000, help="Number of lines of the synthetic files")
+    parser.add_argument("--pair", nargs=2, action="append", default=[], metavar=("OLD", "NEW"),
+                        help="Pair of real files to compare (repeatable)")
+    parser.add_argument("--rev", default="HEAD~10", help="Git revision for the real-world source files")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the synthetic files")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = list(synthetic_cases(rng, args.lines)) + list(file_cases(args.pair)) + list(git_cases(args.rev))
+
+    print(f"{'case':<40} {'lines':>8} {'difflib s':>10} {'+/-':>7}"
+          + "".join(f" {name + ' s':>12} {'x':>6} {'+/-':>7}" for name in DIFF_ALGORITHMS))
+    for name, old, new in cases:
+        reference_time, reference_changed = measure(lambda: difflib.unified_diff(old, new, "a", "b"))
+        row = f"{name[:40]:<40} {max(len(old), len(new)):>8} {reference_time:>10.3f} {reference_changed:>7}"
+        for algorithm in DIFF_ALGORITHMS:
+            seconds, changed = measure(lambda: unified_diff(old, new, "a", "b", algorithm=algorithm))
+            row += f" {seconds:>12.3f} {reference_time / max(seconds, 1e-9):>6.1f} {changed:>7}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
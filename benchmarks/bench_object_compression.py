@@ -0,0 +1,96 @@
+"""Compara el almacén de objetos sin comprimir con objetos comprimidos con zlib.
+
+Uso (desde la raíz del repositorio):
+
+    python3 benchmarks/bench_object_compression.py [--files N] [--size BYTES]
+
+Para cada nivel de compresión se escriben los mismos objetos en un almacén
+temporal y se reporta el espacio ocupado en disco y la velocidad de lectura
+(incluyendo la descompresión) a través de ObjectStore.read.
+"""
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.classes.object_store import ObjectStore
+
+WORDS = ["def", "return", "self", "import", "config", "value", "path", "hash",
+         "commit", "tree", "if", "else", "for", "in", "None", "True", "print"]
+
+def make_text(rng, size):
+    # Texto parecido a código fuente: muy comprimible
+    lines = []
+    total = 0
+    while total < size:
+        line = "    " * rng.randint(0, 3) + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 10)))
+        lines.append(line)
+        total += len(line) + 1
+    return ("\n".join(lines)).encode()[:size]
+
+def make_corpus(count, size, seed=1234):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        if i % 10 == 0:
+            # Una parte del corpus es binaria (poco comprimible)
+            corpus.append(rng.randbytes(size))
+        else:
+            corpus.append(make_text(rng, size))
+    return corpus
+
+def disk_usage(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+def run(corpus, level, repeats):
+    objects_dir = tempfile.mkdtemp(prefix="sbac-bench-")
+    try:
+        store = ObjectStore(objects_dir, compression_level=level)
+        hashes = []
+        start = time.perf_counter()
+        for content in corpus:
+            object_hash = hashlib.sha1(content).hexdigest()
+            store.write(object_hash, content)
+            hashes.append(object_hash)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for object_hash in hashes:
+                store.read(object_hash)
+        read_time = (time.perf_counter() - start) / repeats
+
+        return disk_usage(objects_dir), write_time, read_time
+    finally:
+        shutil.rmtree(objects_dir)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of raw vs zlib-compressed loose objects")
+    parser.add_argument("--files", type=int, default=500, help="Number of objects")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="Size of each object in bytes")
+    parser.add_argument("--repeats", type=int, default=3, help="Read passes per level")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.files, args.size)
+    logical = sum(len(content) for content in corpus)
+    mb = logical / (1024 * 1024)
+
+    print(f"{args.files} objects, {mb:.1f} MB of content")
+    print(f"{'format':<10} {'on disk':>12} {'ratio':>7} {'write MB/s':>11} {'read MB/s':>10}")
+    for level in (0, 1, 6, 9):
+        size, write_time, read_time = run(corpus, level, args.repeats)
+        name = "raw" if level == 0 else f"zlib-{level}"
+        print(f"{name:<10} {size:>12,} {logical / size:>7.2f} {mb / write_time:>11.1f} {mb / read_time:>10.1f}")
+
+if __name__ == "__main__":
+    main()
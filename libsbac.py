@@ -12,7 +12,8 @@ def main():
 
     # Add command
     add_parser = subparsers.add_parser("add", help="Add file(s) to staging area")
-    add_parser.add_argument("files", nargs="+", help="Files to add")
+    add_parser.add_argument("files", nargs="+", help="Files or directories to add")
+    add_parser.add_argument("-j", "--jobs", type=int, help="Number of worker threads (default: add_workers or CPU count)")
 
     # Status command
     status_parser = subparsers.add_parser("status", help="Show the working tree status")
@@ -23,10 +24,20 @@ def main():
 
     # Log command
     log_parser = subparsers.add_parser("log", help="Show commit logs")
+    log_parser.add_argument("-n", "--max-count", type=int, help="Limit the number of commits to show")
+    log_parser.add_argument("--since", help="Show commits more recent than a date (ISO format)")
+    log_parser.add_argument("--until", help="Show commits older than a date (ISO format)")
+    log_parser.add_argument("--author", help="Show only commits by this author")
+    log_parser.add_argument("--oneline", action="store_true", help="Show each commit on a single line")
+    log_parser.add_argument("--format", choices=["jsonl"], help="Machine-readable output, one JSON object per line")
+    log_parser.add_argument("paths", nargs="*", help="Show only commits that changed these paths (use: log -- <path>)")
 
     # Checkout command
     checkout_parser = subparsers.add_parser("checkout", help="Switch branches or restore working tree files")
     checkout_parser.add_argument("target", help="Branch, commit or tag to checkout")
+    checkout_parser.add_argument("-j", "--jobs", type=int, help="Number of worker threads (default: checkout_workers or CPU count)")
+    checkout_parser.add_argument("--link", choices=["copy", "hardlink", "reflink"],
+                                 help="Link files from the object store instead of copying them (default: checkout_link or copy)")
 
     # Branch command
     branch_parser = subparsers.add_parser("branch", help="Create, list or delete branches")
@@ -48,13 +59,58 @@ def main():
 
     # Diff commits command
     diff_parser = subparsers.add_parser("diff", help="Show changes between commits")
-    diff_parser.add_argument("commit1", help="First commit hash")
-    diff_parser.add_argument("commit2", help="Second commit hash")
+    diff_parser.add_argument("commit1", help="First commit (hash, branch, tag or HEAD~n)")
+    diff_parser.add_argument("commit2", help="Second commit (hash, branch, tag or HEAD~n)")
+    diff_parser.add_argument("--algorithm", choices=["myers", "patience", "histogram"],
+                             help="Diff algorithm (default: myers or diff_algorithm in .sbac/config)")
+    diff_parser.add_argument("-j", "--jobs", type=int, help="Number of worker processes (default: diff_workers or CPU count)")
 
     # Diff tags command
     diff_tags_parser = subparsers.add_parser("diff-tags", help="Show changes between tags")
     diff_tags_parser.add_argument("tag1", help="First tag name")
     diff_tags_parser.add_argument("tag2", help="Second tag name")
+    diff_tags_parser.add_argument("--algorithm", choices=["myers", "patience", "histogram"],
+                                  help="Diff algorithm (default: myers or diff_algorithm in .sbac/config)")
+    diff_tags_parser.add_argument("-j", "--jobs", type=int, help="Number of worker processes (default: diff_workers or CPU count)")
+
+    # Migrate objects command
+    migrate_parser = subparsers.add_parser("migrate-objects", help="Move flat objects into the fan-out layout")
+
+    # Repack command
+    repack_parser = subparsers.add_parser("repack", help="Pack loose objects into a packfile")
+
+    # Pack-refs command
+    pack_refs_parser = subparsers.add_parser("pack-refs", help="Pack loose branches and tags into packed-refs")
+
+    # Cat-file command
+    cat_file_parser = subparsers.add_parser("cat-file", help="Show the type, size or content of an object")
+    cat_file_mode = cat_file_parser.add_mutually_exclusive_group(required=True)
+    cat_file_mode.add_argument("-t", dest="mode", action="store_const", const="type", help="Show the object type")
+    cat_file_mode.add_argument("-s", dest="mode", action="store_const", const="size", help="Show the object size")
+    cat_file_mode.add_argument("-p", dest="mode", action="store_const", const="print", help="Pretty-print the object content")
+    cat_file_parser.add_argument("object", help="Object hash (full or abbreviated) or revision")
+
+    # Rev-parse command
+    rev_parse_parser = subparsers.add_parser("rev-parse", help="Show the commit hash of one or more revisions")
+    rev_parse_parser.add_argument("revs", nargs="+", help="Branch, tag, hash, HEAD, HEAD~n or name^")
+
+    # Merge-base command
+    merge_base_parser = subparsers.add_parser("merge-base", help="Find the closest common ancestor of two commits")
+    merge_base_parser.add_argument("rev1", help="First branch, tag or commit")
+    merge_base_parser.add_argument("rev2", help="Second branch, tag or commit")
+
+    # Is-ancestor command
+    is_ancestor_parser = subparsers.add_parser("is-ancestor", help="Check whether a commit is an ancestor of another")
+    is_ancestor_parser.add_argument("rev1", help="Possible ancestor (branch, tag or commit)")
+    is_ancestor_parser.add_argument("rev2", help="Descendant (branch, tag or commit)")
+
+    # Sparse-checkout command
+    sparse_parser = subparsers.add_parser("sparse-checkout", help="Limit the working tree to some directories")
+    sparse_parser.add_argument("action", choices=["set", "list", "disable"], help="Set, list or disable the patterns")
+    sparse_parser.add_argument("patterns", nargs="*", help="Directory patterns (e.g. src/app or services/*/api)")
+
+    # Commit-graph command
+    commit_graph_parser = subparsers.add_parser("commit-graph", help="Rebuild the commit-graph file")
 
     args = parser.parse_args()
 
@@ -62,15 +118,15 @@ def main():
         if args.command == "init":
             sbac.init()
         elif args.command == "add":
-            sbac.add(args.files)
+            sbac.add(args.files, args.jobs)
         elif args.command == "status":
             sbac.status()
         elif args.command == "commit":
             sbac.commit(args.message)
         elif args.command == "log":
-            sbac.log()
+            sbac.log(args.max_count, args.since, args.until, args.author, args.oneline, args.format, args.paths)
         elif args.command == "checkout":
-            sbac.checkout(args.target)
+            sbac.checkout(args.target, args.jobs, args.link)
         elif args.command == "branch":
             if args.create:
                 sbac.create_branch(args.create, args.start_point)
@@ -85,9 +141,33 @@ def main():
         elif args.command == "list-tags":
             sbac.list_tags()
         elif args.command == "diff":
-            sbac.diff_commits(args.commit1, args.commit2)
+            sbac.diff_commits(args.commit1, args.commit2, args.algorithm, args.jobs)
         elif args.command == "diff-tags":
-            sbac.diff_tags(args.tag1, args.tag2)
+            sbac.diff_tags(args.tag1, args.tag2, args.algorithm, args.jobs)
+        elif args.command == "migrate-objects":
+            sbac.migrate_objects()
+        elif args.command == "repack":
+            sbac.repack()
+        elif args.command == "sparse-checkout":
+            if args.action == "set":
+                sbac.sparse_checkout_set(args.patterns)
+            elif args.action == "list":
+                sbac.sparse_checkout_list()
+            elif args.action == "disable":
+                sbac.sparse_checkout_disable()
+        elif args.command == "pack-refs":
+            sbac.pack_refs()
+        elif args.command == "commit-graph":
+            sbac.commit_graph()
+        elif args.command == "cat-file":
+            sys.exit(0 if sbac.cat_file(args.object, args.mode) else 1)
+        elif args.command == "rev-parse":
+            sys.exit(0 if sbac.rev_parse(args.revs) else 1)
+        elif args.command == "merge-base":
+            # El código de salida permite usarlo desde scripts
+            sys.exit(0 if sbac.merge_base(args.rev1, args.rev2) else 1)
+        elif args.command == "is-ancestor":
+            sys.exit(0 if sbac.is_ancestor(args.rev1, args.rev2) else 1)
     except Exception as e:
         print(f"error: {str(e)}", file=sys.stderr)
         sys.exit(1)
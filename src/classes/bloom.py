@@ -0,0 +1,47 @@
+import hashlib
+
+# Parámetros de los filtros de rutas cambiadas: con 10 bits por ruta y 7
+# funciones hash la probabilidad de un falso positivo es cercana al 1%
+BITS_PER_PATH = 10
+NUM_HASHES = 7
+# Los commits que cambian más rutas no guardan filtro (siempre se revisan)
+MAX_CHANGED_PATHS = 512
+
+class BloomFilter:
+    """Filtro de Bloom sobre rutas.
+
+    'might_contain' nunca da falsos negativos: si devuelve False la ruta
+    seguro no está; si devuelve True hay que comprobarlo.
+    """
+
+    def __init__(self, data):
+        self.data = bytearray(data)
+        self.num_bits = len(self.data) * 8
+
+    @classmethod
+    def from_paths(cls, paths):
+        paths = list(paths)
+        size = (len(paths) * BITS_PER_PATH + 7) // 8
+        bloom = cls(bytes(max(size, 8) if paths else 0))
+        for path in paths:
+            bloom.add(path)
+        return bloom
+
+    def _positions(self, path):
+        digest = hashlib.sha1(path.encode("utf-8", "surrogateescape")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(NUM_HASHES):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, path):
+        for bit in self._positions(path):
+            self.data[bit >> 3] |= 1 << (bit & 7)
+
+    def might_contain(self, path):
+        if not self.num_bits:
+            return False
+        return all(self.data[bit >> 3] & (1 << (bit & 7)) for bit in self._positions(path))
+
+    def to_bytes(self):
+        return bytes(self.data)
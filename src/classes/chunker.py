@@ -0,0 +1,77 @@
+import json
+import hashlib
+from src.config import *
+
+# Los archivos grandes se guardan como una lista de chunks (manifest)
+MANIFEST_PREFIX = b"sbac-chunks\n"
+HASH_MASK = (1 << 64) - 1
+
+def _gear_table():
+    # Tabla fija: los cortes deben ser los mismos en cada ejecución para deduplicar
+    return [int.from_bytes(hashlib.sha1(bytes([i])).digest()[:8], "big") for i in range(256)]
+
+GEAR = _gear_table()
+
+class Chunker:
+    """Divide un flujo de bytes en chunks definidos por su contenido.
+
+    Usa un hash rodante tipo "gear": los cortes dependen sólo de los últimos
+    64 bytes leídos, así que insertar o borrar bytes en una zona del archivo
+    sólo cambia los chunks de esa zona y el resto se deduplica.
+    """
+
+    def __init__(self, avg_size=DEFAULT_CHUNK_SIZE):
+        self.min_size = max(avg_size // 4, 64)
+        self.max_size = avg_size * 4
+        bits = max((avg_size - self.min_size).bit_length() - 1, 1)
+        # Se usan los bits altos del hash, que dependen de toda la ventana
+        self.mask = ((1 << bits) - 1) << (64 - bits)
+
+    def _cut_point(self, data):
+        size = len(data)
+        if size <= self.min_size:
+            return size
+
+        limit = min(size, self.max_size)
+        gear = GEAR
+        mask = self.mask
+        min_size = self.min_size
+        h = 0
+        # Los bytes anteriores a la ventana no influyen en el hash: se saltan
+        pos = min_size - 64
+        for byte in data[pos:limit]:
+            h = ((h << 1) + gear[byte]) & HASH_MASK
+            pos += 1
+            if not h & mask and pos > min_size:
+                return pos
+        return limit
+
+    def chunks(self, stream, buffer_size=DEFAULT_STREAM_BUFFER_SIZE):
+        """Genera los chunks de un archivo abierto en modo binario"""
+        pending = bytearray()
+        end_of_stream = False
+        while True:
+            # Tener siempre max_size bytes disponibles para decidir cada corte
+            while not end_of_stream and len(pending) < self.max_size:
+                block = stream.read(buffer_size)
+                if not block:
+                    end_of_stream = True
+                pending += block
+
+            if not pending:
+                return
+
+            cut = self._cut_point(pending)
+            yield bytes(pending[:cut])
+            del pending[:cut]
+
+def is_manifest(data):
+    return data.startswith(MANIFEST_PREFIX)
+
+def encode_manifest(chunks):
+    """chunks: lista de (hash, tamaño)"""
+    manifest = {"size": sum(size for _, size in chunks), "chunks": [list(chunk) for chunk in chunks]}
+    return MANIFEST_PREFIX + json.dumps(manifest).encode()
+
+def decode_manifest(data):
+    return json.loads(data[len(MANIFEST_PREFIX):])
@@ -0,0 +1,362 @@
+import os
+import mmap
+import struct
+from datetime import datetime
+from .bloom import BloomFilter, MAX_CHANGED_PATHS
+from src.config import *
+
+# Formato del commit-graph (objects/info/commit-graph):
+#   cabecera  b"SCGR" + versión (u32) + identificador del archivo de filtros (8 bytes)
+#   filas     hash del commit (20 bytes), hash del árbol (20 bytes), fila del
+#             padre (u32, NO_PARENT si no tiene), fecha (i64, microsegundos
+#             desde la época), número de generación (u32) y posición (u64) y
+#             tamaño (u32) de su filtro de rutas cambiadas (NO_BLOOM si no tiene)
+#
+# Los filtros de Bloom de rutas cambiadas se guardan al lado, en
+# commit-graph.bloom: b"SBLM" + versión (u32) + el mismo identificador, y a
+# continuación los filtros. Si el identificador no coincide, el archivo de
+# filtros no corresponde al grafo y se ignora.
+#
+# Las filas se agregan en orden topológico (el padre siempre antes que el
+# hijo), así que ambos archivos crecen con 'commit' sin reescribirse. Una fila
+# incompleta al final (escritura interrumpida) se ignora.
+#
+# Para buscar un commit sin recorrer las filas, commit-graph.lookup guarda una
+# tabla ordenada por hash (como el .idx de un pack):
+#   cabecera  b"SCGL" + versión (u32) + el mismo identificador + filas cubiertas (u32)
+#   fan-out   256 x u32: número de hashes cuyo primer byte es <= i
+#   hashes    N x 20 bytes ordenados
+#   filas     N x u32 con la fila de cada hash en el commit-graph
+# La tabla cubre las primeras N filas; las que 'commit' agrega después se
+# buscan desde el final del grafo, y cuando superan COMMIT_GRAPH_LOOKUP_TAIL
+# la tabla se vuelve a escribir.
+GRAPH_SIGNATURE = b"SCGR"
+GRAPH_VERSION = 2
+GRAPH_HEADER = struct.Struct(">4sI8s")
+GRAPH_ROW = struct.Struct(">20s20sIqIQI")
+BLOOM_SIGNATURE = b"SBLM"
+BLOOM_VERSION = 1
+BLOOM_HEADER = struct.Struct(">4sI8s")
+LOOKUP_SIGNATURE = b"SCGL"
+LOOKUP_VERSION = 1
+LOOKUP_HEADER = struct.Struct(">4sI8sI")
+LOOKUP_ROW = struct.Struct(">I")
+FANOUT = struct.Struct(">256I")
+NO_PARENT = 0xffffffff
+NO_BLOOM = 0xffffffffffffffff
+HASH_SIZE = 20
+
+def timestamp_to_micros(timestamp):
+    """Convierte la fecha ISO de un commit a microsegundos desde la época"""
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1000000)
+
+class GraphEntry:
+    """Fila del commit-graph"""
+
+    __slots__ = ("row", "hash", "tree", "parent", "timestamp", "generation", "bloom_offset", "bloom_size")
+
+    def __init__(self, row, hash, tree, parent, timestamp, generation, bloom_offset=NO_BLOOM, bloom_size=0):
+        self.row = row
+        self.hash = hash
+        self.tree = tree
+        self.parent = parent  # fila del padre o None
+        self.timestamp = timestamp
+        self.generation = generation
+        self.bloom_offset = bloom_offset
+        self.bloom_size = bloom_size
+
+class CommitGraph:
+    """Tabla binaria con la historia de commits, mapeada en memoria.
+
+    Recorrer la historia sólo requiere saltar de una fila a la de su padre;
+    los objetos de los commits se leen únicamente para mostrarlos. Cada fila
+    puede tener un filtro de Bloom con las rutas que el commit cambió
+    respecto a su padre, para descartar commits sin leer sus árboles. Un
+    commit se localiza con búsqueda binaria en la tabla de commit-graph.lookup.
+    """
+
+    def __init__(self, path=COMMIT_GRAPH_FILE):
+        self.path = path
+        self.bloom_path = path + ".bloom"
+        self.lookup_path = path + ".lookup"
+        self._mm = None
+        self._bloom_mm = None
+        self._lookup_mm = None
+        self._lookup_fanout = None
+        self._lookup_count = 0  # filas cubiertas por la tabla de búsqueda
+        self._bloom_id = None
+        self._opened = False
+        self.count = 0
+
+    def _open(self):
+        if self._opened:
+            return
+        self._opened = True
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size < GRAPH_HEADER.size:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        signature, version, bloom_id = GRAPH_HEADER.unpack_from(mm, 0)
+        if signature != GRAPH_SIGNATURE:
+            mm.close()
+            raise ValueError(f"invalid commit-graph file '{self.path}'")
+        if version != GRAPH_VERSION:
+            # Versión anterior: se ignora y se vuelve a escribir con el próximo commit
+            mm.close()
+            return
+        self._mm = mm
+        self._bloom_id = bloom_id
+        self.count = (size - GRAPH_HEADER.size) // GRAPH_ROW.size
+        self._open_bloom()
+        self._open_lookup()
+
+    def _open_bloom(self):
+        try:
+            f = open(self.bloom_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size < BLOOM_HEADER.size:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if BLOOM_HEADER.unpack_from(mm, 0) != (BLOOM_SIGNATURE, BLOOM_VERSION, self._bloom_id):
+            mm.close()
+            return
+        self._bloom_mm = mm
+
+    def _open_lookup(self):
+        try:
+            f = open(self.lookup_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size < LOOKUP_HEADER.size + FANOUT.size:
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        signature, version, graph_id, covered = LOOKUP_HEADER.unpack_from(mm, 0)
+        # Una tabla de otro grafo (o de uno más largo) se ignora
+        if (signature, version, graph_id) != (LOOKUP_SIGNATURE, LOOKUP_VERSION, self._bloom_id) \
+                or covered > self.count \
+                or size < LOOKUP_HEADER.size + FANOUT.size + covered * (HASH_SIZE + LOOKUP_ROW.size):
+            mm.close()
+            return
+        self._lookup_mm = mm
+        self._lookup_fanout = FANOUT.unpack_from(mm, LOOKUP_HEADER.size)
+        self._lookup_count = covered
+
+    def close(self):
+        for mm in (self._mm, self._bloom_mm, self._lookup_mm):
+            if mm is not None:
+                mm.close()
+        self._mm = None
+        self._bloom_mm = None
+        self._lookup_mm = None
+        self._lookup_fanout = None
+        self._lookup_count = 0
+        self._bloom_id = None
+        self._opened = False
+        self.count = 0
+
+    def __len__(self):
+        self._open()
+        return self.count
+
+    def entry(self, row):
+        self._open()
+        raw_hash, raw_tree, parent, timestamp, generation, bloom_offset, bloom_size = GRAPH_ROW.unpack_from(
+            self._mm, GRAPH_HEADER.size + row * GRAPH_ROW.size)
+        return GraphEntry(row, raw_hash.hex(), raw_tree.hex(), None if parent == NO_PARENT else parent,
+                          timestamp, generation, bloom_offset, bloom_size)
+
+    def _lookup(self, key):
+        """Fila de un hash (binario) según la tabla ordenada, o None"""
+        if self._lookup_mm is None:
+            return None
+        first = key[0]
+        lo = self._lookup_fanout[first - 1] if first else 0
+        hi = self._lookup_fanout[first]
+        hashes_start = LOOKUP_HEADER.size + FANOUT.size
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = hashes_start + mid * HASH_SIZE
+            current = self._lookup_mm[start:start + HASH_SIZE]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                rows_start = hashes_start + self._lookup_count * HASH_SIZE
+                return LOOKUP_ROW.unpack_from(self._lookup_mm, rows_start + mid * LOOKUP_ROW.size)[0]
+        return None
+
+    def find(self, commit_hash):
+        """Devuelve la fila del commit o None si no está en el grafo"""
+        self._open()
+        if self._mm is None or len(commit_hash) != HASH_HEX_LENGTH:
+            return None
+        try:
+            key = bytes.fromhex(commit_hash)
+        except ValueError:
+            return None
+
+        row = self._lookup(key)
+        if row is not None:
+            return row
+
+        # Filas agregadas después de escribir la tabla: buscar desde el final
+        start = GRAPH_HEADER.size + self._lookup_count * GRAPH_ROW.size
+        end = GRAPH_HEADER.size + self.count * GRAPH_ROW.size
+        while True:
+            pos = self._mm.rfind(key, start, end)
+            if pos < 0:
+                return None
+            if (pos - GRAPH_HEADER.size) % GRAPH_ROW.size == 0:
+                return (pos - GRAPH_HEADER.size) // GRAPH_ROW.size
+            # Coincidencia dentro de otro campo: seguir buscando antes
+            end = pos + HASH_SIZE - 1
+
+    def _write_lookup(self):
+        """Escribe la tabla de búsqueda ordenada con todas las filas del grafo"""
+        self._open()
+        if self._mm is None:
+            return
+        start = GRAPH_HEADER.size
+        end = start + self.count * GRAPH_ROW.size
+        entries = sorted((self._mm[pos:pos + HASH_SIZE], row)
+                         for row, pos in enumerate(range(start, end, GRAPH_ROW.size)))
+        fanout = [0] * 256
+        for key, _ in entries:
+            fanout[key[0]] += 1
+        for i in range(1, 256):
+            fanout[i] += fanout[i - 1]
+
+        data = bytearray(LOOKUP_HEADER.pack(LOOKUP_SIGNATURE, LOOKUP_VERSION, self._bloom_id, len(entries)))
+        data += FANOUT.pack(*fanout)
+        for key, _ in entries:
+            data += key
+        for _, row in entries:
+            data += LOOKUP_ROW.pack(row)
+
+        tmp_path = f"{self.lookup_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.lookup_path)
+        self.close()
+
+    def walk(self, commit_hash):
+        """Genera las filas desde un commit siguiendo a sus padres.
+
+        Devuelve None si el commit no está en el grafo.
+        """
+        row = self.find(commit_hash)
+        if row is None:
+            return None
+        return self._walk_rows(row)
+
+    def _walk_rows(self, row):
+        while row is not None:
+            entry = self.entry(row)
+            yield entry
+            row = entry.parent
+
+    def changed_paths_filter(self, entry):
+        """Filtro de rutas cambiadas de una fila, o None si no tiene"""
+        self._open()
+        if entry.row is None or entry.bloom_offset == NO_BLOOM or self._bloom_mm is None:
+            return None
+        end = entry.bloom_offset + entry.bloom_size
+        if end > len(self._bloom_mm):
+            return None
+        return BloomFilter(self._bloom_mm[entry.bloom_offset:end])
+
+    def append(self, commits):
+        """Agrega commits (hash, árbol, padre, fecha, rutas cambiadas) en orden topológico.
+
+        El padre de cada commit debe estar ya en el grafo o antes en la
+        lista. Las rutas cambiadas pueden ser None si no se conocen.
+        """
+        self._open()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self._mm is None:
+            self._bloom_id = os.urandom(8)
+            graph_file = open(self.path, "wb")
+            graph_file.write(GRAPH_HEADER.pack(GRAPH_SIGNATURE, GRAPH_VERSION, self._bloom_id))
+            bloom_file = open(self.bloom_path, "wb")
+            bloom_file.write(BLOOM_HEADER.pack(BLOOM_SIGNATURE, BLOOM_VERSION, self._bloom_id))
+        else:
+            # Descartar una posible fila incompleta
+            graph_file = open(self.path, "r+b")
+            end = GRAPH_HEADER.size + self.count * GRAPH_ROW.size
+            graph_file.truncate(end)
+            graph_file.seek(end)
+            # Sin un archivo de filtros válido, las filas nuevas no llevan filtro
+            bloom_file = open(self.bloom_path, "ab") if self._bloom_mm is not None else None
+
+        with graph_file:
+            try:
+                # Filas escritas en esta llamada: (fila, generación)
+                written = {}
+                for commit_hash, tree_hash, parent, timestamp, changed_paths in commits:
+                    if commit_hash in written or self.find(commit_hash) is not None:
+                        continue
+                    if not parent:
+                        parent_row, generation = NO_PARENT, 1
+                    elif parent in written:
+                        parent_row, generation = written[parent]
+                        generation += 1
+                    else:
+                        parent_row = self.find(parent)
+                        if parent_row is None:
+                            raise ValueError(f"parent {parent} is not in the commit-graph")
+                        generation = self.entry(parent_row).generation + 1
+
+                    bloom_offset, bloom_size = NO_BLOOM, 0
+                    if bloom_file is not None and changed_paths is not None and len(changed_paths) <= MAX_CHANGED_PATHS:
+                        # El filtro se escribe antes que la fila que lo referencia
+                        data = BloomFilter.from_paths(changed_paths).to_bytes()
+                        bloom_offset, bloom_size = bloom_file.tell(), len(data)
+                        bloom_file.write(data)
+                        bloom_file.flush()
+
+                    graph_file.write(GRAPH_ROW.pack(bytes.fromhex(commit_hash), bytes.fromhex(tree_hash),
+                                                    parent_row, timestamp, generation, bloom_offset, bloom_size))
+                    written[commit_hash] = (self.count + len(written), generation)
+            finally:
+                if bloom_file is not None:
+                    bloom_file.close()
+        self.close()
+
+        # Las filas nuevas se buscan recorriendo el final del grafo; cuando son
+        # demasiadas, se vuelve a escribir la tabla ordenada
+        self._open()
+        if self.count - self._lookup_count > COMMIT_GRAPH_LOOKUP_TAIL:
+            self._write_lookup()
+        self.close()
+
+    def write(self, commits):
+        """Reescribe el grafo completo con los commits dados (orden topológico)"""
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        self.close()
+        graph = CommitGraph(tmp_path)
+        for path in (graph.path, graph.bloom_path, graph.lookup_path):
+            if os.path.exists(path):
+                os.remove(path)
+        graph.append(commits)
+        graph._open()
+        if graph._lookup_count < graph.count:
+            graph._write_lookup()
+        graph.close()
+        # Cada archivo lleva el identificador del grafo: si el proceso se
+        # interrumpe entre los reemplazos, los filtros y la tabla se ignoran
+        os.replace(graph.bloom_path, self.bloom_path)
+        if os.path.exists(graph.lookup_path):
+            os.replace(graph.lookup_path, self.lookup_path)
+        os.replace(graph.path, self.path)
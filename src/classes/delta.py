@@ -0,0 +1,146 @@
+# Formato de un delta (similar al de git):
+#   tamaño del objeto base (varint) + tamaño del resultado (varint)
+#   instrucciones:
+#     0x80 | banderas  copiar del base: bits 0-3 indican los bytes del offset
+#                      y bits 4-6 los bytes del tamaño que siguen
+#     1..127           insertar los siguientes N bytes literales
+BLOCK_SIZE = 16
+MAX_COPY_SIZE = 0xffffff
+MAX_INSERT_SIZE = 0x7f
+
+def encode_varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def decode_varint(buffer, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+def _match_length(base, base_pos, target, target_pos, limit):
+    """Longitud de la coincidencia a partir de las dos posiciones"""
+    length = 0
+    step = 1024
+    while step:
+        size = min(step, limit - length)
+        if size <= 0:
+            break
+        if base[base_pos + length:base_pos + length + size] == target[target_pos + length:target_pos + length + size]:
+            length += size
+        else:
+            step //= 2
+    return length
+
+def _emit_insert(out, target, start, end):
+    while start < end:
+        size = min(MAX_INSERT_SIZE, end - start)
+        out.append(size)
+        out += target[start:start + size]
+        start += size
+
+def _emit_copy(out, offset, length):
+    while length:
+        size = min(MAX_COPY_SIZE, length)
+        command = 0x80
+        args = bytearray()
+        for i in range(4):
+            byte = (offset >> (8 * i)) & 0xff
+            if byte:
+                command |= 1 << i
+                args.append(byte)
+        for i in range(3):
+            byte = (size >> (8 * i)) & 0xff
+            if byte:
+                command |= 1 << (4 + i)
+                args.append(byte)
+        out.append(command)
+        out += args
+        offset += size
+        length -= size
+
+def create_delta(base, target, max_size=None):
+    """Calcula un delta que transforma 'base' en 'target'.
+
+    Devuelve None si el delta supera 'max_size' bytes, para abandonar pronto
+    los candidatos que no valen la pena.
+    """
+    index = {}
+    for i in range(0, len(base) - BLOCK_SIZE + 1, BLOCK_SIZE):
+        index.setdefault(base[i:i + BLOCK_SIZE], i)
+
+    out = bytearray(encode_varint(len(base)) + encode_varint(len(target)))
+    target_size = len(target)
+    insert_start = 0
+    i = 0
+    while i <= target_size - BLOCK_SIZE:
+        j = index.get(target[i:i + BLOCK_SIZE])
+        if j is None:
+            i += 1
+            if max_size is not None and len(out) + (i - insert_start) > max_size:
+                return None
+            continue
+
+        # Extender la coincidencia hacia atrás sobre los bytes pendientes de insertar
+        while i > insert_start and j > 0 and base[j - 1] == target[i - 1]:
+            i -= 1
+            j -= 1
+
+        length = _match_length(base, j, target, i, min(len(base) - j, target_size - i))
+        _emit_insert(out, target, insert_start, i)
+        _emit_copy(out, j, length)
+        i += length
+        insert_start = i
+        if max_size is not None and len(out) > max_size:
+            return None
+
+    _emit_insert(out, target, insert_start, target_size)
+    if max_size is not None and len(out) > max_size:
+        return None
+    return bytes(out)
+
+def apply_delta(base, delta):
+    """Reconstruye el objeto a partir de su base y el delta"""
+    base_size, pos = decode_varint(delta, 0)
+    result_size, pos = decode_varint(delta, pos)
+    if base_size != len(base):
+        raise ValueError("delta base size mismatch")
+
+    out = bytearray()
+    delta_size = len(delta)
+    while pos < delta_size:
+        command = delta[pos]
+        pos += 1
+        if command & 0x80:
+            offset = 0
+            for i in range(4):
+                if command & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            size = 0
+            for i in range(3):
+                if command & (1 << (4 + i)):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + size]
+        elif command:
+            out += delta[pos:pos + command]
+            pos += command
+        else:
+            raise ValueError("invalid delta instruction")
+
+    if len(out) != result_size:
+        raise ValueError("delta result size mismatch")
+    return bytes(out)
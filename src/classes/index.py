@@ -0,0 +1,530 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+import time
+import zlib
+from src.config import *
+
+# Formato binario del índice (versión 4):
+#   cabecera   b"SBIX" + versión (u32) + número de entradas (u32) + número de reinicios (u32)
+#   entradas   ordenadas por ruta; cada una con ctime_ns, mtime_ns, inodo, tamaño,
+#              modo, hash (20 bytes), flags (u16), bytes compartidos con la ruta
+#              anterior (u16), longitud del resto de la ruta (u16) y el resto de la ruta
+#   reinicios  offsets (u32) de las entradas que guardan la ruta completa, una
+#              de cada INDEX_RESTART_INTERVAL; permiten la búsqueda binaria
+#   final      SHA-1 de todo lo anterior
+#
+# Una entrada sin ENTRY_STAGED es un archivo ya incluido en HEAD: no está en
+# staging, pero su stat evita volver a leerlo en 'add' y 'status'.
+#
+# Las versiones 1 ({ruta: hash}), 2 (JSON con datos de stat) y 3 (binaria sin
+# flags) se siguen leyendo, con todas sus entradas en staging, y se convierten
+# al formato actual la próxima vez que se guarda el índice.
+INDEX_SIGNATURE = b"SBIX"
+INDEX_VERSION = 4
+INDEX_HEADER = struct.Struct(">4sIII")
+INDEX_ENTRY = struct.Struct(">qqQqI20sHHH")
+INDEX_ENTRY_V3 = struct.Struct(">qqQqI20sHH")
+RESTART_OFFSET = struct.Struct(">I")
+INDEX_RESTART_INTERVAL = 16
+CHECKSUM_SIZE = 20
+
+# Flags de una entrada: en staging, y (sólo en el journal) ruta eliminada
+ENTRY_STAGED = 0x1
+ENTRY_REMOVED = 0x2
+
+# Journal del índice (index.journal): 'add' agrega registros al final en lugar
+# de reescribir todo el índice.
+#   cabecera   b"SBJN" + versión (u32) + SHA-1 final del índice al que se aplica
+#   registros  longitud (u32) + entrada (ctime_ns, mtime_ns, inodo, tamaño, modo,
+#              hash, flags (u16), longitud de la ruta (u16), ruta) + CRC32 de la
+#              entrada (u32)
+# Un journal con otro SHA-1 pertenece a un índice ya compactado y se ignora; un
+# registro incompleto al final (escritura interrumpida) se descarta. Los
+# registros de la versión 1 no tienen flags.
+JOURNAL_SIGNATURE = b"SBJN"
+JOURNAL_VERSION = 2
+JOURNAL_HEADER = struct.Struct(">4sI20s")
+JOURNAL_ENTRY = struct.Struct(">qqQqI20sHH")
+JOURNAL_ENTRY_V1 = struct.Struct(">qqQqI20sH")
+JOURNAL_LENGTH = struct.Struct(">I")
+JOURNAL_CRC = struct.Struct(">I")
+
+def _encode_path(path):
+    return path.encode("utf-8", "surrogateescape")
+
+def _decode_path(data):
+    return data.decode("utf-8", "surrogateescape")
+
+class IndexEntry:
+    """Entrada del índice: hash del contenido, datos de stat y si está en staging"""
+
+    __slots__ = ("hash", "mtime_ns", "ctime_ns", "size", "ino", "mode", "staged")
+
+    def __init__(self, hash, mtime_ns=0, ctime_ns=0, size=-1, ino=0, mode=0, staged=True):
+        self.hash = hash
+        self.mtime_ns = mtime_ns
+        self.ctime_ns = ctime_ns
+        self.size = size
+        self.ino = ino
+        self.mode = mode
+        self.staged = staged
+
+    @classmethod
+    def from_stat(cls, hash, st, staged=True):
+        return cls(hash, st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino, st.st_mode, staged)
+
+    @property
+    def flags(self):
+        return ENTRY_STAGED if self.staged else 0
+
+    def matches(self, st):
+        """Indica si los datos de stat coinciden con los guardados"""
+        return (self.size == st.st_size and self.mtime_ns == st.st_mtime_ns
+                and self.ctime_ns == st.st_ctime_ns and self.ino == st.st_ino
+                and self.mode == st.st_mode)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["hash"], data.get("mtime_ns", 0), data.get("ctime_ns", 0),
+                   data.get("size", -1), data.get("ino", 0), data.get("mode", 0))
+
+class Index:
+    """Área de preparación (.sbac/index) con caché de stat por archivo.
+
+    Cada entrada guarda mtime, ctime, tamaño, inodo y modo del archivo al
+    momento de calcular su hash. Si el stat actual coincide, el contenido no
+    cambió y no hace falta volver a leerlo.
+
+    'commit' no vacía el índice: marca sus entradas como fuera de staging y
+    conserva su stat, y 'checkout' las actualiza con los archivos que
+    escribe. Así las entradas fuera de staging tienen siempre el contenido de
+    HEAD, y 'add' y 'status' no vuelven a leer los archivos que no cambiaron.
+
+    El archivo se mapea en memoria y se consulta directamente: una búsqueda
+    es binaria sobre la tabla de reinicios y recorrer el índice decodifica las
+    entradas sobre la marcha, sin construir un diccionario. Los cambios se
+    acumulan aparte y se mezclan (en orden) con las entradas al guardar.
+
+    Guardar agrega los cambios al journal; sólo cuando el journal supera
+    'index_journal_limit' bytes se compacta todo en un índice nuevo. Al leer,
+    el journal se aplica sobre el índice.
+
+    Timestamp "racy": si un archivo se modifica en el mismo instante (según
+    la resolución del sistema de archivos) en que se escribe el índice, su
+    stat puede coincidir aunque el contenido sea otro. Por eso las entradas
+    con mtime >= mtime del índice nunca se consideran válidas, y al guardar
+    se invalidan ("smudge") las que caen en el mismo instante que el índice.
+    """
+
+    def __init__(self, path=INDEX_FILE, journal_path=INDEX_JOURNAL_FILE, journal_limit=None):
+        self.path = path
+        self.journal_path = journal_path
+        self.timestamp = None  # mtime_ns del archivo del índice (o del journal)
+        self._journal_limit = journal_limit
+        self._mm = None
+        self._version = INDEX_VERSION
+        self._count = 0
+        self._restarts = 0
+        self._restarts_start = 0
+        self._journal = {}  # entradas ya guardadas en el journal (None = eliminada)
+        self._journal_end = None  # fin del último registro válido del journal
+        self._journal_version = JOURNAL_VERSION
+        self._changes = {}  # entradas pendientes de guardar (None = eliminada)
+
+    @property
+    def journal_limit(self):
+        if self._journal_limit is None:
+            config = load_config()
+            self._journal_limit = int(config.get("index_journal_limit", DEFAULT_INDEX_JOURNAL_LIMIT))
+        return self._journal_limit
+
+    @classmethod
+    def load(cls, path=INDEX_FILE, journal_path=INDEX_JOURNAL_FILE):
+        while True:
+            index = cls(path, journal_path)
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                return index
+
+            with f:
+                st = os.fstat(f.fileno())
+                index.timestamp = st.st_mtime_ns
+                if f.read(1) == b"{":
+                    # Formato JSON anterior: se carga en memoria y se convierte al guardar
+                    f.seek(0)
+                    index._load_json(json.load(f))
+                    return index
+                index._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            index._check_binary()
+            index._load_journal()
+
+            # Si otro proceso compactó el índice mientras se leía, el journal
+            # leído puede no corresponder: volver a cargar
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and (current.st_ino, current.st_mtime_ns) == (st.st_ino, st.st_mtime_ns):
+                return index
+            index.close()
+
+    def _load_json(self, data):
+        if isinstance(data.get("entries"), dict):
+            entries = {path: IndexEntry.from_dict(entry) for path, entry in data["entries"].items()}
+        else:
+            entries = {path: IndexEntry(file_hash) for path, file_hash in data.items()}
+        self._changes = entries
+
+    def _check_binary(self):
+        mm = self._mm
+        if len(mm) < INDEX_HEADER.size + CHECKSUM_SIZE:
+            raise ValueError(f"index file '{self.path}' is truncated")
+        signature, version, count, restarts = INDEX_HEADER.unpack_from(mm, 0)
+        if signature != INDEX_SIGNATURE or version not in (3, INDEX_VERSION):
+            raise ValueError(f"unsupported index file '{self.path}'")
+        with memoryview(mm) as view, view[:-CHECKSUM_SIZE] as body:
+            digest = hashlib.sha1(body).digest()
+        if digest != mm[-CHECKSUM_SIZE:]:
+            raise ValueError(f"index file '{self.path}' is corrupt (bad checksum)")
+
+        self._version = version
+        self._count = count
+        self._restarts = restarts
+        self._restarts_start = len(mm) - CHECKSUM_SIZE - restarts * RESTART_OFFSET.size
+
+    def _load_journal(self):
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            data = f.read()
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+
+        if len(data) < JOURNAL_HEADER.size:
+            return
+        signature, version, base = JOURNAL_HEADER.unpack_from(data, 0)
+        if signature != JOURNAL_SIGNATURE or version not in (1, JOURNAL_VERSION) or base != self._mm[-CHECKSUM_SIZE:]:
+            return
+
+        pos = JOURNAL_HEADER.size
+        while pos + JOURNAL_LENGTH.size <= len(data):
+            (size,) = JOURNAL_LENGTH.unpack_from(data, pos)
+            start = pos + JOURNAL_LENGTH.size
+            end = start + size + JOURNAL_CRC.size
+            if end > len(data):
+                break
+            payload = data[start:start + size]
+            if zlib.crc32(payload) != JOURNAL_CRC.unpack_from(data, start + size)[0]:
+                break
+            if version == JOURNAL_VERSION:
+                ctime_ns, mtime_ns_entry, ino, file_size, mode, raw_hash, flags, path_size = \
+                    JOURNAL_ENTRY.unpack_from(payload, 0)
+                header_size = JOURNAL_ENTRY.size
+            else:
+                ctime_ns, mtime_ns_entry, ino, file_size, mode, raw_hash, path_size = JOURNAL_ENTRY_V1.unpack_from(payload, 0)
+                flags, header_size = ENTRY_STAGED, JOURNAL_ENTRY_V1.size
+            path = _decode_path(payload[header_size:header_size + path_size])
+            if flags & ENTRY_REMOVED:
+                self._journal[path] = None
+            else:
+                self._journal[path] = IndexEntry(raw_hash.hex(), mtime_ns_entry, ctime_ns, file_size, ino, mode,
+                                                 bool(flags & ENTRY_STAGED))
+            pos = end
+        self._journal_version = version
+
+        self._journal_end = pos
+        self.timestamp = max(self.timestamp, mtime_ns)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    # Lectura de las entradas del archivo mapeado
+
+    def _decode_at(self, offset, previous_path):
+        if self._version == INDEX_VERSION:
+            ctime_ns, mtime_ns, ino, size, mode, raw_hash, flags, shared, suffix_size = \
+                INDEX_ENTRY.unpack_from(self._mm, offset)
+            start = offset + INDEX_ENTRY.size
+        else:
+            ctime_ns, mtime_ns, ino, size, mode, raw_hash, shared, suffix_size = INDEX_ENTRY_V3.unpack_from(self._mm, offset)
+            flags = ENTRY_STAGED
+            start = offset + INDEX_ENTRY_V3.size
+        path = previous_path[:shared] + self._mm[start:start + suffix_size]
+        entry = IndexEntry(raw_hash.hex(), mtime_ns, ctime_ns, size, ino, mode, bool(flags & ENTRY_STAGED))
+        return path, entry, start + suffix_size
+
+    def _iter_base(self, offset=INDEX_HEADER.size, count=None):
+        """Genera (ruta en bytes, entrada) del archivo a partir de un offset"""
+        remaining = self._count if count is None else count
+        path = b""
+        while remaining > 0 and offset < self._restarts_start:
+            path, entry, offset = self._decode_at(offset, path)
+            yield path, entry
+            remaining -= 1
+
+    def _restart_offset(self, i):
+        return RESTART_OFFSET.unpack_from(self._mm, self._restarts_start + i * RESTART_OFFSET.size)[0]
+
+    def _base_get(self, path):
+        if self._mm is None or not self._count:
+            return None
+
+        key = _encode_path(path)
+        # Buscar el último reinicio cuya ruta es <= key
+        lo, hi = 0, self._restarts
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_path, _, _ = self._decode_at(self._restart_offset(mid), b"")
+            if mid_path <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+
+        start = self._restart_offset(lo - 1)
+        remaining = self._count - (lo - 1) * INDEX_RESTART_INTERVAL
+        for entry_path, entry in self._iter_base(start, min(INDEX_RESTART_INTERVAL, remaining)):
+            if entry_path == key:
+                return entry
+            if entry_path > key:
+                break
+        return None
+
+    # Interfaz pública
+
+    def _overlay(self):
+        if not self._journal:
+            return self._changes
+        return {**self._journal, **self._changes}
+
+    def get(self, path):
+        if path in self._changes:
+            return self._changes[path]
+        if path in self._journal:
+            return self._journal[path]
+        return self._base_get(path)
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def items(self):
+        """Genera (ruta, entrada) en orden, mezclando el archivo, el journal y los cambios"""
+        overlay = self._overlay()
+        changes = sorted((_encode_path(path), path) for path in overlay)
+        i = 0
+        for raw_path, entry in (self._iter_base() if self._mm is not None else ()):
+            while i < len(changes) and changes[i][0] < raw_path:
+                if overlay[changes[i][1]] is not None:
+                    yield changes[i][1], overlay[changes[i][1]]
+                i += 1
+            if i < len(changes) and changes[i][0] == raw_path:
+                if overlay[changes[i][1]] is not None:
+                    yield changes[i][1], overlay[changes[i][1]]
+                i += 1
+            else:
+                yield _decode_path(raw_path), entry
+        for _, path in changes[i:]:
+            if overlay[path] is not None:
+                yield path, overlay[path]
+
+    def __iter__(self):
+        return (path for path, _ in self.items())
+
+    def __len__(self):
+        overlay = self._overlay()
+        new_paths = sum(1 for path, entry in overlay.items() if entry is not None and self._base_get(path) is None)
+        removed = sum(1 for path, entry in overlay.items() if entry is None and self._base_get(path) is not None)
+        return self._count + new_paths - removed
+
+    def __bool__(self):
+        return any(True for _ in self.items())
+
+    def staged_items(self):
+        """Genera (ruta, entrada) de los archivos en staging, en orden"""
+        return ((path, entry) for path, entry in self.items() if entry.staged)
+
+    def hashes(self):
+        """Mapa {ruta: hash} de los archivos en staging"""
+        return {path: entry.hash for path, entry in self.staged_items()}
+
+    def update(self, path, file_hash, st=None, staged=True):
+        """Guarda el hash (y el stat) de un archivo; staged=False sólo lo recuerda como parte de HEAD"""
+        if st is not None:
+            self._changes[path] = IndexEntry.from_stat(file_hash, st, staged)
+        else:
+            self._changes[path] = IndexEntry(file_hash, staged=staged)
+
+    def remove(self, path):
+        """Quita un archivo del índice"""
+        self._changes[path] = None
+
+    def mark_committed(self, staged=None):
+        """Saca de staging las entradas (ya forman parte de HEAD), conservando su stat.
+
+        'staged' es el mapa {ruta: entrada} de staged_items() si ya se leyó.
+        """
+        if staged is None:
+            staged = dict(self.staged_items())
+        for path, entry in staged.items():
+            self._changes[path] = IndexEntry(entry.hash, entry.mtime_ns, entry.ctime_ns, entry.size,
+                                             entry.ino, entry.mode, staged=False)
+
+    def is_racy(self, entry):
+        return self.timestamp is None or entry.mtime_ns >= self.timestamp
+
+    def cached_hash(self, path, st):
+        """Hash guardado si el stat del archivo no cambió, o None si hay que leerlo"""
+        entry = self.get(path)
+        if entry is None or not entry.matches(st) or self.is_racy(entry):
+            return None
+        return entry.hash
+
+    # Escritura
+
+    def _write(self, tmp_path, entries, since_ns):
+        """Escribe el índice; devuelve (mtime del archivo, rutas que podrían ser racy)"""
+        candidates = []
+        restarts = []
+        count = 0
+        with open(tmp_path, "wb") as f:
+            # La cabecera se completa al final con el número de entradas
+            f.write(INDEX_HEADER.pack(INDEX_SIGNATURE, INDEX_VERSION, 0, 0))
+            offset = INDEX_HEADER.size
+            previous = b""
+            for path, entry in entries:
+                raw_path = _encode_path(path)
+                if count % INDEX_RESTART_INTERVAL == 0:
+                    restarts.append(offset)
+                    shared = 0
+                else:
+                    shared = 0
+                    limit = min(len(previous), len(raw_path), 0xffff)
+                    while shared < limit and previous[shared] == raw_path[shared]:
+                        shared += 1
+                suffix = raw_path[shared:]
+                record = INDEX_ENTRY.pack(entry.ctime_ns, entry.mtime_ns, entry.ino, entry.size, entry.mode,
+                                          bytes.fromhex(entry.hash), entry.flags, shared, len(suffix)) + suffix
+                f.write(record)
+                offset += len(record)
+                previous = raw_path
+                count += 1
+                if entry.mtime_ns >= since_ns:
+                    candidates.append(path)
+
+            for restart in restarts:
+                f.write(RESTART_OFFSET.pack(restart))
+            f.flush()
+
+        # Reescribir la cabecera y calcular el checksum definitivo
+        with open(tmp_path, "r+b") as f:
+            f.write(INDEX_HEADER.pack(INDEX_SIGNATURE, INDEX_VERSION, count, len(restarts)))
+            f.seek(0)
+            checksum = hashlib.sha1()
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                checksum.update(block)
+            f.write(checksum.digest())
+            f.flush()
+            return os.fstat(f.fileno()).st_mtime_ns, candidates
+
+    @staticmethod
+    def _journal_record(path, entry):
+        raw_path = _encode_path(path)
+        if entry is None:
+            payload = JOURNAL_ENTRY.pack(0, 0, 0, -1, 0, bytes(20), ENTRY_REMOVED, len(raw_path)) + raw_path
+        else:
+            payload = JOURNAL_ENTRY.pack(entry.ctime_ns, entry.mtime_ns, entry.ino, entry.size, entry.mode,
+                                         bytes.fromhex(entry.hash), entry.flags, len(raw_path)) + raw_path
+        return JOURNAL_LENGTH.pack(len(payload)) + payload + JOURNAL_CRC.pack(zlib.crc32(payload))
+
+    def _append_journal(self, records):
+        """Agrega registros al journal; devuelve el mtime_ns resultante del journal"""
+        if self._journal_end is None:
+            # Journal nuevo (o uno viejo de un índice ya compactado)
+            f = open(self.journal_path, "wb")
+            f.write(JOURNAL_HEADER.pack(JOURNAL_SIGNATURE, JOURNAL_VERSION, self._mm[-CHECKSUM_SIZE:]))
+        else:
+            # Descartar un posible registro incompleto de una escritura interrumpida
+            f = open(self.journal_path, "r+b")
+            f.truncate(self._journal_end)
+            f.seek(self._journal_end)
+        with f:
+            f.write(records)
+            f.flush()
+            self._journal_end = f.tell()
+            return os.fstat(f.fileno()).st_mtime_ns
+
+    def save(self):
+        """Guarda los cambios en el journal, o compacta si el journal se hace muy grande"""
+        if self._mm is None or self._version != INDEX_VERSION or self._journal_version != JOURNAL_VERSION:
+            # Sin índice binario (nuevo, JSON o de una versión anterior): escribirlo completo
+            self.compact()
+            return
+        if not self._changes:
+            return
+
+        records = b"".join(self._journal_record(path, entry) for path, entry in self._changes.items())
+        if (self._journal_end or JOURNAL_HEADER.size) + len(records) > self.journal_limit:
+            self.compact()
+            return
+
+        timestamp = self._append_journal(records)
+        # Invalidar las entradas escritas en el mismo instante que el journal
+        racy = {path: IndexEntry(entry.hash, entry.mtime_ns, entry.ctime_ns, -1, entry.ino, entry.mode, entry.staged)
+                for path, entry in self._changes.items() if entry is not None and entry.mtime_ns >= timestamp}
+        if racy:
+            self._changes.update(racy)
+            timestamp = self._append_journal(b"".join(self._journal_record(path, entry)
+                                                      for path, entry in racy.items()))
+
+        self._journal.update(self._changes)
+        self._changes = {}
+        self.timestamp = max(self.timestamp, timestamp)
+
+    def compact(self):
+        """Escribe el índice completo (con el journal aplicado) y elimina el journal"""
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        # Margen amplio: el reloj del sistema de archivos puede ir por detrás del de Python
+        since_ns = time.time_ns() - 10 * 10**9
+        timestamp, candidates = self._write(tmp_path, self.items(), since_ns)
+
+        racy = []
+        for path in candidates:
+            entry = self.get(path)
+            if entry.mtime_ns >= timestamp:
+                racy.append((path, entry))
+        if racy:
+            for path, entry in racy:
+                self._changes[path] = IndexEntry(entry.hash, entry.mtime_ns, entry.ctime_ns,
+                                                 -1, entry.ino, entry.mode, entry.staged)
+            timestamp, _ = self._write(tmp_path, self.items(), since_ns)
+
+        self.close()
+        os.replace(tmp_path, self.path)
+        # El índice nuevo ya incluye el journal; si el proceso se interrumpe
+        # antes de borrarlo, su SHA-1 ya no coincide y se ignora
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._changes = {}
+        self._journal = {}
+        self._journal_end = None
+        self._journal_version = JOURNAL_VERSION
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._check_binary()
+        self.timestamp = timestamp
+
+    def clear(self):
+        """Vacía el área de preparación eliminando el índice y su journal"""
+        self.close()
+        for path in (self.path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.__init__(self.path, self.journal_path, self._journal_limit)
@@ -0,0 +1,341 @@
+import math
+from src.config import *
+
+# Diferencias entre dos listas de líneas con el mismo formato unificado que
+# difflib.unified_diff, pero sin SequenceMatcher (que se vuelve cuadrático con
+# archivos grandes y muchas líneas repetidas).
+#
+#   myers      diff mínimo de Myers con la "serpiente del medio": memoria
+#              lineal y tiempo O((N + M) D), con D el número de líneas cambiadas
+#              (si D es muy grande se acepta un diff casi mínimo, como en git)
+#   patience   ancla las líneas que aparecen una sola vez en cada lado (en el
+#              mismo orden) y compara con Myers los tramos entre anclas
+#   histogram  ancla en la línea común que menos se repite y extiende la
+#              coincidencia alrededor; suele alinear mejor el código movido
+#
+# Antes de comparar, las líneas se convierten en enteros y se descartan las
+# que sólo existen en un lado: nunca pueden coincidir y en un archivo generado
+# suelen ser la mayoría de las líneas cambiadas.
+DIFF_ALGORITHMS = ("myers", "patience", "histogram")
+
+def _trim(a, alo, ahi, b, blo, bhi, matches):
+    """Agrega a 'matches' el prefijo y el sufijo comunes y devuelve el tramo restante"""
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        matches.append((alo, blo))
+        alo += 1
+        blo += 1
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        matches.append((ahi, bhi))
+    return alo, ahi, blo, bhi
+
+def _middle_snake(a, alo, ahi, b, blo, bhi):
+    """Punto (x, y) de un camino mínimo donde se cruzan la búsqueda hacia
+    adelante y la búsqueda hacia atrás, o None si no hay líneas comunes"""
+    n = ahi - alo
+    m = bhi - blo
+    max_d = (n + m + 1) // 2
+    offset = max_d
+    forward = [-1] * (2 * max_d + 2)
+    backward = [-1] * (2 * max_d + 2)
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    # Con delta impar los caminos se encuentran en la búsqueda hacia adelante
+    front = delta % 2 != 0
+    k1_start = k1_end = k2_start = k2_end = 0
+    max_cost = max(MYERS_MIN_COST, math.isqrt(n + m))
+    for d in range(max_d):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = offset + k1
+            if k1 == -d or (k1 != d and forward[k1_offset - 1] < forward[k1_offset + 1]):
+                x1 = forward[k1_offset + 1]
+            else:
+                x1 = forward[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[alo + x1] == b[blo + y1]:
+                x1 += 1
+                y1 += 1
+            forward[k1_offset] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif front:
+                k2_offset = offset + delta - k1
+                if 0 <= k2_offset < len(backward) and backward[k2_offset] != -1:
+                    if x1 >= n - backward[k2_offset]:
+                        return alo + x1, blo + y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = offset + k2
+            if k2 == -d or (k2 != d and backward[k2_offset - 1] < backward[k2_offset + 1]):
+                x2 = backward[k2_offset + 1]
+            else:
+                x2 = backward[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[ahi - x2 - 1] == b[bhi - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            backward[k2_offset] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not front:
+                k1_offset = offset + delta - k2
+                if 0 <= k1_offset < len(forward) and forward[k1_offset] != -1:
+                    x1 = forward[k1_offset]
+                    if x1 >= n - x2:
+                        return alo + x1, blo + x1 - (k1_offset - offset)
+
+        if d >= max_cost:
+            # Demasiado caro: como git, cortar en el punto más avanzado de
+            # cualquiera de las dos búsquedas (el diff deja de ser mínimo)
+            best = None
+            for k in range(-d + k1_start, d + 1 - k1_end, 2):
+                x = forward[offset + k]
+                if 0 <= x <= n and 0 <= x - k <= m and (best is None or x + x - k > best[0]):
+                    best = (x + x - k, x, x - k)
+            for k in range(-d + k2_start, d + 1 - k2_end, 2):
+                x = backward[offset + k]
+                if 0 <= x <= n and 0 <= x - k <= m and (best is None or x + x - k > best[0]):
+                    best = (x + x - k, n - x, m - (x - k))
+            if best is not None and 0 < best[1] + best[2] < n + m:
+                return alo + best[1], blo + best[2]
+    return None
+
+def _myers(a, b, alo, ahi, blo, bhi, matches):
+    # Pila explícita: los tramos se agregan a 'matches' en cualquier orden
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, matches)
+        if alo == ahi or blo == bhi:
+            continue
+
+        split = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if split is not None:
+            x, y = split
+            stack.append((alo, x, blo, y))
+            stack.append((x, ahi, y, bhi))
+
+def _patience(a, b, alo, ahi, blo, bhi, matches):
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, matches)
+        if alo == ahi or blo == bhi:
+            continue
+
+        # Líneas que aparecen exactamente una vez en cada lado
+        counts = {}
+        for i in range(alo, ahi):
+            line = a[i]
+            position, count = counts.get(line, (i, 0))
+            counts[line] = (position, count + 1)
+        unique = {}
+        for j in range(blo, bhi):
+            line = b[j]
+            if line in unique:
+                unique[line] = None
+            elif counts.get(line, (0, 0))[1] == 1:
+                unique[line] = j
+        pairs = sorted((counts[line][0], j) for line, j in unique.items() if j is not None)
+        anchors = _longest_increasing(pairs)
+        if not anchors:
+            _myers(a, b, alo, ahi, blo, bhi, matches)
+            continue
+
+        # Comparar por separado los tramos entre anclas
+        i, j = alo, blo
+        for anchor_i, anchor_j in anchors:
+            matches.append((anchor_i, anchor_j))
+            stack.append((i, anchor_i, j, anchor_j))
+            i, j = anchor_i + 1, anchor_j + 1
+        stack.append((i, ahi, j, bhi))
+
+def _longest_increasing(pairs):
+    """Subsecuencia más larga de 'pairs' (ordenados por i) con j creciente"""
+    tails = []
+    tail_index = []
+    previous = [None] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo:
+            previous[index] = tail_index[lo - 1]
+        if lo == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[lo] = j
+            tail_index[lo] = index
+
+    result = []
+    index = tail_index[-1] if tail_index else None
+    while index is not None:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+def _histogram(a, b, alo, ahi, blo, bhi, matches):
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, matches)
+        if alo == ahi or blo == bhi:
+            continue
+
+        positions = {}
+        for i in range(alo, ahi):
+            positions.setdefault(a[i], []).append(i)
+
+        # Tramo común cuya línea menos repetida se repite menos veces;
+        # a igual número de repeticiones, el más largo
+        best = None
+        j = blo
+        while j < bhi:
+            candidates = positions.get(b[j])
+            if candidates is None or len(candidates) > HISTOGRAM_MAX_CHAIN:
+                j += 1
+                continue
+            next_j = j + 1
+            for i in candidates:
+                start_i, start_j = i, j
+                while start_i > alo and start_j > blo and a[start_i - 1] == b[start_j - 1]:
+                    start_i -= 1
+                    start_j -= 1
+                end_i, end_j = i + 1, j + 1
+                while end_i < ahi and end_j < bhi and a[end_i] == b[end_j]:
+                    end_i += 1
+                    end_j += 1
+                rarest = min(len(positions[a[k]]) for k in range(start_i, end_i))
+                length = end_i - start_i
+                if best is None or rarest < best[0] or (rarest == best[0] and length > best[1]):
+                    best = (rarest, length, start_i, start_j)
+                next_j = max(next_j, end_j)
+            j = next_j
+
+        if best is None:
+            # Sólo hay líneas demasiado repetidas: Myers
+            _myers(a, b, alo, ahi, blo, bhi, matches)
+            continue
+
+        _, length, start_i, start_j = best
+        matches.extend((start_i + k, start_j + k) for k in range(length))
+        stack.append((alo, start_i, blo, start_j))
+        stack.append((start_i + length, ahi, start_j + length, bhi))
+
+_ENGINES = {"myers": _myers, "patience": _patience, "histogram": _histogram}
+
+def matching_blocks(a, b, algorithm="myers"):
+    """Bloques (i, j, tamaño) de líneas iguales, como SequenceMatcher.get_matching_blocks"""
+    if algorithm not in _ENGINES:
+        raise ValueError(f"unknown diff algorithm '{algorithm}'")
+
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    a_count = len(ids)
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    in_b = set(b_ids)
+
+    # Sólo se comparan las líneas que existen en ambos lados
+    a_keep = [i for i, line in enumerate(a_ids) if line in in_b]
+    b_keep = [j for j, line in enumerate(b_ids) if line < a_count]
+    a_reduced = [a_ids[i] for i in a_keep]
+    b_reduced = [b_ids[j] for j in b_keep]
+
+    pairs = []
+    _ENGINES[algorithm](a_reduced, b_reduced, 0, len(a_reduced), 0, len(b_reduced), pairs)
+    pairs.sort()
+
+    blocks = []
+    for i, j in pairs:
+        i, j = a_keep[i], b_keep[j]
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1][2] += 1
+        else:
+            blocks.append([i, j, 1])
+    blocks = [tuple(block) for block in blocks]
+    blocks.append((len(a), len(b), 0))
+    return blocks
+
+def get_opcodes(blocks):
+    """Operaciones (etiqueta, i1, i2, j1, j2) como SequenceMatcher.get_opcodes"""
+    i = j = 0
+    opcodes = []
+    for ai, bj, size in blocks:
+        tag = ""
+        if i < ai and j < bj:
+            tag = "replace"
+        elif i < ai:
+            tag = "delete"
+        elif j < bj:
+            tag = "insert"
+        if tag:
+            opcodes.append((tag, i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            opcodes.append(("equal", ai, i, bj, j))
+    return opcodes
+
+def group_opcodes(opcodes, n=3):
+    """Agrupa las operaciones en hunks con 'n' líneas de contexto (como get_grouped_opcodes)"""
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        # Un tramo igual largo separa dos hunks
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+def _format_range(start, stop):
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+def unified_diff(a, b, fromfile="", tofile="", n=3, lineterm="\n", algorithm=DEFAULT_DIFF_ALGORITHM):
+    """Genera las líneas de un diff unificado, en el mismo formato que difflib.unified_diff"""
+    started = False
+    for group in group_opcodes(get_opcodes(matching_blocks(a, b, algorithm)), n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}{lineterm}"
+            yield f"+++ {tofile}{lineterm}"
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@{lineterm}"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b[j1:j2]:
+                    yield "+" + line
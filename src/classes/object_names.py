@@ -0,0 +1,143 @@
+import os
+import mmap
+import struct
+from bisect import bisect_left
+from src.config import *
+
+# Formato del índice de nombres de objetos sueltos (objects/info/object-names):
+#   cabecera  b"SONI" + versión (u32)
+#   nombres   N x 20 bytes ordenados
+#
+# Los objetos escritos después de construir el índice se agregan al final de
+# object-names.log (20 bytes por objeto, sin ordenar). Cuando el log supera
+# OBJECT_NAMES_LOG_LIMIT entradas se mezcla con el índice ordenado.
+NAMES_SIGNATURE = b"SONI"
+NAMES_VERSION = 1
+NAMES_HEADER = struct.Struct(">4sI")
+HASH_SIZE = 20
+
+def prefix_bounds(prefix):
+    """Menor y mayor hash binario que empiezan con un prefijo hexadecimal"""
+    low = bytes.fromhex(prefix.ljust(HASH_HEX_LENGTH, "0"))
+    high = bytes.fromhex(prefix.ljust(HASH_HEX_LENGTH, "f"))
+    return low, high
+
+class ObjectNameIndex:
+    """Nombres de los objetos sueltos ordenados, para buscar hashes abreviados.
+
+    Encontrar los objetos que empiezan con un prefijo es una búsqueda binaria
+    en lugar de listar el directorio de objetos. El índice se construye la
+    primera vez que se necesita y después sólo crece con el log.
+    """
+
+    def __init__(self, objects_dir=OBJECTS_DIR):
+        self.path = os.path.join(objects_dir, "info", "object-names")
+        self.log_path = self.path + ".log"
+
+    def add(self, object_hash):
+        """Registra un objeto nuevo (sólo si el índice ya existe; si no, se construirá completo)"""
+        if not os.path.exists(self.log_path):
+            return
+        # Escrituras de 20 bytes en modo append: varios hilos pueden registrar a la vez
+        with open(self.log_path, "ab") as f:
+            f.write(bytes.fromhex(object_hash))
+
+    def clear(self):
+        for path in (self.path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _read_log(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        # Un registro incompleto al final (escritura interrumpida) se ignora
+        return [data[i:i + HASH_SIZE] for i in range(0, len(data) - len(data) % HASH_SIZE, HASH_SIZE)]
+
+    def _read_base(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < NAMES_HEADER.size or NAMES_HEADER.unpack_from(data, 0) != (NAMES_SIGNATURE, NAMES_VERSION):
+            return None
+        return [data[i:i + HASH_SIZE] for i in range(NAMES_HEADER.size, len(data) - HASH_SIZE + 1, HASH_SIZE)]
+
+    def _write_base(self, names):
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(NAMES_HEADER.pack(NAMES_SIGNATURE, NAMES_VERSION))
+            f.write(b"".join(sorted(set(names))))
+        os.replace(tmp_path, self.path)
+
+    def build(self, loose_objects):
+        """Construye el índice a partir de los objetos sueltos (hash, ruta)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # El log se crea antes de listar: un objeto escrito durante la
+        # construcción queda en el listado o en el log
+        open(self.log_path, "ab").close()
+        self._write_base(bytes.fromhex(object_hash) for object_hash, _ in loose_objects)
+
+    def _compact(self):
+        """Mezcla el log con el índice ordenado"""
+        merging_path = f"{self.log_path}.merging-{os.getpid()}"
+        os.replace(self.log_path, merging_path)
+        open(self.log_path, "ab").close()
+        self._write_base((self._read_base() or []) + self._read_log(merging_path))
+        os.remove(merging_path)
+
+    def _search(self, prefix):
+        low, high = prefix_bounds(prefix)
+        matches = []
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return matches
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            count = (size - NAMES_HEADER.size) // HASH_SIZE
+            if count <= 0:
+                return matches
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                names = _MappedNames(mm, count)
+                i = bisect_left(names, low)
+                while i < count and names[i] <= high:
+                    matches.append(names[i].hex())
+                    i += 1
+        return matches
+
+    def find_prefix(self, prefix, loose_objects):
+        """Hashes de los objetos sueltos registrados que empiezan con 'prefix'.
+
+        'loose_objects' es una función que lista los objetos sueltos; sólo se
+        usa la primera vez, para construir el índice.
+        """
+        if not os.path.exists(self.path) or not os.path.exists(self.log_path):
+            self.build(loose_objects())
+
+        log = self._read_log(self.log_path)
+        if len(log) > OBJECT_NAMES_LOG_LIMIT:
+            self._compact()
+            log = []
+
+        low, high = prefix_bounds(prefix)
+        matches = set(self._search(prefix))
+        matches.update(name.hex() for name in log if low <= name <= high)
+        return sorted(matches)
+
+class _MappedNames:
+    """Vista de los nombres del índice mapeado para usar con bisect"""
+
+    def __init__(self, mm, count):
+        self.mm = mm
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start = NAMES_HEADER.size + i * HASH_SIZE
+        return self.mm[start:start + HASH_SIZE]
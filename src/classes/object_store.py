@@ -0,0 +1,765 @@
+import os
+import re
+import json
+import stat
+import zlib
+import hashlib
+import tempfile
+from .pack import PackFile, PackWriter
+from .delta import create_delta
+from .chunker import is_manifest, encode_manifest, decode_manifest
+from .object_names import ObjectNameIndex, prefix_bounds
+from src.config import *
+
+try:
+    import fcntl
+except ImportError:  # Windows: no hay reflinks
+    fcntl = None
+
+# ioctl FICLONE de Linux: clona un archivo compartiendo sus bloques (btrfs, XFS)
+FICLONE = 0x40049409
+
+def reflink(source, target):
+    """Clona 'source' sobre 'target' (ya existente). Devuelve False si no es posible"""
+    if fcntl is None:
+        return False
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            return False
+    return True
+
+def worktree_temp(directory):
+    """Como tempfile.mkstemp, pero con los permisos de un archivo nuevo.
+
+    mkstemp crea el archivo con modo 0600; aquí se pide 0666 y la umask del
+    proceso decide, igual que al crear el archivo con open().
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        tmp_path = os.path.join(directory, f".sbac-tmp-{os.urandom(6).hex()}")
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+def replace_keeping_mode(tmp_path, path):
+    """Reemplaza 'path' por 'tmp_path' conservando los permisos del archivo reemplazado"""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        st = None
+    # Un enlace duro a objects/raw es de sólo lectura por diseño: no se hereda
+    if st is not None and stat.S_ISREG(st.st_mode) and st.st_nlink == 1:
+        os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+    os.replace(tmp_path, path)
+
+# Cada objeto se guarda como b"<tipo> <tamaño>\0" + contenido. La cabecera
+# no forma parte del hash (el hash sigue siendo el SHA-1 del contenido), así
+# que los hashes existentes no cambian y los objetos sin cabecera de
+# repositorios antiguos se siguen leyendo. El manifest de un archivo guardado
+# en chunks tiene el tipo "chunked": un archivo normal cuyo contenido empiece
+# como un manifest sigue siendo un blob.
+OBJECT_TYPES = ("blob", "tree", "commit", "chunked")
+OBJECT_HEADER = re.compile(rb"(blob|tree|commit|chunked) (\d{1,20})\x00")
+# Bytes que bastan para leer la cabecera más larga
+OBJECT_HEADER_PEEK = 32
+
+def encode_header(object_type, size):
+    return f"{object_type} {size}\0".encode()
+
+def parse_header(data):
+    """(tipo, tamaño, inicio del contenido) o None si 'data' no empieza con una cabecera"""
+    match = OBJECT_HEADER.match(data)
+    if match is None:
+        return None
+    return match.group(1).decode(), int(match.group(2)), match.end()
+
+def guess_type(data):
+    """Tipo de un objeto antiguo sin cabecera, deducido de su contenido"""
+    if data[:1] == b"{":
+        try:
+            content = json.loads(data)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return "blob"
+        if isinstance(content, dict):
+            if "tree" in content and "parent" in content:
+                return "commit"
+            # Un árbol sólo tiene nombres y hashes; otro JSON es un archivo
+            if all(isinstance(value, str) for value in content.values()):
+                return "tree"
+    return "blob"
+
+def is_legacy_manifest(data):
+    """Indica si un objeto sin cabecera es el manifest de un archivo en chunks"""
+    if not is_manifest(data):
+        return False
+    try:
+        manifest = decode_manifest(data)
+    except (UnicodeDecodeError, ValueError):
+        return False
+    return isinstance(manifest, dict) and isinstance(manifest.get("chunks"), list)
+
+class AmbiguousObjectName(ValueError):
+    """Un hash abreviado coincide con más de un objeto"""
+
+    def __init__(self, prefix, candidates):
+        self.prefix = prefix
+        self.candidates = candidates
+        super().__init__(f"short object ID {prefix} is ambiguous; candidates: {', '.join(candidates)}")
+
+class ObjectStore:
+    """Acceso al directorio de objetos (.sbac/objects).
+
+    Los objetos nuevos se guardan con un esquema de dos niveles
+    (objects/ab/cdef...) para que ningún directorio acumule cientos de miles
+    de entradas. La lectura entiende también el esquema plano antiguo
+    (objects/abcdef...), de modo que un repositorio puede seguir usándose
+    mientras se migra con 'sbac migrate-objects'.
+
+    Los objetos se comprimen con zlib usando el nivel 'compression_level' de
+    .sbac/config. Los objetos sin comprimir (repositorios antiguos o nivel 0)
+    se siguen leyendo sin cambios.
+
+    'sbac repack' agrupa los objetos sueltos en un packfile; los packs se
+    consultan primero mediante su índice mapeado en memoria.
+
+    Para 'checkout' con enlaces, objects/raw guarda copias de sólo lectura
+    de los blobs sin comprimir, que se enlazan al directorio de trabajo.
+    Antes de enlazar una copia se compara su tamaño, mtime e inodo con los
+    que tenía al escribirse, y sólo si cambiaron se verifica su hash.
+    """
+
+    def __init__(self, objects_dir=OBJECTS_DIR, compression_level=None):
+        self.objects_dir = objects_dir
+        self.pack_dir = os.path.join(objects_dir, "pack")
+        self.raw_dir = os.path.join(objects_dir, "raw")
+        self.names = ObjectNameIndex(objects_dir)
+        self._compression_level = compression_level
+        self._packs = None
+        self._pack_names = None
+
+    @property
+    def compression_level(self):
+        if self._compression_level is None:
+            config = load_config()
+            self._compression_level = int(config.get("compression_level", DEFAULT_COMPRESSION_LEVEL))
+        return self._compression_level
+
+    def compress(self, data):
+        if self.compression_level == 0:
+            return data
+        return zlib.compress(data, self.compression_level)
+
+    @staticmethod
+    def decompress(raw):
+        """Descomprime un objeto; los objetos guardados sin comprimir se devuelven tal cual"""
+        # Cabecera zlib: método deflate (0x78) y checksum de cabecera múltiplo de 31
+        if len(raw) >= 2 and raw[0] == 0x78 and (raw[0] * 256 + raw[1]) % 31 == 0:
+            try:
+                return zlib.decompress(raw)
+            except zlib.error:
+                pass
+        return raw
+
+    @staticmethod
+    def is_object_name(name):
+        """Indica si un nombre es un hash SHA-1 completo en hexadecimal"""
+        return len(name) == HASH_HEX_LENGTH and all(c in "0123456789abcdef" for c in name)
+
+    def object_path(self, object_hash):
+        """Ruta (con fan-out) donde se escribe un objeto"""
+        return os.path.join(self.objects_dir, object_hash[:FANOUT_WIDTH], object_hash[FANOUT_WIDTH:])
+
+    def flat_path(self, object_hash):
+        """Ruta con el esquema plano anterior"""
+        return os.path.join(self.objects_dir, object_hash)
+
+    def find_loose(self, object_hash):
+        """Devuelve la ruta del objeto suelto o None si no existe"""
+        if not object_hash or os.path.sep in object_hash or object_hash.startswith("."):
+            return None
+
+        if len(object_hash) > FANOUT_WIDTH:
+            sharded = self.object_path(object_hash)
+            if os.path.isfile(sharded):
+                return sharded
+
+        flat = self.flat_path(object_hash)
+        if os.path.isfile(flat):
+            return flat
+
+        # Una migración concurrente pudo mover el objeto entre las dos comprobaciones
+        if len(object_hash) > FANOUT_WIDTH and os.path.isfile(self.object_path(object_hash)):
+            return self.object_path(object_hash)
+        return None
+
+    def _list_packs(self):
+        if not os.path.isdir(self.pack_dir):
+            return []
+        return sorted(name for name in os.listdir(self.pack_dir) if name.endswith(".idx"))
+
+    def packs(self):
+        """Packs del repositorio; se abren una sola vez por instancia"""
+        if self._packs is None:
+            self._pack_names = self._list_packs()
+            self._packs = [PackFile(os.path.join(self.pack_dir, name)) for name in self._pack_names]
+        return self._packs
+
+    def close_packs(self):
+        for pack in self._packs or []:
+            pack.close()
+        self._packs = None
+        self._pack_names = None
+
+    def _reload_packs_if_changed(self):
+        """Vuelve a abrir los packs si otro proceso hizo un repack"""
+        if self._packs is not None and self._list_packs() != self._pack_names:
+            self.close_packs()
+            return True
+        return False
+
+    def _find_packed(self, object_hash):
+        if not self.is_object_name(object_hash):
+            return None
+        for pack in self.packs():
+            offset = pack.find(object_hash)
+            if offset is not None:
+                return pack, offset
+        return None
+
+    def exists(self, object_hash):
+        if self._find_packed(object_hash) is not None or self.find_loose(object_hash) is not None:
+            return True
+        return self._reload_packs_if_changed() and self._find_packed(object_hash) is not None
+
+    def _read_stored(self, object_hash):
+        """Bytes guardados de un objeto (cabecera incluida) o None si no existe"""
+        packed = self._find_packed(object_hash)
+        if packed is not None:
+            pack, offset = packed
+            return pack.read_at(offset)
+
+        path = self.find_loose(object_hash)
+        if path is not None:
+            with open(path, "rb") as f:
+                return self.decompress(f.read())
+
+        if self._reload_packs_if_changed():
+            packed = self._find_packed(object_hash)
+            if packed is not None:
+                pack, offset = packed
+                return pack.read_at(offset)
+        return None
+
+    def _read_typed(self, object_hash):
+        """(tipo o None si no tiene cabecera, contenido); (None, None) si no existe"""
+        stored = self._read_stored(object_hash)
+        if stored is None:
+            return None, None
+        header = parse_header(stored)
+        # Un blob antiguo podría empezar como una cabecera: el tamaño debe coincidir
+        if header is not None and header[1] == len(stored) - header[2]:
+            return header[0], stored[header[2]:]
+        return None, stored
+
+    def read(self, object_hash):
+        """Lee el contenido de un objeto; devuelve None si no existe"""
+        return self._read_typed(object_hash)[1]
+
+    def _peek_loose(self, path, size):
+        with open(path, "rb") as f:
+            raw = f.read(OBJECT_HEADER_PEEK)
+            if not (len(raw) >= 2 and raw[0] == 0x78 and (raw[0] * 256 + raw[1]) % 31 == 0):
+                return raw[:size]
+            decompressor = zlib.decompressobj()
+            data = b""
+            while raw and len(data) < size and not decompressor.eof:
+                try:
+                    data += decompressor.decompress(raw, size - len(data))
+                except zlib.error:
+                    # No era zlib: objeto guardado sin comprimir
+                    f.seek(0)
+                    return f.read(size)
+                raw = decompressor.unconsumed_tail or f.read(OBJECT_HEADER_PEEK)
+            return data
+
+    def peek(self, object_hash, size=OBJECT_HEADER_PEEK):
+        """Primeros 'size' bytes guardados de un objeto, sin leerlo completo (None si no existe)"""
+        packed = self._find_packed(object_hash)
+        if packed is None:
+            path = self.find_loose(object_hash)
+            if path is not None:
+                return self._peek_loose(path, size)
+            if not self._reload_packs_if_changed():
+                return None
+            packed = self._find_packed(object_hash)
+            if packed is None:
+                return None
+        pack, offset = packed
+        return pack.read_prefix(offset, size)
+
+    def has_type(self, object_hash, object_type):
+        """Indica si el objeto existe y es del tipo indicado, leyendo sólo su cabecera.
+
+        Un objeto antiguo sin cabecera que no empieza con "{" es un blob; si
+        empieza con "{" se lee completo y su tipo se deduce con guess_type.
+        """
+        prefix = self.peek(object_hash)
+        if prefix is None:
+            return False
+        header = parse_header(prefix)
+        if header is not None:
+            return header[0] == object_type
+        if prefix[:1] != b"{":
+            return object_type == "blob"
+        return guess_type(self.read(object_hash)) == object_type
+
+    def read_object(self, object_hash, object_type):
+        """Contenido de un objeto del tipo indicado; None si no existe o es de otro tipo"""
+        if not self.has_type(object_hash, object_type):
+            return None
+        return self.read(object_hash)
+
+    def info(self, object_hash):
+        """(tipo, tamaño del contenido) de un objeto, o None si no existe.
+
+        Con cabecera no se lee el contenido; un objeto antiguo sin cabecera
+        se lee completo para deducir su tipo.
+        """
+        prefix = self.peek(object_hash)
+        if prefix is None:
+            return None
+        header = parse_header(prefix)
+        if header is not None:
+            return header[0], header[1]
+        data = self.read(object_hash)
+        return guess_type(data), len(data)
+
+    def _manifest(self, object_hash):
+        """Manifest decodificado de un archivo en chunks; None si es un blob normal"""
+        prefix = self.peek(object_hash)
+        if prefix is None:
+            return None
+        header = parse_header(prefix)
+        if header is not None and header[0] != "chunked":
+            return None
+        if header is None and not is_manifest(prefix):
+            return None
+        data = self.read(object_hash)
+        if header is None and not is_legacy_manifest(data):
+            return None
+        return decode_manifest(data)
+
+    def blob_size(self, object_hash):
+        """Tamaño del archivo que guarda un blob (para uno en chunks, la suma de sus chunks)"""
+        prefix = self.peek(object_hash)
+        if prefix is None:
+            return None
+        header = parse_header(prefix)
+        if header is not None and header[0] != "chunked":
+            return header[1]
+        data = self.read(object_hash)
+        if header is None and not is_legacy_manifest(data):
+            return len(data)
+        return decode_manifest(data)["size"]
+
+    def find_prefix(self, prefix):
+        """Hashes completos de los objetos que empiezan con 'prefix' (ordenados)"""
+        prefix = prefix.lower()
+        low, high = prefix_bounds(prefix)
+        matches = set()
+        for pack in self.packs():
+            matches.update(pack.find_prefix(low, high))
+
+        # El índice de nombres puede tener objetos que un repack ya movió
+        loose = [object_hash for object_hash in self.names.find_prefix(prefix, self.loose_objects)
+                 if object_hash in matches or self.find_loose(object_hash) is not None]
+        matches.update(loose)
+        if not matches:
+            # Objeto que el índice no alcanzó a registrar: revisar sólo su subdirectorio
+            shard = os.path.join(self.objects_dir, prefix[:FANOUT_WIDTH])
+            if len(prefix) >= FANOUT_WIDTH and os.path.isdir(shard):
+                matches.update(prefix[:FANOUT_WIDTH] + name for name in os.listdir(shard)
+                               if (prefix[:FANOUT_WIDTH] + name).startswith(prefix)
+                               and self.is_object_name(prefix[:FANOUT_WIDTH] + name))
+        return sorted(matches)
+
+    def expand(self, name):
+        """Hash completo de un objeto a partir de su nombre o de un prefijo único.
+
+        Devuelve None si no existe y lanza AmbiguousObjectName si el prefijo
+        coincide con varios objetos.
+        """
+        if self.exists(name):
+            return name
+        if len(name) < MIN_ABBREV_LENGTH or len(name) >= HASH_HEX_LENGTH \
+                or any(c not in "0123456789abcdefABCDEF" for c in name):
+            return None
+        matches = self.find_prefix(name)
+        if len(matches) > 1:
+            raise AmbiguousObjectName(name, matches)
+        return matches[0] if matches else None
+
+    def write(self, object_hash, data, object_type="blob"):
+        """Guarda un objeto de tipo 'object_type' si aún no existe. Devuelve True si se escribió"""
+        if self.exists(object_hash):
+            return False
+
+        path = self.object_path(object_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Nombre temporal único: varios hilos pueden escribir el mismo objeto a la vez
+        fd, tmp_path = tempfile.mkstemp(prefix="tmp-obj-", dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.compress(encode_header(object_type, len(data)) + data))
+        os.replace(tmp_path, path)
+        if self.is_object_name(object_hash):
+            self.names.add(object_hash)
+        return True
+
+    def write_file(self, path, buffer_size=DEFAULT_STREAM_BUFFER_SIZE):
+        """Guarda el contenido de un archivo y devuelve su hash.
+
+        El archivo se lee por bloques de 'buffer_size' bytes que pasan a la vez
+        por el SHA-1 y por el compresor hacia un archivo temporal; al conocer
+        el hash, el temporal se renombra a su ruta definitiva. La memoria usada
+        no depende del tamaño del archivo.
+        """
+        os.makedirs(self.objects_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="tmp-obj-", dir=self.objects_dir)
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                # La cabecera lleva el tamaño antes del contenido: se usa el del
+                # archivo al abrirlo y sólo se leen esos bytes. Si el archivo se
+                # acortó mientras se leía, se repite con el tamaño leído.
+                size = os.fstat(src.fileno()).st_size
+                while True:
+                    hasher = hashlib.sha1()
+                    compressor = zlib.compressobj(self.compression_level) if self.compression_level else None
+                    header = encode_header("blob", size)
+                    dst.write(compressor.compress(header) if compressor else header)
+                    remaining = size
+                    while remaining:
+                        block = src.read(min(buffer_size, remaining))
+                        if not block:
+                            break
+                        remaining -= len(block)
+                        hasher.update(block)
+                        dst.write(compressor.compress(block) if compressor else block)
+                    if compressor:
+                        dst.write(compressor.flush())
+                    if not remaining:
+                        break
+                    size -= remaining
+                    src.seek(0)
+                    dst.seek(0)
+                    dst.truncate()
+
+            object_hash = hasher.hexdigest()
+            if self.exists(object_hash):
+                os.remove(tmp_path)
+            else:
+                target = self.object_path(object_hash)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+                self.names.add(object_hash)
+            return object_hash
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def hash_file(path, buffer_size=DEFAULT_STREAM_BUFFER_SIZE):
+        """Hash que tendría el archivo al guardarlo, sin escribir nada"""
+        hasher = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(buffer_size), b""):
+                hasher.update(block)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def hash_chunked(path, chunker, buffer_size=DEFAULT_STREAM_BUFFER_SIZE):
+        """Hash del manifest que tendría un archivo grande, sin escribir nada"""
+        with open(path, "rb") as f:
+            chunks = [(hashlib.sha1(chunk).hexdigest(), len(chunk)) for chunk in chunker.chunks(f, buffer_size)]
+        return hashlib.sha1(encode_manifest(chunks)).hexdigest()
+
+    def write_chunked(self, path, chunker, buffer_size=DEFAULT_STREAM_BUFFER_SIZE):
+        """Guarda un archivo grande como chunks más un manifest.
+
+        Cada chunk es un objeto independiente, así que los chunks que no
+        cambian entre versiones (o que comparten varios archivos) se guardan
+        una sola vez. Devuelve (hash del manifest, bytes leídos, bytes nuevos).
+        """
+        chunks = []
+        new_bytes = 0
+        with open(path, "rb") as f:
+            for chunk in chunker.chunks(f, buffer_size):
+                chunk_hash = hashlib.sha1(chunk).hexdigest()
+                if self.write(chunk_hash, chunk):
+                    new_bytes += len(chunk)
+                chunks.append((chunk_hash, len(chunk)))
+
+        manifest = encode_manifest(chunks)
+        manifest_hash = hashlib.sha1(manifest).hexdigest()
+        self.write(manifest_hash, manifest, "chunked")
+        return manifest_hash, sum(size for _, size in chunks), new_bytes
+
+    def iter_blob(self, object_hash):
+        """Genera el contenido de un archivo por partes, reensamblando los chunks"""
+        object_type, data = self._read_typed(object_hash)
+        if data is None:
+            return
+        if object_type is None:
+            object_type = "chunked" if is_legacy_manifest(data) else "blob"
+        if object_type != "chunked":
+            yield data
+            return
+
+        for chunk_hash, _ in decode_manifest(data)["chunks"]:
+            chunk = self.read(chunk_hash)
+            if chunk is None:
+                raise ValueError(f"missing chunk {chunk_hash} of {object_hash}")
+            yield chunk
+
+    def read_blob(self, object_hash):
+        """Contenido completo de un archivo guardado (normal o en chunks)"""
+        if not self.exists(object_hash):
+            return None
+        return b"".join(self.iter_blob(object_hash))
+
+    def copy_blob_to(self, object_hash, path):
+        """Escribe un archivo guardado en 'path' sin cargarlo entero en memoria"""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = worktree_temp(directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for part in self.iter_blob(object_hash):
+                    f.write(part)
+            replace_keeping_mode(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def raw_path(self, object_hash):
+        """Ruta de la copia sin comprimir de un blob, usada para enlazarlo"""
+        return os.path.join(self.raw_dir, object_hash[:FANOUT_WIDTH], object_hash[FANOUT_WIDTH:])
+
+    @staticmethod
+    def _raw_stamp(st):
+        return f"{st.st_size} {st.st_mtime_ns} {st.st_ino}"
+
+    @classmethod
+    def _write_raw_stamp(cls, path, st):
+        """Guarda junto a la copia sin comprimir el tamaño, mtime e inodo que tiene"""
+        # Nombre temporal único: varios hilos pueden enlazar el mismo blob a la vez
+        fd, tmp_path = tempfile.mkstemp(prefix="tmp-stat-", dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as f:
+            f.write(cls._raw_stamp(st))
+        os.replace(tmp_path, path + ".stat")
+
+    def _raw_is_valid(self, object_hash, path):
+        """Indica si la copia sin comprimir todavía tiene el contenido del blob.
+
+        Si el tamaño, mtime e inodo coinciden con los guardados al escribirla
+        no se lee; si no, se verifica su hash y, si es válida, se actualizan.
+        """
+        st = os.stat(path)
+        try:
+            with open(path + ".stat", "r") as f:
+                if f.read() == self._raw_stamp(st):
+                    return True
+        except FileNotFoundError:
+            pass
+
+        manifest = self._manifest(object_hash)
+        if manifest is None:
+            valid = self.hash_file(path) == object_hash
+        else:
+            with open(path, "rb") as f:
+                valid = all(hashlib.sha1(f.read(size)).hexdigest() == chunk_hash
+                            for chunk_hash, size in manifest["chunks"]) and f.read(1) == b""
+        if valid:
+            self._write_raw_stamp(path, st)
+        return valid
+
+    def _ensure_raw(self, object_hash):
+        path = self.raw_path(object_hash)
+        # Un enlace duro comparte el archivo: si alguien le quitó el modo de sólo
+        # lectura y lo editó, la copia ya no es el blob y se vuelve a escribir
+        if not os.path.isfile(path) or not self._raw_is_valid(object_hash, path):
+            self.copy_blob_to(object_hash, path)
+            # Sólo lectura: un archivo enlazado no se puede modificar en el lugar
+            os.chmod(path, 0o444)
+            self._write_raw_stamp(path, os.stat(path))
+        return path
+
+    def link_blob_to(self, object_hash, path, mode):
+        """Escribe un archivo guardado en 'path' enlazándolo a su copia sin comprimir.
+
+        Con mode "hardlink" se crea un enlace duro (y si no es posible, un
+        reflink); con "reflink" se clona el archivo si el sistema de archivos
+        lo permite (copy-on-write). Si ninguno funciona, se copia. Devuelve
+        el método usado: "hardlink", "reflink" o "copy".
+        """
+        source = self._ensure_raw(object_hash)
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = worktree_temp(directory)
+        os.close(fd)
+        try:
+            if mode == "hardlink":
+                os.remove(tmp_path)
+                try:
+                    os.link(source, tmp_path)
+                    os.replace(tmp_path, path)
+                    return "hardlink"
+                except OSError:
+                    # Otro dispositivo o sin soporte de enlaces: probar con reflink
+                    open(tmp_path, "wb").close()
+            if reflink(source, tmp_path):
+                replace_keeping_mode(tmp_path, path)
+                return "reflink"
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.remove(tmp_path)
+        self.copy_blob_to(object_hash, path)
+        return "copy"
+
+    def loose_objects(self):
+        """Itera (hash, ruta) de los objetos sueltos en ambos esquemas"""
+        if not os.path.isdir(self.objects_dir):
+            return
+
+        with os.scandir(self.objects_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and self.is_object_name(entry.name):
+                    yield entry.name, entry.path
+                elif entry.is_dir() and len(entry.name) == FANOUT_WIDTH:
+                    with os.scandir(entry.path) as shard:
+                        for item in shard:
+                            object_hash = entry.name + item.name
+                            if item.is_file() and self.is_object_name(object_hash):
+                                yield object_hash, item.path
+
+    def repack(self, path_hints=None, window=DEFAULT_PACK_WINDOW, max_depth=DEFAULT_PACK_DELTA_DEPTH):
+        """Agrupa todos los objetos (sueltos y empaquetados) en un único pack.
+
+        'path_hints' asocia hashes de blobs con la ruta del archivo: las
+        versiones de una misma ruta se ordenan por tamaño y cada una se guarda
+        como delta contra el mejor candidato de las 'window' anteriores, sin
+        superar 'max_depth' deltas encadenados.
+
+        Devuelve el número de objetos empaquetados. Los objetos sueltos y los
+        packs anteriores sólo se eliminan cuando el nuevo índice ya existe.
+        """
+        loose = list(self.loose_objects())
+        old_packs = list(self.packs())
+        if not loose and len(old_packs) <= 1:
+            return 0
+
+        sources = {}
+        for pack in old_packs:
+            for object_hash in pack.hashes():
+                sources.setdefault(object_hash, pack)
+        for object_hash, path in loose:
+            sources.setdefault(object_hash, path)
+
+        def load(object_hash):
+            source = sources[object_hash]
+            if isinstance(source, str):
+                with open(source, "rb") as f:
+                    return self.decompress(f.read())
+            return source.read_at(source.find(object_hash))
+
+        # Agrupar los blobs por ruta para buscar bases parecidas
+        groups = {}
+        for object_hash, path in (path_hints or {}).items():
+            if object_hash in sources:
+                groups.setdefault(path, []).append(object_hash)
+
+        writer = PackWriter(self.pack_dir, max(self.compression_level, 1))
+        depths = {}
+        for path in sorted(groups):
+            sizes = {object_hash: len(load(object_hash)) for object_hash in groups[path]}
+            candidates = []
+            for object_hash in sorted(sizes, key=lambda h: (-sizes[h], h)):
+                data = load(object_hash)
+                best = None
+                if len(data) <= BIG_FILE_THRESHOLD:
+                    for base_hash, base_data in candidates:
+                        if depths[base_hash] >= max_depth:
+                            continue
+                        # Bases de tamaño muy distinto no producen deltas útiles
+                        if abs(len(base_data) - len(data)) > len(data) // 2:
+                            continue
+                        limit = len(best[1]) - 1 if best else len(data) // 2
+                        delta = create_delta(base_data, data, limit)
+                        if delta is not None:
+                            best = (base_hash, delta)
+
+                if best:
+                    writer.add_delta(object_hash, best[0], best[1], len(data))
+                    depths[object_hash] = depths[best[0]] + 1
+                else:
+                    writer.add(object_hash, data)
+                    depths[object_hash] = 0
+
+                candidates.insert(0, (object_hash, data))
+                del candidates[window:]
+
+        for object_hash in sorted(sources):
+            if object_hash not in writer.offsets:
+                writer.add(object_hash, load(object_hash))
+        idx_path = writer.finish()
+
+        old_paths = [pack.idx_path for pack in old_packs]
+        self.close_packs()
+        for old_idx in old_paths:
+            if old_idx != idx_path:
+                os.remove(old_idx)
+                os.remove(old_idx[:-len(".idx")] + ".pack")
+        for object_hash, path in loose:
+            os.remove(path)
+            shard = os.path.dirname(path)
+            if shard != self.objects_dir:
+                try:
+                    os.rmdir(shard)
+                except OSError:
+                    pass  # El subdirectorio todavía tiene objetos
+        # Los objetos sueltos pasaron al pack: el índice de nombres se reconstruye
+        self.names.clear()
+
+        return len(writer.offsets)
+
+    def migrate_flat(self):
+        """Mueve los objetos del esquema plano al esquema con fan-out.
+
+        Cada objeto se mueve con un rename atómico, así que los lectores
+        siempre lo encuentran en alguna de las dos rutas.
+        """
+        if not os.path.isdir(self.objects_dir):
+            return 0
+
+        migrated = 0
+        with os.scandir(self.objects_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not self.is_object_name(entry.name):
+                    continue
+
+                target = self.object_path(entry.name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if os.path.exists(target):
+                    # Ya existe en el nuevo esquema: el contenido es el mismo
+                    os.remove(entry.path)
+                else:
+                    os.replace(entry.path, target)
+                migrated += 1
+
+        return migrated
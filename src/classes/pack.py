@@ -0,0 +1,277 @@
+import os
+import mmap
+import zlib
+import struct
+import hashlib
+from collections import OrderedDict
+from .delta import apply_delta, encode_varint, decode_varint
+from src.config import *
+
+# Formato del packfile:
+#   cabecera  b"SPCK" + versión (u32) + número de objetos (u32)
+#   entradas  tipo (u8) + tamaño (varint) + tamaño comprimido (varint)
+#             [+ hash del objeto base (20 bytes) si es un delta] + datos zlib
+#   final     SHA-1 de todo lo anterior
+#
+# Formato del índice (.idx):
+#   cabecera  b"SIDX" + versión (u32)
+#   fan-out   256 x u32: número de hashes cuyo primer byte es <= i
+#   hashes    N x 20 bytes ordenados
+#   offsets   N x u64 con la posición de cada entrada dentro del packfile
+#   final     SHA-1 del packfile + SHA-1 del índice
+PACK_SIGNATURE = b"SPCK"
+IDX_SIGNATURE = b"SIDX"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct(">4sII")
+IDX_HEADER = struct.Struct(">4sI")
+FANOUT = struct.Struct(">256I")
+OFFSET = struct.Struct(">Q")
+HASH_SIZE = 20
+
+# Tipos de entrada dentro del packfile
+ENTRY_FULL = 1
+ENTRY_DELTA = 2
+
+class PackFile:
+    """Lector de un packfile y su índice, ambos mapeados en memoria.
+
+    Un objeto se localiza con la tabla fan-out y una búsqueda binaria sobre
+    los hashes ordenados del índice, sin abrir un archivo por objeto.
+
+    Los objetos guardados como delta se reconstruyen a partir de su base; las
+    bases reconstruidas se guardan en una caché LRU para que leer varias
+    versiones del mismo archivo no repita toda la cadena de deltas.
+    """
+
+    def __init__(self, idx_path, cache_limit=DELTA_BASE_CACHE_LIMIT):
+        self.idx_path = idx_path
+        self.cache_limit = cache_limit
+        self._cache = OrderedDict()
+        self._cache_size = 0
+        self.pack_path = idx_path[:-len(".idx")] + ".pack"
+
+        with open(self.idx_path, "rb") as f:
+            self._idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.pack_path, "rb") as f:
+            self._pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature, version = IDX_HEADER.unpack_from(self._idx, 0)
+        if signature != IDX_SIGNATURE or version != PACK_VERSION:
+            raise ValueError(f"invalid pack index '{idx_path}'")
+
+        self._fanout = FANOUT.unpack_from(self._idx, IDX_HEADER.size)
+        self.count = self._fanout[255]
+        self._hashes_start = IDX_HEADER.size + FANOUT.size
+        self._offsets_start = self._hashes_start + self.count * HASH_SIZE
+
+    def close(self):
+        self._idx.close()
+        self._pack.close()
+
+    def _hash_at(self, i):
+        start = self._hashes_start + i * HASH_SIZE
+        return self._idx[start:start + HASH_SIZE]
+
+    def find(self, object_hash):
+        """Devuelve la posición del objeto en el packfile o None"""
+        key = bytes.fromhex(object_hash)
+        first = key[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._hash_at(mid)
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return OFFSET.unpack_from(self._idx, self._offsets_start + mid * OFFSET.size)[0]
+        return None
+
+    def find_prefix(self, low, high):
+        """Hashes (en hexadecimal) del pack entre 'low' y 'high' (binarios, inclusive)"""
+        first = low[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[high[0]]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._hash_at(mid) < low:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        matches = []
+        while lo < self.count and self._hash_at(lo) <= high:
+            matches.append(self._hash_at(lo).hex())
+            lo += 1
+        return matches
+
+    def _read_entry(self, offset):
+        """Devuelve (tipo, tamaño, hash base o None, datos descomprimidos)"""
+        kind = self._pack[offset]
+        size, pos = decode_varint(self._pack, offset + 1)
+        compressed_size, pos = decode_varint(self._pack, pos)
+        base = None
+        if kind == ENTRY_DELTA:
+            base = self._pack[pos:pos + HASH_SIZE].hex()
+            pos += HASH_SIZE
+        elif kind != ENTRY_FULL:
+            raise ValueError(f"corrupt entry at offset {offset} in '{self.pack_path}'")
+        return kind, size, base, zlib.decompress(self._pack[pos:pos + compressed_size])
+
+    def _cache_get(self, offset):
+        data = self._cache.get(offset)
+        if data is not None:
+            self._cache.move_to_end(offset)
+        return data
+
+    def _cache_put(self, offset, data):
+        if offset in self._cache or len(data) > self.cache_limit:
+            return
+        self._cache[offset] = data
+        self._cache_size += len(data)
+        while self._cache_size > self.cache_limit:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_size -= len(evicted)
+
+    def read_at(self, offset):
+        # Recorrer la cadena de deltas hasta un objeto completo o una base en caché
+        chain = []
+        while True:
+            data = self._cache_get(offset)
+            if data is not None:
+                break
+
+            kind, size, base, data = self._read_entry(offset)
+            if kind == ENTRY_FULL:
+                if len(data) != size:
+                    raise ValueError(f"corrupt entry at offset {offset} in '{self.pack_path}'")
+                break
+
+            chain.append((offset, size, data))
+            offset = self.find(base)
+            if offset is None:
+                raise ValueError(f"missing delta base {base} in '{self.pack_path}'")
+
+        # Aplicar los deltas desde la base hasta el objeto pedido
+        base_offset = offset
+        for offset, size, delta in reversed(chain):
+            self._cache_put(base_offset, data)
+            data = apply_delta(data, delta)
+            if len(data) != size:
+                raise ValueError(f"corrupt entry at offset {offset} in '{self.pack_path}'")
+            base_offset = offset
+        return data
+
+    def read_prefix(self, offset, size):
+        """Primeros 'size' bytes de un objeto; una entrada completa sólo se descomprime hasta ahí"""
+        data = self._cache_get(offset)
+        if data is not None:
+            return data[:size]
+        if self._pack[offset] != ENTRY_FULL:
+            # Un delta sólo se conoce reconstruyéndolo
+            return self.read_at(offset)[:size]
+        _, pos = decode_varint(self._pack, offset + 1)
+        compressed_size, pos = decode_varint(self._pack, pos)
+        return zlib.decompressobj().decompress(self._pack[pos:pos + compressed_size], size)
+
+    def delta_depth(self, offset):
+        """Longitud de la cadena de deltas de una entrada (0 si está completa)"""
+        depth = 0
+        while self._pack[offset] == ENTRY_DELTA:
+            _, pos = decode_varint(self._pack, offset + 1)
+            _, pos = decode_varint(self._pack, pos)
+            offset = self.find(self._pack[pos:pos + HASH_SIZE].hex())
+            depth += 1
+        return depth
+
+    def hashes(self):
+        """Itera los hashes (en hexadecimal) contenidos en el pack"""
+        for i in range(self.count):
+            yield self._hash_at(i).hex()
+
+class PackWriter:
+    """Escribe un packfile y su índice a partir de objetos (hash, contenido)"""
+
+    def __init__(self, pack_dir=PACK_DIR, compression_level=DEFAULT_COMPRESSION_LEVEL):
+        self.pack_dir = pack_dir
+        self.compression_level = compression_level
+        self.offsets = {}
+
+        os.makedirs(self.pack_dir, exist_ok=True)
+        self._tmp_path = os.path.join(self.pack_dir, f"tmp-pack-{os.getpid()}")
+        self._file = open(self._tmp_path, "wb")
+        # El número de objetos se completa al terminar
+        self._write(PACK_HEADER.pack(PACK_SIGNATURE, PACK_VERSION, 0))
+
+    def _write(self, data):
+        self._file.write(data)
+        self._position = self._file.tell()
+
+    def add(self, object_hash, data):
+        if object_hash in self.offsets:
+            return
+        self.offsets[object_hash] = self._position
+        compressed = zlib.compress(data, self.compression_level)
+        self._write(bytes([ENTRY_FULL]) + encode_varint(len(data)) + encode_varint(len(compressed)))
+        self._write(compressed)
+
+    def add_delta(self, object_hash, base_hash, delta, size):
+        """Guarda un objeto como delta contra otro objeto del mismo pack"""
+        if object_hash in self.offsets:
+            return
+        self.offsets[object_hash] = self._position
+        compressed = zlib.compress(delta, self.compression_level)
+        self._write(bytes([ENTRY_DELTA]) + encode_varint(size) + encode_varint(len(compressed)))
+        self._write(bytes.fromhex(base_hash))
+        self._write(compressed)
+
+    def finish(self):
+        """Cierra el pack, escribe el índice y devuelve la ruta del .idx"""
+        # Reescribir la cabecera con el número real de objetos
+        header = PACK_HEADER.pack(PACK_SIGNATURE, PACK_VERSION, len(self.offsets))
+        self._file.seek(0)
+        self._file.write(header)
+        self._file.close()
+
+        checksum = hashlib.sha1()
+        with open(self._tmp_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                checksum.update(block)
+        pack_checksum = checksum.digest()
+        with open(self._tmp_path, "ab") as f:
+            f.write(pack_checksum)
+            f.flush()
+            os.fsync(f.fileno())
+
+        name = f"pack-{pack_checksum.hex()}"
+        pack_path = os.path.join(self.pack_dir, name + ".pack")
+        idx_path = os.path.join(self.pack_dir, name + ".idx")
+        os.replace(self._tmp_path, pack_path)
+
+        entries = sorted((bytes.fromhex(h), offset) for h, offset in self.offsets.items())
+        fanout = [0] * 256
+        for key, _ in entries:
+            fanout[key[0]] += 1
+        for i in range(1, 256):
+            fanout[i] += fanout[i - 1]
+
+        idx = bytearray(IDX_HEADER.pack(IDX_SIGNATURE, PACK_VERSION))
+        idx += FANOUT.pack(*fanout)
+        for key, _ in entries:
+            idx += key
+        for _, offset in entries:
+            idx += OFFSET.pack(offset)
+        idx += pack_checksum
+        idx += hashlib.sha1(idx).digest()
+
+        # El índice se publica al final: un pack sin índice es invisible para los lectores
+        tmp_idx = idx_path + ".tmp"
+        with open(tmp_idx, "wb") as f:
+            f.write(idx)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_idx, idx_path)
+        return idx_path
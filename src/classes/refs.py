@@ -0,0 +1,142 @@
+import os
+from bisect import bisect_left
+from src.config import *
+
+# Formato de .sbac/packed-refs: una cabecera y una línea "<hash> <ref>" por
+# referencia, ordenadas por nombre (refs/heads/..., refs/tags/...). Un archivo
+# suelto en refs/ tiene prioridad sobre la entrada empaquetada con el mismo
+# nombre, así que crear o mover una referencia nunca reescribe el archivo.
+PACKED_REFS_HEADER = "# pack-refs with: sorted"
+
+class RefStore:
+    """Ramas y tags: archivos sueltos en refs/ más el archivo packed-refs.
+
+    packed-refs se lee una sola vez por instancia y se consulta con búsqueda
+    binaria; listar o resolver referencias empaquetadas no abre un archivo
+    por referencia. Cada referencia leída se recuerda durante la vida de la
+    instancia (las escrituras hechas a través de ella actualizan el valor).
+    """
+
+    def __init__(self, sbac_dir=SBAC_DIR, packed_path=PACKED_REFS_FILE):
+        self.sbac_dir = sbac_dir
+        self.packed_path = packed_path
+        self._names = None
+        self._hashes = None
+        self._memo = {}
+
+    def _ref_path(self, ref):
+        return os.path.join(self.sbac_dir, *ref.split("/"))
+
+    def _load_packed(self):
+        if self._names is not None:
+            return
+        self._names, self._hashes = [], []
+        try:
+            with open(self.packed_path, "r") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            if not line or line.startswith("#"):
+                continue
+            object_hash, _, ref = line.partition(" ")
+            self._names.append(ref)
+            self._hashes.append(object_hash)
+
+    def _packed_get(self, ref):
+        self._load_packed()
+        i = bisect_left(self._names, ref)
+        if i < len(self._names) and self._names[i] == ref:
+            return self._hashes[i]
+        return None
+
+    def _packed_range(self, prefix):
+        self._load_packed()
+        start = bisect_left(self._names, prefix)
+        end = bisect_left(self._names, prefix + "\uffff")
+        return zip(self._names[start:end], self._hashes[start:end])
+
+    def _write_packed(self, refs):
+        """Reescribe packed-refs de forma atómica con {ref: hash}"""
+        tmp_path = f"{self.packed_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(PACKED_REFS_HEADER + "\n")
+            for ref in sorted(refs):
+                f.write(f"{refs[ref]} {ref}\n")
+        os.replace(tmp_path, self.packed_path)
+        self._names = None
+
+    def read(self, ref):
+        """Hash al que apunta una referencia ("" si aún no tiene commits) o None si no existe"""
+        if ref in self._memo:
+            return self._memo[ref]
+        try:
+            with open(self._ref_path(ref), "r") as f:
+                value = f.read().strip()
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            value = self._packed_get(ref)
+        self._memo[ref] = value
+        return value
+
+    def exists(self, ref):
+        return self.read(ref) is not None
+
+    def write(self, ref, object_hash):
+        path = self._ref_path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(object_hash)
+        self._memo[ref] = object_hash
+
+    def delete(self, ref):
+        """Elimina la referencia suelta y la empaquetada. Devuelve False si no existía"""
+        found = False
+        path = self._ref_path(ref)
+        if os.path.isfile(path):
+            os.remove(path)
+            found = True
+        if self._packed_get(ref) is not None:
+            self._write_packed({name: object_hash for name, object_hash in zip(self._names, self._hashes)
+                                if name != ref})
+            found = True
+        self._memo[ref] = None
+        return found
+
+    def list(self, prefix):
+        """Lista ordenada de (nombre corto, hash) de las referencias bajo 'prefix' (p. ej. "refs/tags/")"""
+        refs = {name[len(prefix):]: object_hash for name, object_hash in self._packed_range(prefix)}
+        directory = self._ref_path(prefix.rstrip("/"))
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if os.path.isfile(os.path.join(directory, name)):
+                    refs[name] = self.read(prefix + name)
+        return sorted(refs.items())
+
+    def pack(self):
+        """Mueve las ramas y tags sueltos a packed-refs. Devuelve cuántos se empaquetaron"""
+        self._load_packed()
+        refs = dict(zip(self._names, self._hashes))
+        loose = []
+        for prefix in ("refs/heads/", "refs/tags/"):
+            directory = self._ref_path(prefix.rstrip("/"))
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if not os.path.isfile(path):
+                    continue
+                with open(path, "r") as f:
+                    object_hash = f.read().strip()
+                # Una rama sin commits no tiene hash que empaquetar
+                if object_hash:
+                    refs[prefix + name] = object_hash
+                    loose.append((path, object_hash))
+
+        if loose:
+            self._write_packed(refs)
+        for path, object_hash in loose:
+            # Sólo se borra si nadie movió la referencia mientras tanto
+            with open(path, "r") as f:
+                if f.read().strip() == object_hash:
+                    os.remove(path)
+        return len(loose)
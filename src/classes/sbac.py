@@ -1,15 +1,75 @@
+import sys
 import json
-import hashlib
-import difflib
+import re
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
 from .commit import Commit
+from .chunker import Chunker
+from .object_store import ObjectStore, AmbiguousObjectName
+from .index import Index
+from .commit_graph import CommitGraph, GraphEntry, timestamp_to_micros
+from .tree import update_tree, flatten_tree, diff_trees, add_blob_paths
+from .line_diff import DIFF_ALGORITHMS, unified_diff
+from .sparse import SparseCheckout
+from .refs import RefStore
 from src.config import *
 
+# Sufijos de una revisión: "~n" y "^n" en cualquier combinación al final
+REV_SUFFIX = re.compile(r"(?:[~^]\d*)+$")
+REV_STEP = re.compile(r"([~^])(\d*)")
+
+def _file_diff(objects, file, hash1, hash2, commit1, commit2, algorithm):
+    """Texto que 'diff' muestra para un archivo"""
+    header = f"Changes in {file}:"
+    if not hash1:
+        return f"{header}\n  File added in {commit2[:7]}"
+    if not hash2:
+        return f"{header}\n  File removed in {commit2[:7]}"
+
+    # Compare file contents (los archivos en chunks se reensamblan)
+    data1 = objects.read_blob(hash1)
+    data2 = objects.read_blob(hash2)
+    if b"\0" in data1 or b"\0" in data2:
+        return f"{header}\n  Binary files differ"
+
+    diff = unified_diff(
+        data1.decode().splitlines(), data2.decode().splitlines(),
+        fromfile=f"{file} ({commit1[:7]})",
+        tofile=f"{file} ({commit2[:7]})",
+        lineterm="",
+        algorithm=algorithm
+    )
+    return header + "\n" + "\n".join(diff)
+
+# Cada proceso del pool de 'diff' abre el almacén de objetos una sola vez
+_diff_objects = None
+
+def _init_diff_worker():
+    global _diff_objects
+    _diff_objects = ObjectStore()
+
+def _file_diff_in_worker(*task):
+    return _file_diff(_diff_objects, *task)
+
 class SBAC:
     def __init__(self):
-        self.staged_files = {}
+        self._staged_files = None  # se decodifica del índice sólo al pedirlo
         self.branches = {}
         self.current_branch = None
         self.tags = {}
+        self.objects = ObjectStore()
+        self.refs = RefStore()
+        # Memoria de HEAD y de los commits ya leídos (LRU), por instancia
+        self._head = None
+        self._commits = OrderedDict()
+
+    @property
+    def staged_files(self):
+        """Mapa {ruta: hash} del área de preparación"""
+        if self._staged_files is None:
+            self._staged_files = Index.load().hashes()
+        return self._staged_files
 
     def init(self):
         if os.path.exists(SBAC_DIR):
@@ -22,11 +82,13 @@ class SBAC:
         os.makedirs(HEADS_DIR)
         os.makedirs(TAGS_DIR)
 
-        with open(HEAD_FILE, "w") as f:
-            f.write("ref: refs/heads/master")
+        self._write_head("ref: refs/heads/master")
 
         with open(CONFIG_FILE, "w") as f:
-            json.dump({"author": os.getenv("USER", "unknown")}, f)
+            json.dump({
+                "author": os.getenv("USER", "unknown"),
+                "compression_level": DEFAULT_COMPRESSION_LEVEL
+            }, f)
 
         with open(os.path.join(HEADS_DIR, "master"), "w") as f:
             f.write("")
@@ -35,46 +97,93 @@ class SBAC:
         print("Initialized empty SBAC repository.")
         return True
 
-    def add(self, files):
+    def _expand_paths(self, files):
+        """Expande los directorios recursivamente. Devuelve (archivos, rutas inexistentes)"""
+        paths = []
+        missing = []
+        for file in files:
+            if not os.path.exists(file):
+                missing.append(file)
+            elif os.path.isdir(file):
+                for root, dirs, names in os.walk(file):
+                    # Ignorar el directorio .sbac
+                    dirs[:] = sorted(d for d in dirs if os.path.normpath(os.path.join(root, d)) != SBAC_DIR)
+                    for name in sorted(names):
+                        paths.append(os.path.normpath(os.path.join(root, name)))
+            else:
+                paths.append(os.path.normpath(file))
+        return paths, missing
+
+    def add(self, files, jobs=None):
         if not os.path.exists(SBAC_DIR):
             print("Entra a add")
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False  # Asegurar que devuelve False cuando no hay repositorio
 
         # Cargar archivos ya existentes en staging
-        if os.path.exists(INDEX_FILE):
-            with open(INDEX_FILE, "r") as f:
-                self.staged_files = json.load(f)
-        else:
-            self.staged_files = {}
+        index = Index.load()
 
-        added_files = 0
         has_errors = False  # Bandera para detectar errores
-        
-        for file in files:
-            if not os.path.exists(file):
-                print(f"fatal: pathspec '{file}' did not match any files")
-                has_errors = True  # Marcar que hubo un error
-                continue
-
-            with open(file, "rb") as f:
-                content = f.read()
-            file_hash = hashlib.sha1(content).hexdigest()
-
-            # Almacenar el contenido en objetos
-            object_path = os.path.join(OBJECTS_DIR, file_hash)
-            if not os.path.exists(object_path):
-                with open(object_path, "wb") as f:
-                    f.write(content)
-
-            self.staged_files[file] = file_hash
-            added_files += 1
-
-        # Guardar el estado actualizado
-        with open(INDEX_FILE, "w") as f:
-            json.dump(self.staged_files, f)
-
-        print(f"Added {added_files} file(s) to staging area.")
+        config = load_config()
+        buffer_size = int(config.get("stream_buffer_size", DEFAULT_STREAM_BUFFER_SIZE))
+        if jobs is None:
+            jobs = int(config.get("add_workers", os.cpu_count() or 1))
+
+        # Modo de archivos grandes (opcional): dividir en chunks deduplicados
+        large_file_threshold = int(config.get("large_file_threshold", DEFAULT_LARGE_FILE_THRESHOLD))
+        chunker = Chunker(int(config.get("chunk_size", DEFAULT_CHUNK_SIZE)))
+
+        paths, missing = self._expand_paths(files)
+        for file in missing:
+            print(f"fatal: pathspec '{file}' did not match any files")
+            has_errors = True  # Marcar que hubo un error
+
+        def store(file):
+            # Si el stat no cambió desde el último add, no hace falta leer el archivo
+            st = os.stat(file)
+            cached_hash = index.cached_hash(file, st)
+            if cached_hash is not None and self.objects.exists(cached_hash):
+                return cached_hash, st, None
+
+            # Almacenar el contenido en objetos (leyendo por bloques)
+            if large_file_threshold and st.st_size >= large_file_threshold:
+                start = time.perf_counter()
+                file_hash, total, new = self.objects.write_chunked(file, chunker, buffer_size)
+                return file_hash, st, (total, new, time.perf_counter() - start)
+            return self.objects.write_file(file, buffer_size), st, None
+
+        # Hash y escritura de objetos en paralelo; el índice se escribe una sola vez al final
+        if jobs > 1 and len(paths) > 1:
+            self.objects.packs()  # Abrir los packs antes de repartir el trabajo
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(store, paths))
+        else:
+            results = [store(file) for file in paths]
+
+        chunked_files = 0
+        chunked_bytes = 0
+        new_chunk_bytes = 0
+        chunking_time = 0.0
+        for file, (file_hash, st, chunk_stats) in zip(paths, results):
+            index.update(file, file_hash, st)
+            if chunk_stats:
+                chunked_files += 1
+                chunked_bytes += chunk_stats[0]
+                new_chunk_bytes += chunk_stats[1]
+                chunking_time += chunk_stats[2]
+
+        # Guardar el estado actualizado (reemplazo atómico del índice)
+        index.save()
+        # No se decodifica todo el índice: staged_files se vuelve a leer si se pide
+        self._staged_files = None
+
+        print(f"Added {len(paths)} file(s) to staging area.")
+        if chunked_files:
+            mb = chunked_bytes / (1024 * 1024)
+            throughput = mb / chunking_time if chunking_time else 0.0
+            dedup = f"{chunked_bytes / new_chunk_bytes:.2f}" if new_chunk_bytes else "inf"
+            print(f"Chunked {chunked_files} large file(s): {mb:.1f} MB at {throughput:.1f} MB/s, "
+                  f"{new_chunk_bytes / (1024 * 1024):.1f} MB new, dedup ratio {dedup}")
         
         # Devolver False si hubo errores (archivos no existentes)
         return not has_errors
@@ -84,51 +193,84 @@ class SBAC:
         if not os.path.exists(SBAC_DIR):
             return []
 
+        # Con sparse checkout sólo se recorren los directorios incluidos
+        sparse = SparseCheckout.load()
+
         # Obtener todos los archivos en el directorio actual (excepto .sbac)
         all_files = set()
         for root, dirs, files in os.walk("."):
             # Ignorar el directorio .sbac
             if SBAC_DIR in root.split(os.path.sep):
                 continue
+            if sparse.enabled:
+                dirs[:] = [d for d in dirs if sparse.includes_dir(os.path.relpath(os.path.join(root, d)))]
             for file in files:
                 path = os.path.relpath(os.path.join(root, file))
-                all_files.add(path)
+                if sparse.matches(path):
+                    all_files.add(path)
 
         # Obtener archivos rastreados (en staging o en commits)
         tracked_files = set()
 
         # Archivos en staging
-        if os.path.exists(INDEX_FILE):
-            with open(INDEX_FILE, "r") as f:
-                staged_files = json.load(f)
-                tracked_files.update(staged_files.keys())
-
-        # Archivos en el último commit (con comprobación de existencia)
-        with open(HEAD_FILE, "r") as f:
-            head_ref = f.read().strip()
-        
-        if head_ref.startswith("ref: "):
-            branch = head_ref.split("/")[-1]
-            branch_file = os.path.join(HEADS_DIR, branch)
-            if os.path.exists(branch_file):
-                with open(branch_file, "r") as f:
-                    commit_hash = f.read().strip()
-                if commit_hash:  # Solo si hay un commit
-                    commit_path = os.path.join(OBJECTS_DIR, commit_hash)
-                    if os.path.exists(commit_path) and not os.path.isdir(commit_path):
-                        with open(commit_path, "r") as f:
-                            try:
-                                commit_data = json.load(f)
-                                if "tree" in commit_data:
-                                    tree_path = os.path.join(OBJECTS_DIR, commit_data["tree"])
-                                    if os.path.exists(tree_path) and not os.path.isdir(tree_path):
-                                        with open(tree_path, "r") as f:
-                                            tracked_files.update(json.load(f).keys())
-                            except json.JSONDecodeError:
-                                pass  # Si el archivo no es un JSON válido
+        tracked_files.update(Index.load())
+
+        # Archivos en el último commit: su árbol es una instantánea completa
+        commit_hash = self._rev_parse("HEAD")
+        commit_data = self._read_commit(commit_hash) if commit_hash else None
+        if commit_data and "tree" in commit_data:
+            tracked_files.update(flatten_tree(self.objects, commit_data["tree"], sparse))
 
         return sorted(all_files - tracked_files)
 
+    def _hash_worktree_file(self, path, size, config):
+        """Hash que 'add' guardaría para un archivo del directorio de trabajo"""
+        buffer_size = int(config.get("stream_buffer_size", DEFAULT_STREAM_BUFFER_SIZE))
+        large_file_threshold = int(config.get("large_file_threshold", DEFAULT_LARGE_FILE_THRESHOLD))
+        if large_file_threshold and size >= large_file_threshold:
+            chunker = Chunker(int(config.get("chunk_size", DEFAULT_CHUNK_SIZE)))
+            return self.objects.hash_chunked(path, chunker, buffer_size)
+        return self.objects.hash_file(path, buffer_size)
+
+    def _unstaged_changes(self, index):
+        """Lista de (ruta, 'modified'|'deleted') de los archivos que cambiaron.
+
+        Los archivos en staging se comparan con su entrada y el resto con
+        HEAD. Sólo se lee el contenido de los archivos cuyo stat no coincide
+        con el del índice; si el contenido resulta ser el mismo, se actualiza
+        el stat guardado para que la próxima consulta no tenga que leerlo.
+        """
+        config = load_config()
+        expected = {path: (entry.hash, entry) for path, entry in index.staged_items()}
+        tree_hash = self._tree_of(self._rev_parse("HEAD"))
+        if tree_hash:
+            for path, blob_hash in flatten_tree(self.objects, tree_hash, SparseCheckout.load()).items():
+                if path not in expected:
+                    expected[path] = (blob_hash, index.get(path))
+
+        changes = []
+        refreshed = False
+        for path in sorted(expected):
+            blob_hash, entry = expected[path]
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                changes.append((path, "deleted"))
+                continue
+
+            if entry is not None and entry.hash == blob_hash and entry.matches(st) and not index.is_racy(entry):
+                continue
+
+            if self._hash_worktree_file(path, st.st_size, config) == blob_hash:
+                index.update(path, blob_hash, st, staged=entry is not None and entry.staged)
+                refreshed = True
+            else:
+                changes.append((path, "modified"))
+
+        if refreshed:
+            index.save()
+        return changes
+
     def status(self):
         if not os.path.exists(SBAC_DIR):
             print("Not a SBAC repository. Run 'sbac init' first.")
@@ -136,18 +278,23 @@ class SBAC:
 
         try:
             # Archivos en staging
-            staged_files = {}
-            if os.path.exists(INDEX_FILE):
-                with open(INDEX_FILE, "r") as f:
-                    staged_files = json.load(f)
+            index = Index.load()
 
             print("Staged files:")
-            if staged_files:
-                for file in staged_files:
+            staged = [file for file, _ in index.staged_items()]
+            if staged:
+                for file in staged:
                     print(f"  {file}")
             else:
                 print("  (no files staged)")
 
+            # Archivos modificados después de agregarlos
+            changes = self._unstaged_changes(index)
+            if changes:
+                print("\nChanges not staged for commit:")
+                for file, change in changes:
+                    print(f"  {change}: {file}")
+
             # Archivos no rastreados
             untracked_files = self.get_untracked_files()
             print("\nUntracked files:")
@@ -168,162 +315,141 @@ class SBAC:
             return False
 
         # Cargar archivos en staging
-        if os.path.exists(INDEX_FILE):
-            with open(INDEX_FILE, "r") as f:
-                self.staged_files = json.load(f)
-        
-        if not self.staged_files:
+        index = Index.load()
+        staged = dict(index.staged_items())
+        self._staged_files = None
+        if not staged:
             print("No changes staged for commit.")
             return False
 
         # Get current branch and last commit
-        with open(HEAD_FILE, "r") as f:
-            head_ref = f.read().strip()
-        
-        if head_ref.startswith("ref: "):
-            branch = head_ref.split("/")[-1]
-            branch_file = os.path.join(HEADS_DIR, branch)
-            parent = None
-            if os.path.exists(branch_file):
-                with open(branch_file, "r") as f:
-                    parent = f.read().strip()
-        else:
-            parent = head_ref
+        branch = self._current_branch()
+        parent = self._rev_parse("HEAD")
 
         # Get author from config
-        author = "unknown"
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, "r") as f:
-                config = json.load(f)
-                author = config.get("author", "unknown")
-
-        # Create tree object
-        tree_hash = hashlib.sha1(json.dumps(self.staged_files).encode()).hexdigest()
-        tree_path = os.path.join(OBJECTS_DIR, tree_hash)
-        with open(tree_path, "w") as f:
-            json.dump(self.staged_files, f)
-
-        # Create commit - asegurando que la ruta existe
+        author = load_config().get("author", "unknown")
+
+        # El árbol es el del padre con los cambios del índice aplicados: sólo
+        # se reescriben los directorios que contienen archivos en staging
+        parent_data = self._read_commit(parent) if parent else None
+        parent_tree = parent_data["tree"] if parent_data else None
+        tree_hash = update_tree(self.objects, parent_tree, {path: entry.hash for path, entry in staged.items()})
+
+        # Create commit
         commit = Commit(message, author, parent, tree_hash)
-        commit_path = os.path.join(OBJECTS_DIR, commit.hash)
-        
-        # Crear directorio si no existe (por si acaso)
-        os.makedirs(os.path.dirname(commit_path), exist_ok=True)
-        
-        with open(commit_path, "w") as f:
-            json.dump(commit.to_dict(), f)
+        self.objects.write(commit.hash, json.dumps(commit.to_dict()).encode(), "commit")
+
+        # Update branch reference (o HEAD si está separado)
+        if branch is not None:
+            self.refs.write(f"refs/heads/{branch}", commit.hash)
+        else:
+            self._write_head(commit.hash)
 
-        # Update branch reference
-        with open(branch_file, "w") as f:
-            f.write(commit.hash)
+        # Agregar el commit (y los ancestros que falten) al commit-graph
+        self._update_commit_graph(CommitGraph(), commit.hash)
 
-        # Clear staging area
-        self.staged_files = {}
-        if os.path.exists(INDEX_FILE):
-            os.remove(INDEX_FILE)
+        # Vaciar el área de preparación conservando el stat de los archivos
+        self._staged_files = {}
+        index.mark_committed(staged)
+        index.save()
 
-        print(f"[{branch} {commit.hash[:7]}] {message}")
+        print(f"[{branch or 'detached HEAD'} {commit.hash[:7]}] {message}")
         return True
 
-    def log(self):
+    def log(self, max_count=None, since=None, until=None, author=None, oneline=False, format=None, paths=None):
+        """Muestra la historia desde HEAD.
+
+        'since'/'until' son fechas ISO y 'author' filtra por nombre exacto.
+        Las fechas se comparan con el commit-graph, sin abrir los objetos; la
+        salida se escribe por lotes y se detiene si se cierra el pipe.
+
+        'paths' limita la historia a los commits que cambiaron esas rutas
+        (archivos o directorios). Los filtros de Bloom del commit-graph
+        descartan la mayoría de los commits sin leer sus árboles.
+        """
         if not os.path.exists(SBAC_DIR):
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        with open(HEAD_FILE, "r") as f:
-            head_ref = f.read().strip()
-        
-        if head_ref.startswith("ref: "):
-            branch = head_ref.split("/")[-1]
-            branch_file = os.path.join(HEADS_DIR, branch)
-            if not os.path.exists(branch_file):
-                print("No commits yet.")
-                return False  # Cambiado de return False a return True
-            
-            with open(branch_file, "r") as f:
-                commit_hash = f.read().strip()
-        else:
-            commit_hash = head_ref
-
+        commit_hash = self._rev_parse("HEAD")
         if not commit_hash:  # Si no hay commit hash
             print("No commits yet.")
             return False
 
-        found_commits = False
-        while commit_hash:
-            commit_path = os.path.join(OBJECTS_DIR, commit_hash)
-            if not os.path.exists(commit_path):
-                break
-
-            with open(commit_path, "r") as f:
-                commit_data = json.load(f)
+        try:
+            since_micros = timestamp_to_micros(since) if since else None
+            until_micros = timestamp_to_micros(until) if until else None
+        except ValueError as e:
+            print(f"fatal: invalid date: {e}")
+            return False
 
-            print(f"commit {commit_data['hash']}")
-            print(f"Author: {commit_data['author']}")
-            print(f"Date:   {commit_data['timestamp']}")
-            print(f"\n    {commit_data['message']}\n")
+        paths = [os.path.normpath(path) for path in paths] if paths else None
 
-            commit_hash = commit_data["parent"]
-            found_commits = True
+        found_commits = False
+        shown = 0
+        batch = []
+        graph = CommitGraph()
+        try:
+            for entry, commit_data in self._history(commit_hash, graph):
+                found_commits = True
+                if max_count is not None and shown >= max_count:
+                    break
+                # La historia va hacia atrás en el tiempo: nada más antiguo puede coincidir
+                if since_micros is not None and entry.timestamp < since_micros:
+                    break
+                if until_micros is not None and entry.timestamp > until_micros:
+                    continue
+                if paths and not self._touches_paths(graph, entry, commit_data, paths):
+                    continue
+
+                # El commit-graph da el recorrido; el objeto sólo se lee para mostrarlo
+                if commit_data is None:
+                    commit_data = self._read_commit(entry.hash)
+                    if commit_data is None:
+                        break
+                if author is not None and commit_data["author"] != author:
+                    continue
+
+                if format == "jsonl":
+                    batch.append(json.dumps(commit_data) + "\n")
+                elif oneline:
+                    batch.append(f"{commit_data['hash'][:7]} {commit_data['message']}\n")
+                else:
+                    batch.append(f"commit {commit_data['hash']}\n"
+                                 f"Author: {commit_data['author']}\n"
+                                 f"Date:   {commit_data['timestamp']}\n"
+                                 f"\n    {commit_data['message']}\n\n")
+                shown += 1
+
+                if len(batch) >= LOG_BATCH_SIZE:
+                    sys.stdout.write("".join(batch))
+                    sys.stdout.flush()
+                    batch = []
+
+            if batch:
+                sys.stdout.write("".join(batch))
+                sys.stdout.flush()
+        except BrokenPipeError:
+            # El lector (por ejemplo 'head') ya no quiere más salida
+            self._discard_stdout()
+            return True
 
         if not found_commits:
             print("No commits yet.")
             return False
-            
-        return True
-    
-    def create_branch(self, branch_name, start_point=None):
-        """Crea una nueva rama pero no cambia a ella"""
-        if not os.path.exists(SBAC_DIR):
-            print("Not a SBAC repository. Run 'sbac init' first.")
-            return False
 
-        # Verificar si la rama ya existe
-        branch_file = os.path.join(HEADS_DIR, branch_name)
-        if os.path.exists(branch_file):
-            print(f"Branch '{branch_name}' already exists.")
-            return False
+        return True
 
-        # Obtener el commit de inicio (start_point)
-        if start_point:
-            # Verificar si es un tag
-            tag_file = os.path.join(TAGS_DIR, start_point)
-            if os.path.exists(tag_file):
-                with open(tag_file, "r") as f:
-                    commit_hash = f.read().strip()
-            else:
-                # Verificar si es un commit hash o nombre de rama
-                commit_path = os.path.join(OBJECTS_DIR, start_point)
-                if os.path.exists(commit_path):
-                    commit_hash = start_point
-                else:
-                    # Verificar si es una rama existente
-                    other_branch_file = os.path.join(HEADS_DIR, start_point)
-                    if os.path.exists(other_branch_file):
-                        with open(other_branch_file, "r") as f:
-                            commit_hash = f.read().strip()
-                    else:
-                        print(f"error: unknown revision or path '{start_point}'")
-                        return False
-        else:
-            # Usar el commit actual
-            with open(HEAD_FILE, "r") as f:
-                head_ref = f.read().strip()
-            
-            if head_ref.startswith("ref: "):
-                current_branch = head_ref.split("/")[-1]
-                with open(os.path.join(HEADS_DIR, current_branch), "r") as f:
-                    commit_hash = f.read().strip()
-            else:
-                commit_hash = head_ref
+    @staticmethod
+    def _discard_stdout():
+        """Redirige stdout a /dev/null para que Python no falle al cerrarlo"""
+        try:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+        except (OSError, ValueError, AttributeError):
+            pass
 
-        # Crear la nueva rama
-        with open(branch_file, "w") as f:
-            f.write(commit_hash)
-        
-        print(f"Created branch '{branch_name}'")
-        return True
-    
     def create_branch(self, branch_name, start_point=None):
         """Crea una nueva rama pero no cambia a ella"""
         if not os.path.exists(SBAC_DIR):
@@ -331,47 +457,25 @@ class SBAC:
             return False
 
         # Verificar si la rama ya existe
-        branch_file = os.path.join(HEADS_DIR, branch_name)
-        if os.path.exists(branch_file):
+        if self.refs.exists(f"refs/heads/{branch_name}"):
             print(f"Branch '{branch_name}' already exists.")
             return False
 
-        # Obtener el commit de inicio (start_point)
+        # Obtener el commit de inicio (start_point); sin él, el commit actual
         if start_point:
-            # Verificar si es un tag
-            tag_file = os.path.join(TAGS_DIR, start_point)
-            if os.path.exists(tag_file):
-                with open(tag_file, "r") as f:
-                    commit_hash = f.read().strip()
-            else:
-                # Verificar si es un commit hash o nombre de rama
-                commit_path = os.path.join(OBJECTS_DIR, start_point)
-                if os.path.exists(commit_path):
-                    commit_hash = start_point
-                else:
-                    # Verificar si es una rama existente
-                    other_branch_file = os.path.join(HEADS_DIR, start_point)
-                    if os.path.exists(other_branch_file):
-                        with open(other_branch_file, "r") as f:
-                            commit_hash = f.read().strip()
-                    else:
-                        print(f"error: unknown revision or path '{start_point}'")
-                        return False
+            try:
+                commit_hash = self._rev_parse(start_point)
+            except AmbiguousObjectName as e:
+                print(f"error: {e}")
+                return False
+            if commit_hash is None:
+                print(f"error: unknown revision or path '{start_point}'")
+                return False
         else:
-            # Usar el commit actual
-            with open(HEAD_FILE, "r") as f:
-                head_ref = f.read().strip()
-            
-            if head_ref.startswith("ref: "):
-                current_branch = head_ref.split("/")[-1]
-                with open(os.path.join(HEADS_DIR, current_branch), "r") as f:
-                    commit_hash = f.read().strip()
-            else:
-                commit_hash = head_ref
+            commit_hash = self._rev_parse("HEAD") or ""
 
         # Crear la nueva rama
-        with open(branch_file, "w") as f:
-            f.write(commit_hash)
+        self.refs.write(f"refs/heads/{branch_name}", commit_hash)
         
         print(f"Created branch '{branch_name}'")
         return True
@@ -382,21 +486,14 @@ class SBAC:
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        if not os.path.exists(HEADS_DIR):
-            print("No branches found.")
-            return False
-
-        branches = os.listdir(HEADS_DIR)
+        # Ramas sueltas y empaquetadas (una sola lectura de packed-refs)
+        branches = [name for name, _ in self.refs.list("refs/heads/")]
         if not branches:
             print("No branches found.")
             return False
 
         # Obtener rama actual
-        current_branch = None
-        with open(HEAD_FILE, "r") as f:
-            head_ref = f.read().strip()
-            if head_ref.startswith("ref: "):
-                current_branch = head_ref.split("/")[-1]
+        current_branch = self._current_branch()
 
         print("Branches:")
         for branch in sorted(branches):
@@ -415,76 +512,236 @@ class SBAC:
             print("error: Cannot delete branch 'master'")
             return False
 
-        branch_file = os.path.join(HEADS_DIR, branch_name)
-        if not os.path.exists(branch_file):
+        if not self.refs.exists(f"refs/heads/{branch_name}"):
             print(f"error: branch '{branch_name}' not found.")
             return False
 
         # Verificar si estamos en la rama que queremos eliminar
-        with open(HEAD_FILE, "r") as f:
-            head_ref = f.read().strip()
-            if head_ref == f"ref: refs/heads/{branch_name}":
-                print(f"error: Cannot delete branch '{branch_name}' because you are on it.")
-                return False
+        if self._current_branch() == branch_name:
+            print(f"error: Cannot delete branch '{branch_name}' because you are on it.")
+            return False
 
-        os.remove(branch_file)
+        # Se elimina tanto la rama suelta como su entrada en packed-refs
+        self.refs.delete(f"refs/heads/{branch_name}")
         print(f"Deleted branch {branch_name}")
         return True
 
-    def checkout(self, branch_or_commit):
+    def _tree_of(self, commit_hash):
+        """Hash del árbol de un commit, o None si no hay commit"""
+        commit_data = self._read_commit(commit_hash) if commit_hash else None
+        return commit_data["tree"] if commit_data else None
+
+    def _worktree_matches(self, path, blob_hash, config):
+        """Indica si el archivo en disco tiene el contenido de 'blob_hash' (None = no existe)"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return blob_hash is None
+        if blob_hash is None or not os.path.isfile(path):
+            return False
+        return self._hash_worktree_file(path, st.st_size, config) == blob_hash
+
+    @staticmethod
+    def _record_worktree_files(written, removed=()):
+        """Guarda en el índice el stat de los archivos escritos con el contenido de HEAD.
+
+        Las entradas en staging no se tocan; las de los archivos eliminados
+        (o que salen del sparse checkout) se quitan.
+        """
+        index = Index.load()
+        for path, blob_hash in written:
+            entry = index.get(path)
+            if (entry is None or not entry.staged) and os.path.isfile(path):
+                index.update(path, blob_hash, os.stat(path), staged=False)
+        for path in removed:
+            entry = index.get(path)
+            if entry is not None and not entry.staged:
+                index.remove(path)
+        index.save()
+
+    @staticmethod
+    def _remove_worktree_file(path):
+        os.remove(path)
+        # Eliminar los directorios que quedaron vacíos
+        directory = os.path.dirname(path)
+        while directory:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    def _write_worktree_files(self, files, jobs=None, link=None, config=None):
+        """Escribe [(ruta, hash del blob)] en el directorio de trabajo con un pool de hilos"""
+        config = config if config is not None else load_config()
+        if jobs is None:
+            jobs = int(config.get("checkout_workers", os.cpu_count() or 1))
+        if link is None:
+            link = config.get("checkout_link", "copy")
+
+        def materialize(change):
+            path, blob_hash = change
+            if link in ("hardlink", "reflink"):
+                self.objects.link_blob_to(blob_hash, path, link)
+            else:
+                self.objects.copy_blob_to(blob_hash, path)
+
+        if jobs > 1 and len(files) > 1:
+            self.objects.packs()  # Abrir los packs antes de repartir el trabajo
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                list(pool.map(materialize, files))
+        else:
+            for change in files:
+                materialize(change)
+
+    def _update_worktree(self, old_tree, new_tree, jobs=None, link=None, sparse=None):
+        """Lleva el directorio de trabajo del árbol 'old_tree' a 'new_tree'.
+
+        Sólo se escriben los archivos que difieren y se eliminan los que ya no
+        están; los subdirectorios con el mismo hash (o fuera del sparse
+        checkout) no se recorren. Si algún archivo a modificar tiene cambios
+        locales, no se toca nada y se devuelve None; si no, el número de
+        (archivos escritos, eliminados).
+        """
+        config = load_config()
+        changes = list(diff_trees(self.objects, old_tree, new_tree, sparse=sparse))
+
+        # Un archivo se puede reemplazar si está como en el árbol actual o ya
+        # tiene el contenido de destino
+        conflicts = [path for path, old_hash, new_hash in changes
+                     if not self._worktree_matches(path, old_hash, config)
+                     and not self._worktree_matches(path, new_hash, config)]
+        if conflicts:
+            print("error: Your local changes to the following files would be overwritten by checkout:")
+            for path in conflicts:
+                print(f"  {path}")
+            print("Please commit your changes before you switch branches.")
+            return None
+
+        removed = [path for path, _, new_hash in changes if new_hash is None]
+        for path in removed:
+            if os.path.lexists(path):
+                self._remove_worktree_file(path)
+
+        written = [(path, new_hash) for path, _, new_hash in changes if new_hash is not None]
+        self._write_worktree_files(written, jobs, link, config)
+        self._record_worktree_files(written, removed)
+        return len(written), len(removed)
+
+    def checkout(self, branch_or_commit, jobs=None, link=None):
         if not os.path.exists(SBAC_DIR):
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
         # Check if it's a branch
-        branch_file = os.path.join(HEADS_DIR, branch_or_commit)
-        if os.path.exists(branch_file):
-            with open(HEAD_FILE, "w") as f:
-                f.write(f"ref: refs/heads/{branch_or_commit}")
+        target = self.refs.read(f"refs/heads/{branch_or_commit}")
+        if target is not None:
+            head = f"ref: refs/heads/{branch_or_commit}"
+            message = f"Switched to branch '{branch_or_commit}'"
+        else:
+            # Commit, tag o expresión (HEAD~2, rama^...): HEAD queda separado
+            try:
+                target = head = self._rev_parse(branch_or_commit)
+            except AmbiguousObjectName as e:
+                print(f"error: {e}")
+                return False
+            if target is None:
+                print(f"error: pathspec '{branch_or_commit}' did not match any branch, commit or tag")
+                return False
+            if self.refs.exists(f"refs/tags/{branch_or_commit}"):
+                message = f"HEAD is now at tag '{branch_or_commit}' ({target[:7]})"
+            else:
+                message = f"HEAD is now at {target[:7]}"
+
+        # Actualizar el directorio de trabajo (una rama sin commits no lo cambia)
+        updated = None
+        current = self._rev_parse("HEAD")
+        if target and target != current:
+            updated = self._update_worktree(self._tree_of(current), self._tree_of(target), jobs, link,
+                                            SparseCheckout.load())
+            if updated is None:
+                return False
+
+        self._write_head(head)
+        if head.startswith("ref: "):
             self.current_branch = branch_or_commit
-            print(f"Switched to branch '{branch_or_commit}'")
-            return True
+        print(message)
+        if updated and any(updated):
+            print(f"Updated {updated[0]} file(s), removed {updated[1]} file(s).")
+        return True
 
-        # Check if it's a commit hash
-        commit_path = os.path.join(OBJECTS_DIR, branch_or_commit)
-        if os.path.exists(commit_path) and not os.path.isdir(commit_path):
-            with open(HEAD_FILE, "w") as f:
-                f.write(branch_or_commit)
-            print(f"HEAD is now at {branch_or_commit[:7]}")
-            return True
+    def _apply_sparse(self, old_sparse, new_sparse):
+        """Agrega y elimina los archivos de HEAD que entran o salen del sparse checkout"""
+        config = load_config()
+        tree_hash = self._tree_of(self._rev_parse("HEAD"))
+        files = flatten_tree(self.objects, tree_hash) if tree_hash else {}
+
+        added = [(path, blob_hash) for path, blob_hash in sorted(files.items())
+                 if new_sparse.matches(path) and not old_sparse.matches(path) and not os.path.lexists(path)]
+        removed = 0
+        excluded = [path for path in sorted(files) if old_sparse.matches(path) and not new_sparse.matches(path)]
+        for path in excluded:
+            if os.path.lexists(path):
+                if not self._worktree_matches(path, files[path], config):
+                    print(f"warning: not removing '{path}': it has local changes")
+                    continue
+                self._remove_worktree_file(path)
+                removed += 1
+
+        self._write_worktree_files(added, config=config)
+        self._record_worktree_files(added, excluded)
+        return len(added), removed
+
+    def sparse_checkout_set(self, patterns):
+        """Limita el directorio de trabajo a los directorios que coinciden con los patrones"""
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
 
-        # Check if it's a tag
-        tag_file = os.path.join(TAGS_DIR, branch_or_commit)
-        if os.path.exists(tag_file):
-            with open(tag_file, "r") as f:
-                commit_hash = f.read().strip()
-            with open(HEAD_FILE, "w") as f:
-                f.write(commit_hash)
-            print(f"HEAD is now at tag '{branch_or_commit}' ({commit_hash[:7]})")
+        new_sparse = SparseCheckout(patterns)
+        if not new_sparse.enabled:
+            print("error: no sparse-checkout patterns given")
+            return False
+
+        old_sparse = SparseCheckout.load()
+        SparseCheckout.save(new_sparse.to_lines())
+        added, removed = self._apply_sparse(old_sparse, new_sparse)
+        print(f"Sparse checkout set to {len(new_sparse.patterns)} pattern(s): "
+              f"added {added} file(s), removed {removed} file(s).")
+        return True
+
+    def sparse_checkout_list(self):
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
+
+        sparse = SparseCheckout.load()
+        if not sparse.enabled:
+            print("Sparse checkout is disabled.")
             return True
+        for pattern in sparse.to_lines():
+            print(pattern)
+        return True
 
-        print(f"error: pathspec '{branch_or_commit}' did not match any branch, commit or tag")
-        return False
+    def sparse_checkout_disable(self):
+        """Vuelve a incluir todos los archivos en el directorio de trabajo"""
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
+
+        old_sparse = SparseCheckout.load()
+        SparseCheckout.clear()
+        added, _ = self._apply_sparse(old_sparse, SparseCheckout())
+        print(f"Sparse checkout disabled: added {added} file(s).")
+        return True
 
     def tag(self, tag_name):
         if not os.path.exists(SBAC_DIR):
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        with open(HEAD_FILE, "r") as f:
-            head_ref = f.read().strip()
-        
-        if head_ref.startswith("ref: "):
-            branch = head_ref.split("/")[-1]
-            branch_file = os.path.join(HEADS_DIR, branch)
-            with open(branch_file, "r") as f:
-                commit_hash = f.read().strip()
-        else:
-            commit_hash = head_ref
-
-        tag_file = os.path.join(TAGS_DIR, tag_name)
-        with open(tag_file, "w") as f:
-            f.write(commit_hash)
+        commit_hash = self._rev_parse("HEAD") or ""
+        self.refs.write(f"refs/tags/{tag_name}", commit_hash)
 
         print(f"Created tag '{tag_name}' at {commit_hash[:7]}")
         return True
@@ -494,98 +751,511 @@ class SBAC:
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        if not os.path.exists(TAGS_DIR):
-            print("No tags found.")
-            return False
-
-        tags = os.listdir(TAGS_DIR)
+        # Tags sueltos y empaquetados (una sola lectura de packed-refs)
+        tags = self.refs.list("refs/tags/")
         if not tags:
             print("No tags found.")
             return False
 
         print("Tags:")
-        for tag in tags:
-            with open(os.path.join(TAGS_DIR, tag), "r") as f:
-                commit_hash = f.read().strip()
+        for tag, commit_hash in tags:
             print(f"{tag} ({commit_hash[:7]})")
 
         return True
 
-    def diff_commits(self, commit1, commit2):
+    def diff_commits(self, commit1, commit2, algorithm=None, jobs=None):
+        """Muestra las diferencias entre dos commits, archivo por archivo y en orden.
+
+        El diff de cada archivo modificado se calcula en un pool de 'jobs'
+        procesos (por defecto diff_workers de .sbac/config o uno por núcleo);
+        cada archivo se muestra en cuanto están listos él y todos los anteriores.
+        """
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
+
+        config = load_config()
+        if algorithm is None:
+            algorithm = config.get("diff_algorithm", DEFAULT_DIFF_ALGORITHM)
+        if algorithm not in DIFF_ALGORITHMS:
+            print(f"error: unknown diff algorithm '{algorithm}'")
+            return False
+        if jobs is None:
+            jobs = int(config.get("diff_workers", os.cpu_count() or 1))
+
+        # Se aceptan revisiones: ramas, tags, HEAD~n y hashes abreviados
+        commits = self._rev_parse_all((commit1, commit2))
+        if commits is None:
+            return False
+        commit1, commit2 = commits
+
+        commit_data1 = self._read_commit(commit1)
+        commit_data2 = self._read_commit(commit2)
+        if not commit_data1 or not commit_data2 or not commit_data1.get("tree") or not commit_data2.get("tree"):
+            print("Invalid commit hashes.")
+            return False
+
+        # Los subárboles iguales se saltan sin leerlos
+        changes = sorted(diff_trees(self.objects, commit_data1["tree"], commit_data2["tree"]))
+        modified = sum(1 for _, hash1, hash2 in changes if hash1 and hash2)
+        # Con un solo archivo que comparar no vale la pena iniciar procesos
+        executor = None
+        if jobs > 1 and modified > 1:
+            executor = ProcessPoolExecutor(max_workers=min(jobs, modified), initializer=_init_diff_worker)
+
+        # Cola en orden: futuros del pool o cambios que se resuelven aquí al llegar su turno
+        pending = deque()
+
+        def show_next():
+            item = pending.popleft()
+            if isinstance(item, Future):
+                print(item.result())
+            else:
+                print(_file_diff(self.objects, *item))
+
+        try:
+            for file, hash1, hash2 in changes:
+                task = (file, hash1, hash2, commit1, commit2, algorithm)
+                if executor is not None and hash1 and hash2:
+                    pending.append(executor.submit(_file_diff_in_worker, *task))
+                else:
+                    pending.append(task)
+                # Limitar los diffs terminados que esperan su turno en memoria
+                while len(pending) > jobs * DIFF_QUEUE_PER_WORKER:
+                    show_next()
+            while pending:
+                show_next()
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # El lector (por ejemplo 'head') ya no quiere más salida
+            self._discard_stdout()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        return True
+
+    def diff_tags(self, tag1, tag2, algorithm=None, jobs=None):
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
+
+        commit1 = self.refs.read(f"refs/tags/{tag1}")
+        commit2 = self.refs.read(f"refs/tags/{tag2}")
+        if commit1 is None or commit2 is None:
+            print("One or both tags not found.")
+            return False
+
+        print(f"Comparing changes between tag '{tag1}' and '{tag2}':")
+        return self.diff_commits(commit1, commit2, algorithm=algorithm, jobs=jobs)
+
+    def pack_refs(self):
+        """Mueve las ramas y tags sueltos al archivo packed-refs"""
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
+
+        packed = self.refs.pack()
+        print(f"Packed {packed} ref(s).")
+        return True
+
+    def migrate_objects(self):
+        """Migra los objetos guardados con el esquema plano al esquema con fan-out"""
         if not os.path.exists(SBAC_DIR):
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        def get_files_from_commit(commit_hash):
-            commit_path = os.path.join(OBJECTS_DIR, commit_hash)
-            if not os.path.exists(commit_path):
+        migrated = self.objects.migrate_flat()
+        print(f"Migrated {migrated} object(s) to the fan-out layout.")
+        return True
+
+    def _ref_tips(self):
+        """Commits apuntados por las ramas, los tags y un HEAD separado"""
+        start_points = []
+        for prefix in ("refs/heads/", "refs/tags/"):
+            start_points.extend(commit_hash for _, commit_hash in self.refs.list(prefix))
+
+        head_ref = self._read_head()
+        if not head_ref.startswith("ref: "):
+            start_points.append(head_ref)
+
+        return [commit_hash for commit_hash in start_points if commit_hash]
+
+    def _read_commit(self, commit_hash):
+        """Datos de un commit (memorizados por instancia), o None si no existe o no es un commit"""
+        commit_data = self._commits.get(commit_hash)
+        if commit_data is not None:
+            self._commits.move_to_end(commit_hash)
+            return commit_data
+
+        # La cabecera descarta blobs y árboles sin leer su contenido
+        commit_content = self.objects.read_object(commit_hash, "commit")
+        if commit_content is None:
+            return None
+        commit_data = json.loads(commit_content)
+        self._commits[commit_hash] = commit_data
+        if len(self._commits) > COMMIT_CACHE_SIZE:
+            self._commits.popitem(last=False)
+        return commit_data
+
+    def _changed_paths(self, old_tree, new_tree):
+        """Rutas que difieren entre dos árboles, más sus directorios padre"""
+        changed = set()
+        for path, _, _ in diff_trees(self.objects, old_tree, new_tree):
+            changed.add(path)
+            parts = path.split(os.sep)
+            for i in range(1, len(parts)):
+                changed.add(os.sep.join(parts[:i]))
+        return changed
+
+    def _history(self, commit_hash, graph=None):
+        """Genera (fila del commit-graph, datos o None) desde un commit hacia sus ancestros.
+
+        Si el commit está en el commit-graph, el recorrido no abre ningún
+        objeto y los datos se devuelven como None; si no, se leen los objetos
+        y las filas se construyen a partir de ellos (sin posición en el grafo).
+        """
+        graph = graph if graph is not None else CommitGraph()
+        entries = graph.walk(commit_hash) if commit_hash else None
+        if entries is not None:
+            for entry in entries:
+                yield entry, None
+            return
+
+        while commit_hash:
+            commit_data = self._read_commit(commit_hash)
+            if commit_data is None:
+                return
+            yield GraphEntry(None, commit_hash, commit_data["tree"], None,
+                             timestamp_to_micros(commit_data["timestamp"]), None), commit_data
+            commit_hash = commit_data["parent"]
+
+    def _parent_tree(self, graph, entry, commit_data):
+        """Hash del árbol del padre de un commit, o None si no tiene padre"""
+        if entry.row is not None:
+            return graph.entry(entry.parent).tree if entry.parent is not None else None
+        parent_data = self._read_commit(commit_data["parent"]) if commit_data["parent"] else None
+        return parent_data["tree"] if parent_data else None
+
+    def _touches_paths(self, graph, entry, commit_data, paths):
+        """Indica si un commit cambió alguna de las rutas respecto a su padre"""
+        bloom = graph.changed_paths_filter(entry)
+        if bloom is not None and not any(bloom.might_contain(path) for path in paths):
+            return False
+
+        # Sin filtro, o posible falso positivo: comparar los árboles
+        changed = self._changed_paths(self._parent_tree(graph, entry, commit_data), entry.tree)
+        return any(path in changed for path in paths)
+
+    def _commit_chain(self, commit_hash, known):
+        """Commits desde 'commit_hash' hasta el primero conocido, del más antiguo al más nuevo.
+
+        Devuelve filas (hash, árbol, padre, fecha, rutas cambiadas) para el
+        commit-graph, o None si la historia está incompleta o usa hashes
+        antiguos.
+        """
+        chain = []
+        while commit_hash and not known(commit_hash):
+            commit_data = self._read_commit(commit_hash)
+            if commit_data is None or not self.objects.is_object_name(commit_hash):
                 return None
+            chain.append(commit_data)
+            commit_hash = commit_data["parent"]
+        chain.reverse()
+
+        # Rutas cambiadas respecto al padre, para los filtros de Bloom
+        parent_data = self._read_commit(commit_hash) if commit_hash else None
+        parent_tree = parent_data["tree"] if parent_data else None
+        rows = []
+        for commit_data in chain:
+            rows.append((commit_data["hash"], commit_data["tree"], commit_data["parent"],
+                         timestamp_to_micros(commit_data["timestamp"]),
+                         self._changed_paths(parent_tree, commit_data["tree"])))
+            parent_tree = commit_data["tree"]
+        return rows
+
+    def _update_commit_graph(self, graph, commit_hash):
+        """Agrega al commit-graph un commit y los ancestros que le falten"""
+        chain = self._commit_chain(commit_hash, lambda c: graph.find(c) is not None)
+        if chain:
+            graph.append(chain)
+
+    def commit_graph(self):
+        """Reconstruye el commit-graph a partir de todas las referencias"""
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
 
-            with open(commit_path, "r") as f:
-                commit_data = json.load(f)
-            
-            tree_path = os.path.join(OBJECTS_DIR, commit_data["tree"])
-            with open(tree_path, "r") as f:
-                return json.load(f)
+        rows = []
+        seen = set()
+        for commit_hash in self._ref_tips():
+            chain = self._commit_chain(commit_hash, lambda c: c in seen)
+            if chain:
+                seen.update(row[0] for row in chain)
+                rows.extend(chain)
 
-        files1 = get_files_from_commit(commit1)
-        files2 = get_files_from_commit(commit2)
+        CommitGraph().write(rows)
+        print(f"Wrote commit-graph with {len(rows)} commit(s).")
+        return True
 
-        if not files1 or not files2:
-            print("Invalid commit hashes.")
+    def _read_head(self):
+        """Contenido de HEAD ("ref: refs/heads/<rama>" o un hash), leído una sola vez"""
+        if self._head is None:
+            with open(HEAD_FILE, "r") as f:
+                self._head = f.read().strip()
+        return self._head
+
+    def _write_head(self, value):
+        with open(HEAD_FILE, "w") as f:
+            f.write(value)
+        self._head = value
+
+    def _current_branch(self):
+        """Nombre de la rama actual, o None si HEAD está separado"""
+        head_ref = self._read_head()
+        if head_ref.startswith("ref: "):
+            return head_ref.split("/")[-1]
+        return None
+
+    def _resolve_name(self, name):
+        """Hash al que apunta HEAD, una rama, un hash (completo o abreviado) o un tag"""
+        if name == "HEAD":
+            branch = self._current_branch()
+            if branch is None:
+                return self._read_head() or None
+            name = branch
+
+        commit_hash = self.refs.read(f"refs/heads/{name}")
+        if commit_hash is not None:
+            return commit_hash or None
+
+        if self.objects.has_type(name, "commit"):
+            return name
+
+        commit_hash = self.refs.read(f"refs/tags/{name}")
+        if commit_hash is not None:
+            return commit_hash or None
+
+        # Hash abreviado (lanza AmbiguousObjectName si coincide con varios objetos)
+        commit_hash = self.objects.expand(name)
+        if commit_hash is not None and self.objects.has_type(commit_hash, "commit"):
+            return commit_hash
+        return None
+
+    def _rev_parse(self, rev):
+        """Hash del commit que indica una revisión, o None si no existe.
+
+        Acepta HEAD, ramas, tags y hashes (completos o abreviados), seguidos
+        de "~n" (n-ésimo ancestro) y "^" (padre) en cualquier combinación,
+        p. ej. "HEAD~2" o "v1.0^^". "^0" es el propio commit.
+        """
+        match = REV_SUFFIX.search(rev)
+        name, suffixes = (rev[:match.start()], rev[match.start():]) if match else (rev, "")
+        if not name:
+            return None
+        commit_hash = self._resolve_name(name)
+
+        for operator, count in REV_STEP.findall(suffixes):
+            if operator == "^":
+                # Cada commit tiene un solo padre: sólo ^, ^1 y ^0 son válidos
+                if count not in ("", "0", "1"):
+                    return None
+                steps = 0 if count == "0" else 1
+            else:
+                steps = int(count) if count else 1
+            for _ in range(steps):
+                commit_data = self._read_commit(commit_hash) if commit_hash else None
+                commit_hash = commit_data["parent"] if commit_data else None
+                if not commit_hash:
+                    return None
+        return commit_hash
+
+    def _rev_parse_all(self, revs):
+        """Hashes de los commits que indican las revisiones, en orden.
+
+        Si alguna no existe o es ambigua muestra el error y devuelve None.
+        """
+        hashes = []
+        for rev in revs:
+            try:
+                commit_hash = self._rev_parse(rev)
+            except AmbiguousObjectName as e:
+                print(f"error: {e}")
+                return None
+            if commit_hash is None:
+                print(f"error: unknown revision or path '{rev}'")
+                return None
+            hashes.append(commit_hash)
+        return hashes
+
+    def rev_parse(self, revs):
+        """Muestra el hash completo de cada revisión"""
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        all_files = set(files1.keys()).union(set(files2.keys()))
-        for file in sorted(all_files):
-            hash1 = files1.get(file)
-            hash2 = files2.get(file)
+        hashes = self._rev_parse_all(revs)
+        if hashes is None:
+            return False
 
-            if hash1 == hash2:
-                continue
+        print("\n".join(hashes))
+        return True
 
-            print(f"Changes in {file}:")
-            if not hash1:
-                print(f"  File added in {commit2[:7]}")
-                continue
-            if not hash2:
-                print(f"  File removed in {commit2[:7]}")
-                continue
+    def cat_file(self, name, mode):
+        """Muestra el tipo ("type"), el tamaño ("size") o el contenido ("print") de un objeto.
 
-            # Compare file contents
-            path1 = os.path.join(OBJECTS_DIR, hash1)
-            path2 = os.path.join(OBJECTS_DIR, hash2)
+        'name' es una revisión (rama, tag, HEAD~n...) o el hash, completo o
+        abreviado, de cualquier objeto.
+        """
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
 
-            with open(path1, "r") as f:
-                content1 = f.read().splitlines()
-            with open(path2, "r") as f:
-                content2 = f.read().splitlines()
+        try:
+            object_hash = self._rev_parse(name) or self.objects.expand(name)
+        except AmbiguousObjectName as e:
+            print(f"error: {e}")
+            return False
+        # El tipo y el tamaño salen de la cabecera sin leer el contenido
+        info = self.objects.info(object_hash) if object_hash else None
+        if info is None:
+            print(f"fatal: Not a valid object name {name}")
+            return False
 
-            diff = difflib.unified_diff(
-                content1, content2,
-                fromfile=f"{file} ({commit1[:7]})",
-                tofile=f"{file} ({commit2[:7]})",
-                lineterm=""
-            )
-            print("\n".join(diff))
+        object_type, size = info
+        # El manifest de un archivo en chunks se muestra como el archivo completo
+        if object_type == "chunked":
+            object_type = "blob"
+        try:
+            if mode == "type":
+                print(object_type)
+            elif mode == "size":
+                print(self.objects.blob_size(object_hash) if object_type == "blob" else size)
+            elif object_type == "blob":
+                # Los archivos se escriben tal cual (los que están en chunks, reensamblados)
+                sys.stdout.flush()
+                out = getattr(sys.stdout, "buffer", None)
+                for part in self.objects.iter_blob(object_hash):
+                    if out is not None:
+                        out.write(part)
+                    else:
+                        sys.stdout.write(part.decode(errors="replace"))
+                sys.stdout.flush()
+            else:
+                print(json.dumps(json.loads(self.objects.read(object_hash)), indent=4))
+                sys.stdout.flush()
+        except BrokenPipeError:
+            self._discard_stdout()
+        return True
 
+    def _find_merge_base(self, graph, commit1, commit2):
+        """Ancestro común más cercano de dos commits, o None"""
+        row1, row2 = graph.find(commit1), graph.find(commit2)
+        if row1 is None or row2 is None:
+            # Sin commit-graph: recorrer la historia leyendo los objetos
+            ancestors = {entry.hash for entry, _ in self._history(commit1, graph)}
+            for entry, _ in self._history(commit2, graph):
+                if entry.hash in ancestors:
+                    return entry.hash
+            return None
+
+        # Bajar primero al commit de mayor generación: ningún commit de
+        # generación mayor puede ser ancestro del otro
+        entry1, entry2 = graph.entry(row1), graph.entry(row2)
+        while entry1.row != entry2.row:
+            if entry1.generation >= entry2.generation:
+                if entry1.parent is None:
+                    return None
+                entry1 = graph.entry(entry1.parent)
+            else:
+                if entry2.parent is None:
+                    return None
+                entry2 = graph.entry(entry2.parent)
+        return entry1.hash
+
+    def _is_ancestor(self, graph, ancestor, descendant):
+        row1, row2 = graph.find(ancestor), graph.find(descendant)
+        if row1 is None or row2 is None:
+            return any(entry.hash == ancestor for entry, _ in self._history(descendant, graph))
+
+        # Sólo hace falta bajar hasta la generación del supuesto ancestro
+        target = graph.entry(row1)
+        entry = graph.entry(row2)
+        while entry.generation > target.generation and entry.parent is not None:
+            entry = graph.entry(entry.parent)
+        return entry.row == target.row
+
+    def merge_base(self, rev1, rev2):
+        """Muestra el ancestro común más cercano de dos revisiones"""
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
+            return False
+
+        commits = self._rev_parse_all((rev1, rev2))
+        if commits is None:
+            return False
+
+        graph = CommitGraph()
+        base = self._find_merge_base(graph, *commits)
+        graph.close()
+        if base is None:
+            print(f"No common ancestor between '{rev1}' and '{rev2}'.")
+            return False
+
+        print(base)
         return True
 
-    def diff_tags(self, tag1, tag2):
+    def is_ancestor(self, rev1, rev2):
+        """Indica si rev1 es ancestro de rev2 (un commit es ancestro de sí mismo)"""
         if not os.path.exists(SBAC_DIR):
             print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        tag1_file = os.path.join(TAGS_DIR, tag1)
-        tag2_file = os.path.join(TAGS_DIR, tag2)
+        commits = self._rev_parse_all((rev1, rev2))
+        if commits is None:
+            return False
 
-        if not os.path.exists(tag1_file) or not os.path.exists(tag2_file):
-            print("One or both tags not found.")
+        graph = CommitGraph()
+        result = self._is_ancestor(graph, *commits)
+        graph.close()
+        if result:
+            print(f"'{rev1}' is an ancestor of '{rev2}'.")
+        else:
+            print(f"'{rev1}' is not an ancestor of '{rev2}'.")
+        return result
+
+    def _blob_paths(self):
+        """Asocia cada blob de la historia con la ruta en la que aparece"""
+        paths = {}
+        visited = set()
+        seen_trees = set()
+        graph = CommitGraph()
+        for start in self._ref_tips():
+            for entry, _ in self._history(start, graph):
+                if entry.hash in visited:
+                    break
+                visited.add(entry.hash)
+
+                add_blob_paths(self.objects, entry.tree, paths, seen_trees)
+
+        graph.close()
+        return paths
+
+    def repack(self):
+        """Agrupa los objetos sueltos en un packfile con índice"""
+        if not os.path.exists(SBAC_DIR):
+            print("Not a SBAC repository. Run 'sbac init' first.")
             return False
 
-        with open(tag1_file, "r") as f:
-            commit1 = f.read().strip()
-        with open(tag2_file, "r") as f:
-            commit2 = f.read().strip()
+        config = load_config()
+        packed = self.objects.repack(
+            path_hints=self._blob_paths(),
+            window=int(config.get("pack_window", DEFAULT_PACK_WINDOW)),
+            max_depth=int(config.get("pack_delta_depth", DEFAULT_PACK_DELTA_DEPTH))
+        )
+        if not packed:
+            print("Nothing to pack.")
+            return True
 
-        print(f"Comparing changes between tag '{tag1}' and '{tag2}':")
-        return self.diff_commits(commit1, commit2)
\ No newline at end of file
+        print(f"Packed {packed} object(s).")
+        return True
\ No newline at end of file
@@ -0,0 +1,77 @@
+import os
+from fnmatch import fnmatchcase
+from src.config import *
+
+# Formato de .sbac/info/sparse-checkout: un patrón de directorio por línea
+# (por ejemplo "src/app" o "services/*/api"). Cada componente se compara con
+# fnmatch, y un archivo se incluye si está dentro de algún directorio que
+# coincide. Como en el modo cono de git, los archivos de la raíz se incluyen
+# siempre. Las líneas vacías y las que empiezan con '#' se ignoran.
+
+class SparseCheckout:
+    """Patrones de directorio que el directorio de trabajo debe contener.
+
+    Sin archivo de configuración (o sin patrones), se incluye todo.
+    """
+
+    def __init__(self, patterns=None):
+        self.patterns = [self._split(pattern) for pattern in patterns or []]
+        self.patterns = [parts for parts in self.patterns if parts]
+
+    @staticmethod
+    def _split(pattern):
+        pattern = pattern.strip().replace("\\", "/").strip("/")
+        return [part for part in pattern.split("/") if part and part != "."]
+
+    @classmethod
+    def load(cls, path=SPARSE_CHECKOUT_FILE):
+        try:
+            with open(path, "r") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return cls()
+        return cls(line for line in lines if line.strip() and not line.lstrip().startswith("#"))
+
+    @staticmethod
+    def save(patterns, path=SPARSE_CHECKOUT_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            for pattern in patterns:
+                f.write(pattern + "\n")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def clear(path=SPARSE_CHECKOUT_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+
+    @property
+    def enabled(self):
+        return bool(self.patterns)
+
+    def to_lines(self):
+        return ["/".join(parts) for parts in self.patterns]
+
+    @staticmethod
+    def _parts(path):
+        path = os.path.normpath(path)
+        return [] if path == "." else path.split(os.sep)
+
+    def matches(self, path):
+        """Indica si un archivo está en la raíz o dentro de algún directorio incluido"""
+        if not self.patterns:
+            return True
+        parts = self._parts(path)
+        if len(parts) == 1:
+            return True
+        return any(len(parts) > len(pattern) and all(map(fnmatchcase, parts, pattern))
+                   for pattern in self.patterns)
+
+    def includes_dir(self, path):
+        """Indica si un directorio puede contener archivos incluidos (para no recorrer los demás)"""
+        if not self.patterns:
+            return True
+        parts = self._parts(path)
+        # El directorio coincide con el inicio de un patrón, o está dentro de uno
+        return any(all(map(fnmatchcase, parts, pattern)) for pattern in self.patterns)
@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+
+# Un árbol es un objeto JSON por directorio: {nombre: hash del blob} para los
+# archivos y {nombre + "/": hash del subárbol} para los subdirectorios. Dos
+# directorios con el mismo contenido tienen el mismo hash, así que un commit
+# sólo crea árboles nuevos a lo largo de las rutas que cambiaron.
+#
+# Los árboles antiguos eran planos ({ruta completa: hash}); se siguen leyendo.
+TREE_DIR_SUFFIX = "/"
+
+def read_tree(objects, tree_hash):
+    """Entradas de un solo nivel de un árbol (vacío si no existe)"""
+    tree_content = objects.read_object(tree_hash, "tree") if tree_hash else None
+    if tree_content is None:
+        return {}
+    return json.loads(tree_content)
+
+def _is_flat(entries):
+    # En un árbol plano los nombres son rutas completas
+    return any(TREE_DIR_SUFFIX in name.rstrip(TREE_DIR_SUFFIX) for name in entries)
+
+def _flatten_entries(objects, entries, prefix, sparse=None):
+    files = {}
+    for name, object_hash in entries.items():
+        if name.endswith(TREE_DIR_SUFFIX):
+            directory = prefix + name[:-1]
+            if sparse is None or sparse.includes_dir(directory):
+                files.update(_flatten_entries(objects, read_tree(objects, object_hash),
+                                              directory + os.sep, sparse))
+        elif sparse is None or sparse.matches(prefix + name):
+            files[prefix + name] = object_hash
+    return files
+
+def flatten_tree(objects, tree_hash, sparse=None):
+    """Todos los archivos de un árbol: {ruta: hash del blob}.
+
+    Con 'sparse' sólo se incluyen (y se leen) los directorios que coinciden.
+    """
+    return _flatten_entries(objects, read_tree(objects, tree_hash), "", sparse)
+
+def add_blob_paths(objects, tree_hash, paths, seen_trees):
+    """Agrega a 'paths' {hash del blob: ruta} los archivos de un árbol.
+
+    Los árboles de 'seen_trees' ya se recorrieron y no se vuelven a leer:
+    entre commits cercanos casi todos los subárboles se repiten, así que de
+    cada commit sólo se leen los directorios que cambiaron.
+    """
+    stack = [(tree_hash, "")]
+    while stack:
+        tree_hash, prefix = stack.pop()
+        if tree_hash in seen_trees:
+            continue
+        seen_trees.add(tree_hash)
+        for name, object_hash in read_tree(objects, tree_hash).items():
+            if name.endswith(TREE_DIR_SUFFIX):
+                stack.append((object_hash, prefix + name[:-1] + os.sep))
+            else:
+                paths.setdefault(object_hash, prefix + name)
+
+def _write_node(objects, node):
+    entries = {}
+    for name, value in node.items():
+        entries[name] = _write_node(objects, value) if isinstance(value, dict) else value
+    tree_content = json.dumps(entries, sort_keys=True).encode()
+    tree_hash = hashlib.sha1(tree_content).hexdigest()
+    # Los subárboles que no cambiaron ya existen y no se vuelven a escribir
+    objects.write(tree_hash, tree_content, "tree")
+    return tree_hash
+
+def write_tree(objects, files):
+    """Escribe los árboles para {ruta: hash del blob} y devuelve el hash de la raíz"""
+    root = {}
+    for path, blob_hash in files.items():
+        parts = path.split(os.sep)
+        node = root
+        for part in parts[:-1]:
+            node = node.setdefault(part + TREE_DIR_SUFFIX, {})
+        node[parts[-1]] = blob_hash
+    return _write_node(objects, root)
+
+def _update_entries(objects, entries, changes):
+    # changes: {nombre o nombre/: hash del blob | {cambios del subdirectorio}}
+    for name, change in changes.items():
+        if isinstance(change, dict):
+            # Un archivo reemplazado por un directorio con el mismo nombre
+            entries.pop(name[:-1], None)
+            entries[name] = _update_entries(objects, read_tree(objects, entries.get(name)), change)
+        else:
+            entries.pop(name + TREE_DIR_SUFFIX, None)
+            entries[name] = change
+    tree_content = json.dumps(entries, sort_keys=True).encode()
+    tree_hash = hashlib.sha1(tree_content).hexdigest()
+    objects.write(tree_hash, tree_content, "tree")
+    return tree_hash
+
+def update_tree(objects, base_hash, files):
+    """Aplica {ruta: hash del blob} sobre un árbol y devuelve el hash del nuevo árbol.
+
+    Sólo se leen y reescriben los árboles de los directorios que contienen
+    alguna de las rutas; el resto de los subárboles se conserva tal cual.
+    """
+    base_entries = read_tree(objects, base_hash)
+    if _is_flat(base_entries):
+        # Árbol antiguo: reconstruirlo completo en el formato por directorios
+        return write_tree(objects, {**_flatten_entries(objects, base_entries, ""), **files})
+
+    changes = {}
+    for path, blob_hash in files.items():
+        parts = path.split(os.sep)
+        node = changes
+        for part in parts[:-1]:
+            node = node.setdefault(part + TREE_DIR_SUFFIX, {})
+        node[parts[-1]] = blob_hash
+    return _update_entries(objects, base_entries, changes)
+
+def diff_trees(objects, old_hash, new_hash, prefix="", sparse=None):
+    """Genera (ruta, hash anterior, hash nuevo) de los archivos que difieren.
+
+    Los subárboles con el mismo hash se saltan sin leerlos. El hash que falta
+    de un lado (archivo agregado o eliminado) es None. Con 'sparse' sólo se
+    recorren los directorios que coinciden.
+    """
+    if old_hash == new_hash:
+        return
+    old_entries = read_tree(objects, old_hash)
+    new_entries = read_tree(objects, new_hash)
+
+    if _is_flat(old_entries) or _is_flat(new_entries):
+        # Árbol antiguo: comparar las listas completas de archivos
+        old_files = _flatten_entries(objects, old_entries, prefix)
+        new_files = _flatten_entries(objects, new_entries, prefix)
+        for path in sorted(old_files.keys() | new_files.keys()):
+            if old_files.get(path) != new_files.get(path) and (sparse is None or sparse.matches(path)):
+                yield path, old_files.get(path), new_files.get(path)
+        return
+
+    for name in sorted(old_entries.keys() | new_entries.keys()):
+        old_child, new_child = old_entries.get(name), new_entries.get(name)
+        if old_child == new_child:
+            continue
+        if name.endswith(TREE_DIR_SUFFIX):
+            directory = prefix + name[:-1]
+            if sparse is None or sparse.includes_dir(directory):
+                yield from diff_trees(objects, old_child, new_child, directory + os.sep, sparse)
+        elif sparse is None or sparse.matches(prefix + name):
+            yield prefix + name, old_child, new_child
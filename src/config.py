@@ -1,4 +1,5 @@
 import os
+import json
 
 SBAC_DIR = ".sbac"
 OBJECTS_DIR = os.path.join(SBAC_DIR, "objects")
@@ -7,4 +8,66 @@ HEADS_DIR = os.path.join(REFS_DIR, "heads")
 TAGS_DIR = os.path.join(REFS_DIR, "tags")
 HEAD_FILE = os.path.join(SBAC_DIR, "HEAD")
 INDEX_FILE = os.path.join(SBAC_DIR, "index")
-CONFIG_FILE = os.path.join(SBAC_DIR, "config")
\ No newline at end of file
+INDEX_JOURNAL_FILE = os.path.join(SBAC_DIR, "index.journal")
+PACKED_REFS_FILE = os.path.join(SBAC_DIR, "packed-refs")
+CONFIG_FILE = os.path.join(SBAC_DIR, "config")
+PACK_DIR = os.path.join(OBJECTS_DIR, "pack")
+COMMIT_GRAPH_FILE = os.path.join(OBJECTS_DIR, "info", "commit-graph")
+SPARSE_CHECKOUT_FILE = os.path.join(SBAC_DIR, "info", "sparse-checkout")
+
+# Objetos: hashes SHA-1 en hexadecimal repartidos en subdirectorios objects/ab/cdef...
+HASH_HEX_LENGTH = 40
+FANOUT_WIDTH = 2
+
+# Nivel de zlib para los objetos sueltos (0 guarda los objetos sin comprimir)
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Tamaño de bloque con el que 'add' lee los archivos (limita la memoria usada)
+DEFAULT_STREAM_BUFFER_SIZE = 1024 * 1024
+
+# Modo de archivos grandes: los archivos de al menos 'large_file_threshold'
+# bytes (0 = desactivado) se dividen en chunks de este tamaño promedio
+DEFAULT_LARGE_FILE_THRESHOLD = 0
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# Packfiles: ventana de candidatos para los deltas, profundidad máxima de una
+# cadena de deltas y tamaño (en bytes) de la caché de bases reconstruidas
+DEFAULT_PACK_WINDOW = 10
+DEFAULT_PACK_DELTA_DEPTH = 10
+DELTA_BASE_CACHE_LIMIT = 32 * 1024 * 1024
+# Los blobs más grandes que esto se empaquetan completos, sin buscar deltas
+BIG_FILE_THRESHOLD = 64 * 1024 * 1024
+
+# El journal del índice se compacta en el índice al superar este tamaño (bytes)
+DEFAULT_INDEX_JOURNAL_LIMIT = 1024 * 1024
+
+# Commits que 'commit' agrega al commit-graph antes de reescribir su tabla de
+# búsqueda ordenada (mientras tanto se buscan recorriendo el final del grafo)
+COMMIT_GRAPH_LOOKUP_TAIL = 1024
+
+# Número de commits que 'log' acumula antes de escribir la salida
+LOG_BATCH_SIZE = 64
+
+# Hashes abreviados: longitud mínima del prefijo y número de objetos nuevos
+# que se acumulan en el log antes de reordenar el índice de nombres
+MIN_ABBREV_LENGTH = 4
+OBJECT_NAMES_LOG_LIMIT = 4096
+
+# Número de commits leídos que cada instancia de SBAC mantiene en memoria
+COMMIT_CACHE_SIZE = 4096
+
+# Algoritmo de 'diff' por defecto (myers, patience o histogram). Myers deja de
+# buscar el diff mínimo tras max(MYERS_MIN_COST, raíz de N + M) pasos, y
+# histogram no ancla en líneas que se repiten más de HISTOGRAM_MAX_CHAIN veces
+DEFAULT_DIFF_ALGORITHM = "myers"
+MYERS_MIN_COST = 256
+HISTOGRAM_MAX_CHAIN = 64
+# Diffs de archivos terminados (por proceso) que 'diff' guarda esperando su turno
+DIFF_QUEUE_PER_WORKER = 4
+
+def load_config():
+    """Lee .sbac/config; devuelve un diccionario vacío si no existe"""
+    if not os.path.exists(CONFIG_FILE):
+        return {}
+    with open(CONFIG_FILE, "r") as f:
+        return json.load(f)
\ No newline at end of file
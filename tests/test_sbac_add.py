@@ -1,10 +1,14 @@
 import os
 import unittest
+import unittest.mock
 import tempfile
 import shutil
 import json
+import hashlib
 from src.classes.sbac import SBAC
-from src.config import SBAC_DIR, OBJECTS_DIR, INDEX_FILE
+from src.classes.index import Index
+from src.classes.chunker import Chunker
+from src.config import SBAC_DIR, OBJECTS_DIR, INDEX_FILE, INDEX_JOURNAL_FILE, CONFIG_FILE
 
 class TestAddCommand(unittest.TestCase):
     def setUp(self):
@@ -43,19 +47,17 @@ class TestAddCommand(unittest.TestCase):
         # Verificar que el archivo se añadió al staging area
         self.assertTrue(os.path.exists(INDEX_FILE))
         
-        with open(INDEX_FILE, 'r') as f:
-            staged_files = json.load(f)
+        staged_files = Index.load().hashes()
         
         self.assertIn(self.file1, staged_files)
         
         # Verificar que el objeto se creó en OBJECTS_DIR
         object_hash = staged_files[self.file1]
-        object_path = os.path.join(OBJECTS_DIR, object_hash)
+        object_path = self.sbac.objects.object_path(object_hash)
         self.assertTrue(os.path.exists(object_path))
         
         # Verificar el contenido del objeto
-        with open(object_path, 'r') as f:
-            content = f.read()
+        content = self.sbac.objects.read(object_hash).decode()
         self.assertEqual(content, "Contenido del archivo 1")
     
     def test_add_multiple_files(self):
@@ -66,8 +68,7 @@ class TestAddCommand(unittest.TestCase):
         self.assertTrue(result)
         
         # Verificar que ambos archivos se añadieron al staging area
-        with open(INDEX_FILE, 'r') as f:
-            staged_files = json.load(f)
+        staged_files = Index.load().hashes()
         
         self.assertIn(self.file1, staged_files)
         self.assertIn(self.file2, staged_files)
@@ -75,7 +76,7 @@ class TestAddCommand(unittest.TestCase):
         # Verificar que los objetos se crearon en OBJECTS_DIR
         for file in [self.file1, self.file2]:
             object_hash = staged_files[file]
-            object_path = os.path.join(OBJECTS_DIR, object_hash)
+            object_path = self.sbac.objects.object_path(object_hash)
             self.assertTrue(os.path.exists(object_path))
     
     def test_add_nonexistent_file(self):
@@ -87,8 +88,7 @@ class TestAddCommand(unittest.TestCase):
             
         # Verificar que no se añadió ningún archivo al staging
         if os.path.exists(INDEX_FILE):
-            with open(INDEX_FILE, 'r') as f:
-                staged_files = json.load(f)
+            staged_files = Index.load().hashes()
             self.assertNotIn(self.nonexistent_file, staged_files)
     
     def test_add_updates_existing_staging(self):
@@ -96,8 +96,7 @@ class TestAddCommand(unittest.TestCase):
         self.sbac.add([self.file1])
         
         # Verificar el estado inicial del staging
-        with open(INDEX_FILE, 'r') as f:
-            initial_staged = json.load(f)
+        initial_staged = Index.load().hashes()
         initial_hash = initial_staged[self.file1]
         
         # Modificar el archivo
@@ -109,22 +108,354 @@ class TestAddCommand(unittest.TestCase):
         self.assertTrue(result)
         
         # Verificar que el staging se actualizó
-        with open(INDEX_FILE, 'r') as f:
-            updated_staged = json.load(f)
+        updated_staged = Index.load().hashes()
         updated_hash = updated_staged[self.file1]
         
         # El hash debería ser diferente
         self.assertNotEqual(initial_hash, updated_hash)
         
         # Verificar que el nuevo objeto existe
-        new_object_path = os.path.join(OBJECTS_DIR, updated_hash)
+        new_object_path = self.sbac.objects.object_path(updated_hash)
         self.assertTrue(os.path.exists(new_object_path))
         
         # Verificar el contenido del nuevo objeto
-        with open(new_object_path, 'r') as f:
-            content = f.read()
+        content = self.sbac.objects.read(updated_hash).decode()
         self.assertEqual(content, "Contenido modificado del archivo 1")
     
+    def test_add_stores_compressed_object(self):
+        # Un archivo repetitivo debe ocupar menos en el almacén de objetos
+        content = "linea repetida\n" * 500
+        with open(self.file1, 'w') as f:
+            f.write(content)
+
+        self.assertTrue(self.sbac.add([self.file1]))
+
+        object_hash = hashlib.sha1(content.encode()).hexdigest()
+        object_path = self.sbac.objects.object_path(object_hash)
+        self.assertLess(os.path.getsize(object_path), len(content))
+        self.assertEqual(self.sbac.objects.read(object_hash).decode(), content)
+
+    def test_add_with_compression_disabled(self):
+        # Con compression_level 0 los objetos se guardan sin comprimir
+        with open(CONFIG_FILE, 'w') as f:
+            json.dump({"author": "test", "compression_level": 0}, f)
+
+        sbac = SBAC()
+        self.assertTrue(sbac.add([self.file1]))
+
+        object_hash = hashlib.sha1(b"Contenido del archivo 1").hexdigest()
+        with open(sbac.objects.object_path(object_hash), 'rb') as f:
+            self.assertEqual(f.read(), b"blob 23\0Contenido del archivo 1")
+
+    def test_add_large_file_with_bounded_memory(self):
+        # Archivo mucho más grande que el límite de memoria configurado
+        memory_limit = 2 * 1024 * 1024
+        with open(CONFIG_FILE, 'w') as f:
+            json.dump({"author": "test", "stream_buffer_size": 64 * 1024}, f)
+
+        big_file = "big_file.bin"
+        hasher = hashlib.sha1()
+        with open(big_file, 'wb') as f:
+            for i in range(256):
+                block = hashlib.sha256(str(i).encode()).digest() * 1024
+                hasher.update(block)
+                f.write(block)
+        self.assertGreaterEqual(os.path.getsize(big_file), 4 * memory_limit)
+
+        import tracemalloc
+        sbac = SBAC()
+        tracemalloc.start()
+        try:
+            result = sbac.add([big_file])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertTrue(result)
+        self.assertLess(peak, memory_limit)
+
+        # El objeto guardado corresponde al contenido completo
+        staged_files = Index.load().hashes()
+        self.assertEqual(staged_files[big_file], hasher.hexdigest())
+        self.assertEqual(hashlib.sha1(sbac.objects.read(hasher.hexdigest())).hexdigest(), hasher.hexdigest())
+
+        # No quedan archivos temporales en el almacén
+        for root, dirs, files in os.walk(OBJECTS_DIR):
+            self.assertFalse([name for name in files if name.startswith("tmp-")])
+
+    def test_add_skips_unchanged_files(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        st = os.stat(self.file1)
+        os.utime(self.file1, ns=(st.st_atime_ns, st.st_mtime_ns - 10 * 10**9))
+        self.assertTrue(self.sbac.add([self.file1]))
+
+        # El stat no cambió: el archivo no se vuelve a leer
+        with patch.object(ObjectStore, 'write_file', wraps=self.sbac.objects.write_file) as write_file:
+            self.assertTrue(self.sbac.add([self.file1, self.file2]))
+        write_file.assert_called_once_with(self.file2, unittest.mock.ANY)
+
+        staged_files = Index.load().hashes()
+        self.assertEqual(staged_files[self.file1], hashlib.sha1(b"Contenido del archivo 1").hexdigest())
+
+    def test_index_records_stat_data(self):
+        st = os.stat(self.file1)
+        os.utime(self.file1, ns=(st.st_atime_ns, st.st_mtime_ns - 10 * 10**9))
+        self.assertTrue(self.sbac.add([self.file1]))
+
+        entry = Index.load().get(self.file1)
+        st = os.stat(self.file1)
+        self.assertEqual(entry.size, st.st_size)
+        self.assertEqual(entry.mtime_ns, st.st_mtime_ns)
+        self.assertEqual(entry.ino, st.st_ino)
+        self.assertEqual(entry.mode, st.st_mode)
+
+    def test_index_is_binary(self):
+        self.assertTrue(self.sbac.add([self.file1]))
+
+        with open(INDEX_FILE, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data.startswith(b"SBIX"))
+        self.assertEqual(data[-20:], hashlib.sha1(data[:-20]).digest())
+
+    def test_index_lookup_with_many_entries(self):
+        index = Index.load()
+        paths = [os.path.join("dir", f"sub{i % 7}", f"file{i}.txt") for i in range(500)]
+        for i, path in enumerate(paths):
+            index.update(path, hashlib.sha1(str(i).encode()).hexdigest())
+        index.save()
+        index.close()
+
+        index = Index.load()
+        self.assertEqual(len(index), len(paths))
+        self.assertEqual(list(index), sorted(paths))
+        for i, path in enumerate(paths):
+            self.assertEqual(index.get(path).hash, hashlib.sha1(str(i).encode()).hexdigest())
+        self.assertIsNone(index.get("dir/sub0/missing.txt"))
+        self.assertIsNone(index.get("aaa"))
+        self.assertIsNone(index.get("zzz"))
+        index.close()
+
+    def test_index_keeps_committed_and_removed_entries(self):
+        index = Index.load()
+        paths = [f"file{i}.txt" for i in range(40)]
+        for i, path in enumerate(paths):
+            index.update(path, hashlib.sha1(str(i).encode()).hexdigest())
+        index.save()
+        index.mark_committed()
+        index.remove(paths[3])
+        index.update(paths[5], hashlib.sha1(b"nuevo").hexdigest())
+        # Los cambios van al journal, con las eliminaciones como registros propios
+        index.save()
+        index.close()
+
+        index = Index.load()
+        self.assertEqual(list(index.hashes()), [paths[5]])
+        self.assertEqual(len(index), len(paths) - 1)
+        self.assertIsNone(index.get(paths[3]))
+        self.assertFalse(index.get(paths[0]).staged)
+        index.compact()
+        index.close()
+        self.assertEqual(sorted(Index.load()), sorted(set(paths) - {paths[3]}))
+
+    def test_legacy_json_index_is_upgraded(self):
+        legacy_hash = hashlib.sha1(b"Contenido diferente del archivo 2").hexdigest()
+        with open(INDEX_FILE, 'w') as f:
+            json.dump({self.file2: legacy_hash}, f)
+
+        self.assertEqual(Index.load().hashes(), {self.file2: legacy_hash})
+
+        self.assertTrue(self.sbac.add([self.file1]))
+        with open(INDEX_FILE, 'rb') as f:
+            self.assertTrue(f.read().startswith(b"SBIX"))
+        staged_files = Index.load().hashes()
+        self.assertEqual(sorted(staged_files), [self.file1, self.file2])
+        self.assertEqual(staged_files[self.file2], legacy_hash)
+
+    def test_corrupt_index_is_rejected(self):
+        self.assertTrue(self.sbac.add([self.file1]))
+        with open(INDEX_FILE, 'r+b') as f:
+            f.seek(20)
+            byte = f.read(1)
+            f.seek(20)
+            f.write(bytes([byte[0] ^ 0xff]))
+
+        with self.assertRaises(ValueError):
+            Index.load()
+
+    def test_add_appends_to_journal(self):
+        self.assertTrue(self.sbac.add([self.file1]))
+        with open(INDEX_FILE, 'rb') as f:
+            base = f.read()
+        self.assertFalse(os.path.exists(INDEX_JOURNAL_FILE))
+
+        self.assertTrue(self.sbac.add([self.file2]))
+
+        # El índice no se reescribe: el cambio queda en el journal
+        with open(INDEX_FILE, 'rb') as f:
+            self.assertEqual(f.read(), base)
+        self.assertTrue(os.path.exists(INDEX_JOURNAL_FILE))
+        self.assertEqual(sorted(Index.load().hashes()), [self.file1, self.file2])
+
+    def test_journal_is_compacted_past_limit(self):
+        with open(CONFIG_FILE, 'w') as f:
+            json.dump({"author": "test", "index_journal_limit": 200}, f)
+        self.assertTrue(self.sbac.add([self.file1]))
+
+        paths = []
+        for i in range(5):
+            path = f"extra{i}.txt"
+            with open(path, 'w') as f:
+                f.write(f"Contenido {i}")
+            paths.append(path)
+            self.assertTrue(self.sbac.add([path]))
+            if os.path.exists(INDEX_JOURNAL_FILE):
+                self.assertLessEqual(os.path.getsize(INDEX_JOURNAL_FILE), 200)
+
+        self.assertEqual(sorted(Index.load().hashes()), sorted(paths + [self.file1]))
+
+        # Compactar a mano deja todo en el índice
+        index = Index.load()
+        index.compact()
+        index.close()
+        self.assertFalse(os.path.exists(INDEX_JOURNAL_FILE))
+        self.assertEqual(sorted(Index.load().hashes()), sorted(paths + [self.file1]))
+
+    def test_truncated_journal_record_is_ignored(self):
+        self.assertTrue(self.sbac.add([self.file1]))
+        self.assertTrue(self.sbac.add([self.file2]))
+        with open(INDEX_JOURNAL_FILE, 'r+b') as f:
+            f.truncate(os.path.getsize(INDEX_JOURNAL_FILE) - 3)
+
+        self.assertEqual(sorted(Index.load().hashes()), [self.file1])
+
+        # El siguiente add descarta el registro incompleto y agrega el suyo
+        self.assertTrue(self.sbac.add([self.file2]))
+        self.assertEqual(sorted(Index.load().hashes()), [self.file1, self.file2])
+
+    def test_stale_journal_is_ignored(self):
+        self.assertTrue(self.sbac.add([self.file1]))
+        self.assertTrue(self.sbac.add([self.file2]))
+        with open(INDEX_JOURNAL_FILE, 'rb') as f:
+            journal = f.read()
+
+        # Un índice nuevo deja el journal anterior sin efecto
+        os.remove(INDEX_FILE)
+        os.remove(INDEX_JOURNAL_FILE)
+        with open(self.file1, 'w') as f:
+            f.write("Contenido nuevo del archivo 1")
+        self.assertTrue(self.sbac.add([self.file1]))
+        with open(INDEX_JOURNAL_FILE, 'wb') as f:
+            f.write(journal)
+
+        self.assertEqual(sorted(Index.load().hashes()), [self.file1])
+
+    def create_tree(self):
+        # Estructura de directorios con varios archivos
+        paths = []
+        for d in ["src", os.path.join("src", "sub"), "docs"]:
+            os.makedirs(d, exist_ok=True)
+            for i in range(5):
+                path = os.path.join(d, f"file{i}.txt")
+                with open(path, 'w') as f:
+                    f.write(f"Contenido de {path}")
+                paths.append(path)
+        return paths
+
+    def test_add_directory_recursively(self):
+        paths = self.create_tree()
+
+        result = self.sbac.add(["src", "docs"])
+        self.assertTrue(result)
+
+        staged_files = Index.load().hashes()
+        self.assertEqual(sorted(staged_files), sorted(paths))
+        for path in paths:
+            with open(path, 'rb') as f:
+                self.assertEqual(staged_files[path], hashlib.sha1(f.read()).hexdigest())
+
+    def test_add_current_directory_skips_repository(self):
+        self.create_tree()
+
+        self.assertTrue(self.sbac.add(["."]))
+
+        staged_files = Index.load().hashes()
+        self.assertIn(self.file1, staged_files)
+        self.assertFalse([path for path in staged_files if path.startswith(SBAC_DIR)])
+
+    def test_parallel_add_matches_serial_add(self):
+        self.create_tree()
+
+        self.assertTrue(self.sbac.add(["src", "docs"], jobs=1))
+        serial = Index.load().hashes()
+        os.remove(INDEX_FILE)
+
+        self.assertTrue(self.sbac.add(["src", "docs"], jobs=4))
+        parallel = Index.load().hashes()
+        self.assertEqual(serial, parallel)
+
+    def test_add_does_not_decode_whole_index(self):
+        self.sbac.add([self.file1])
+        with unittest.mock.patch.object(Index, 'hashes', side_effect=AssertionError("hashes")):
+            self.assertTrue(self.sbac.add([self.file2]))
+        # staged_files se lee del índice sólo al pedirlo
+        self.assertEqual(sorted(self.sbac.staged_files), [self.file1, self.file2])
+
+    def enable_large_files(self):
+        # Modo de archivos grandes con chunks pequeños para la prueba
+        with open(CONFIG_FILE, 'w') as f:
+            json.dump({"author": "test", "large_file_threshold": 1024, "chunk_size": 4096}, f)
+
+    def test_add_large_file_in_chunks(self):
+        self.enable_large_files()
+        import random
+        content = random.Random(7).randbytes(200 * 1024)
+        with open("disk.img", 'wb') as f:
+            f.write(content)
+
+        sbac = SBAC()
+        self.assertTrue(sbac.add(["disk.img"]))
+
+        manifest_hash = Index.load().hashes()["disk.img"]
+        self.assertNotEqual(manifest_hash, hashlib.sha1(content).hexdigest())
+        self.assertEqual(sbac.objects.read_blob(manifest_hash), content)
+        # El manifest se marca con su propio tipo de objeto
+        self.assertEqual(sbac.objects.info(manifest_hash)[0], "chunked")
+        self.assertEqual(sbac.objects.blob_size(manifest_hash), len(content))
+
+    def test_add_large_file_deduplicates_chunks(self):
+        self.enable_large_files()
+        import random
+        content = random.Random(7).randbytes(200 * 1024)
+        with open("disk.img", 'wb') as f:
+            f.write(content)
+        sbac = SBAC()
+        sbac.add(["disk.img"])
+        objects_before = sum(1 for _ in sbac.objects.loose_objects())
+
+        # Insertar bytes en medio desplaza el resto, pero sólo cambian los chunks cercanos
+        modified = content[:100000] + b"cambio local" + content[100000:]
+        with open("disk.img", 'wb') as f:
+            f.write(modified)
+
+        import io
+        from contextlib import redirect_stdout
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(sbac.add(["disk.img"]))
+        self.assertIn("dedup ratio", output.getvalue())
+
+        manifest_hash = Index.load().hashes()["disk.img"]
+        self.assertEqual(sbac.objects.read_blob(manifest_hash), modified)
+
+        _, total, new = sbac.objects.write_chunked("disk.img", Chunker(4096))
+        self.assertEqual(new, 0)
+        self.assertEqual(total, len(modified))
+        # Sólo se guardan unos pocos chunks nuevos y el nuevo manifest
+        objects_after = sum(1 for _ in sbac.objects.loose_objects())
+        self.assertLess(objects_after - objects_before, 8)
+
     def test_add_without_init(self):
         # Crear un directorio temporal completamente nuevo solo para este test
         temp_dir = tempfile.mkdtemp()
@@ -139,5 +139,14 @@ class TestBranchCommands(unittest.TestCase):
         result = self.sbac.delete_branch("no-existe")
         self.assertFalse(result)
 
+    def test_create_branch_from_abbreviated_hash(self):
+        with open(os.path.join(HEADS_DIR, "master"), 'r') as f:
+            master_commit = f.read().strip()
+
+        self.assertTrue(self.sbac.create_branch("rama-abreviada", master_commit[:7]))
+        with open(os.path.join(HEADS_DIR, "rama-abreviada"), 'r') as f:
+            self.assertEqual(f.read().strip(), master_commit)
+        self.assertFalse(self.sbac.create_branch("otra-rama", "ffffffff"))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
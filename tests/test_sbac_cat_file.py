@@ -0,0 +1,195 @@
+import os
+import io
+import json
+import zlib
+import hashlib
+import unittest
+import tempfile
+import shutil
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.classes.sbac import SBAC
+from src.classes.object_store import ObjectStore
+from src.config import HEADS_DIR, HEAD_FILE, CONFIG_FILE
+
+class TestCatFileCommand(unittest.TestCase):
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio con un commit
+        self.sbac = SBAC()
+        self.sbac.init()
+        self.file1 = "file1.txt"
+        self.content = b"Contenido inicial\n"
+        with open(self.file1, 'wb') as f:
+            f.write(self.content)
+        self.sbac.add([self.file1])
+        self.assertTrue(self.sbac.commit("Commit inicial"))
+        with open(os.path.join(HEADS_DIR, "master")) as f:
+            self.commit_hash = f.read().strip()
+        self.blob_hash = hashlib.sha1(self.content).hexdigest()
+        self.tree_hash = json.loads(self.sbac.objects.read(self.commit_hash))["tree"]
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def cat_file(self, name, mode):
+        f = io.StringIO()
+        with redirect_stdout(f):
+            result = self.sbac.cat_file(name, mode)
+        return result, f.getvalue()
+
+    def test_objects_are_stored_with_header(self):
+        path = self.sbac.objects.object_path(self.blob_hash)
+        with open(path, 'rb') as f:
+            stored = zlib.decompress(f.read())
+        self.assertEqual(stored, b"blob 18\0" + self.content)
+        # La cabecera no cambia el hash ni el contenido leído
+        self.assertEqual(self.sbac.objects.read(self.blob_hash), self.content)
+
+    def test_type(self):
+        for object_hash, object_type in [(self.commit_hash, "commit"), (self.tree_hash, "tree"),
+                                         (self.blob_hash, "blob"), (self.blob_hash[:7], "blob")]:
+            result, output = self.cat_file(object_hash, "type")
+            self.assertTrue(result)
+            self.assertEqual(output, f"{object_type}\n")
+
+        result, output = self.cat_file("HEAD", "type")
+        self.assertEqual(output, "commit\n")
+
+    def test_size(self):
+        result, output = self.cat_file(self.blob_hash, "size")
+        self.assertTrue(result)
+        self.assertEqual(output, f"{len(self.content)}\n")
+
+        result, output = self.cat_file(self.tree_hash, "size")
+        self.assertEqual(output, f"{len(self.sbac.objects.read(self.tree_hash))}\n")
+
+    def test_print(self):
+        result, output = self.cat_file(self.commit_hash, "print")
+        self.assertTrue(result)
+        self.assertEqual(json.loads(output)["message"], "Commit inicial")
+
+        result, output = self.cat_file(self.tree_hash, "print")
+        self.assertEqual(json.loads(output), {self.file1: self.blob_hash})
+
+        result, output = self.cat_file(self.blob_hash, "print")
+        self.assertEqual(output, self.content.decode())
+
+    def test_type_and_size_read_only_the_header(self):
+        with patch.object(ObjectStore, 'read', side_effect=AssertionError("read")):
+            self.assertEqual(self.cat_file(self.blob_hash, "type"), (True, "blob\n"))
+            self.assertEqual(self.cat_file(self.tree_hash, "size")[0], True)
+
+    def test_type_after_repack(self):
+        self.assertTrue(SBAC().repack())
+        sbac = SBAC()
+        self.assertEqual(sbac.objects.info(self.commit_hash)[0], "commit")
+        self.assertEqual(sbac.objects.info(self.blob_hash), ("blob", len(self.content)))
+        self.assertEqual(sbac.objects.read(self.blob_hash), self.content)
+
+    def test_uncompressed_objects(self):
+        with open(CONFIG_FILE, 'w') as f:
+            json.dump({"author": "test", "compression_level": 0}, f)
+        with open("file2.txt", 'w') as f:
+            f.write("Sin comprimir")
+        sbac = SBAC()
+        sbac.add(["file2.txt"])
+        object_hash = hashlib.sha1(b"Sin comprimir").hexdigest()
+        self.assertEqual(sbac.objects.info(object_hash), ("blob", 13))
+
+    def test_legacy_objects_without_header(self):
+        # Objetos de un repositorio anterior, guardados sin cabecera
+        blob = b"contenido antiguo"
+        blob_hash = hashlib.sha1(blob).hexdigest()
+        tree = json.dumps({"antiguo.txt": blob_hash}).encode()
+        tree_hash = hashlib.sha1(tree).hexdigest()
+        commit = json.dumps({"message": "antiguo", "parent": None, "tree": tree_hash}).encode()
+        commit_hash = hashlib.sha1(commit).hexdigest()
+        for object_hash, data in [(blob_hash, blob), (tree_hash, tree), (commit_hash, commit)]:
+            path = self.sbac.objects.object_path(object_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(zlib.compress(data))
+
+        self.assertEqual(self.cat_file(blob_hash, "type")[1], "blob\n")
+        self.assertEqual(self.cat_file(tree_hash, "type")[1], "tree\n")
+        self.assertEqual(self.cat_file(commit_hash, "type")[1], "commit\n")
+        self.assertEqual(self.cat_file(blob_hash, "size")[1], f"{len(blob)}\n")
+        self.assertTrue(self.sbac.checkout(commit_hash))
+        with open("antiguo.txt", 'rb') as f:
+            self.assertEqual(f.read(), blob)
+
+    def test_legacy_tree_and_json_blob_are_not_commits(self):
+        # Un árbol y un archivo JSON sin cabecera no se aceptan como commits
+        legacy_tree = json.dumps({"file1.txt": self.blob_hash}).encode()
+        legacy_json = json.dumps({"entries": [1, 2], "version": 3}).encode()
+        hashes = []
+        for data in (legacy_tree, legacy_json):
+            object_hash = hashlib.sha1(data).hexdigest()
+            path = self.sbac.objects.object_path(object_hash)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(zlib.compress(data))
+            hashes.append(object_hash)
+        tree_hash, json_hash = hashes
+
+        self.assertEqual(self.cat_file(tree_hash, "type")[1], "tree\n")
+        self.assertEqual(self.cat_file(json_hash, "type")[1], "blob\n")
+        self.assertTrue(self.sbac.objects.has_type(tree_hash, "tree"))
+        self.assertTrue(self.sbac.objects.has_type(json_hash, "blob"))
+        for name in [tree_hash, json_hash, json_hash[:8]]:
+            self.assertIsNone(self.sbac._rev_parse(name))
+            with redirect_stdout(io.StringIO()):
+                self.assertFalse(self.sbac.rev_parse([name]))
+                self.assertFalse(self.sbac.create_branch("desde-arbol", name))
+                self.assertFalse(self.sbac.checkout(name))
+        self.assertFalse(os.path.exists(os.path.join(HEADS_DIR, "desde-arbol")))
+        with open(HEAD_FILE, 'r') as f:
+            self.assertEqual(f.read().strip(), "ref: refs/heads/master")
+
+    def test_commit_lookups_reject_other_types(self):
+        # Un blob que parece un commit no se acepta como tal
+        fake = json.dumps({"tree": self.tree_hash, "parent": None, "message": "falso"}).encode()
+        fake_hash = hashlib.sha1(fake).hexdigest()
+        self.sbac.objects.write(fake_hash, fake)
+
+        for name in [fake_hash, fake_hash[:8], self.blob_hash, self.tree_hash]:
+            with redirect_stdout(io.StringIO()):
+                self.assertFalse(self.sbac.checkout(name))
+            self.assertIsNone(self.sbac._rev_parse(name))
+        with open(HEAD_FILE, 'r') as f:
+            self.assertEqual(f.read().strip(), "ref: refs/heads/master")
+
+    def test_commit_lookup_does_not_read_large_blob(self):
+        big_file = "big.bin"
+        with open(big_file, 'wb') as f:
+            f.write(b"x" * (4 * 1024 * 1024))
+        self.sbac.add([big_file])
+        big_hash = ObjectStore.hash_file(big_file)
+
+        sbac = SBAC()
+        with patch.object(ObjectStore, 'read', side_effect=AssertionError("read")):
+            self.assertIsNone(sbac._read_commit(big_hash))
+            self.assertIsNone(sbac._rev_parse(big_hash))
+
+    def test_invalid_object(self):
+        result, output = self.cat_file("0" * 40, "type")
+        self.assertFalse(result)
+        self.assertEqual(output, f"fatal: Not a valid object name {'0' * 40}\n")
+
+    def test_cat_file_without_repo(self):
+        temp_dir = tempfile.mkdtemp()
+        os.chdir(temp_dir)
+        try:
+            self.assertFalse(SBAC().cat_file("HEAD", "type"))
+        finally:
+            os.chdir(self.test_dir)
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -108,5 +108,222 @@ class TestCheckoutCommand(unittest.TestCase):
             os.chdir(self.test_dir)
             shutil.rmtree(temp_dir)
 
+    def test_checkout_updates_working_tree(self):
+        # master no tiene file2.txt
+        self.assertFalse(os.path.exists(self.file2))
+
+        self.assertTrue(self.sbac.checkout("newbranch"))
+        with open(self.file2, 'r') as f:
+            self.assertEqual(f.read(), "Contenido en newbranch")
+
+        self.assertTrue(self.sbac.checkout("master"))
+        self.assertFalse(os.path.exists(self.file2))
+        with open(self.file1, 'r') as f:
+            self.assertEqual(f.read(), "Contenido inicial")
+
+    def test_checkout_only_writes_changed_files(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        self.assertTrue(self.sbac.checkout("newbranch"))
+        os.makedirs("lib")
+        paths = [os.path.join("lib", f"mod{i}.py") for i in range(5)]
+        for path in paths:
+            with open(path, 'w') as f:
+                f.write(f"Contenido de {path}")
+        self.sbac.add(paths)
+        self.assertTrue(self.sbac.commit("Agregar lib"))
+        self.assertTrue(self.sbac.create_branch("feature"))
+        self.assertTrue(self.sbac.checkout("feature"))
+        with open(paths[0], 'a') as f:
+            f.write("\nCambio")
+        self.sbac.add([paths[0]])
+        self.assertTrue(self.sbac.commit("Cambio en feature"))
+
+        with patch.object(ObjectStore, 'copy_blob_to', autospec=True,
+                          side_effect=ObjectStore.copy_blob_to) as copy:
+            self.assertTrue(self.sbac.checkout("newbranch"))
+        self.assertEqual([call.args[2] for call in copy.call_args_list], [paths[0]])
+        with open(paths[0], 'r') as f:
+            self.assertEqual(f.read(), f"Contenido de {paths[0]}")
+
+        # Al volver a master, el directorio lib desaparece
+        self.assertTrue(self.sbac.checkout("master"))
+        self.assertFalse(os.path.exists("lib"))
+
+    def test_checkout_parallel_writes(self):
+        self.assertTrue(self.sbac.checkout("newbranch"))
+        paths = [f"archivo{i}.txt" for i in range(10)]
+        for path in paths:
+            with open(path, 'w') as f:
+                f.write(f"Contenido de {path}")
+        self.sbac.add(paths)
+        self.assertTrue(self.sbac.commit("Muchos archivos"))
+        self.assertTrue(self.sbac.checkout("master", jobs=1))
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+        self.assertTrue(self.sbac.checkout("newbranch", jobs=4))
+        for path in paths:
+            with open(path, 'r') as f:
+                self.assertEqual(f.read(), f"Contenido de {path}")
+
+    def test_checkout_file_that_looks_like_a_manifest(self):
+        # Un archivo normal cuyo contenido empieza como un manifest de chunks
+        with open(os.path.join(HEADS_DIR, "master"), 'r') as f:
+            commit_hash = f.read().strip()
+        tree = json.loads(self.sbac.objects.read(commit_hash))["tree"]
+        blob_hash = json.loads(self.sbac.objects.read(tree))[self.file1]
+        content = ("sbac-chunks\n" + json.dumps({"size": 17, "chunks": [[blob_hash, 17]]})).encode()
+
+        self.assertTrue(self.sbac.checkout("newbranch"))
+        with open("manifest.txt", 'wb') as f:
+            f.write(content)
+        self.sbac.add(["manifest.txt"])
+        self.assertTrue(self.sbac.commit("Archivo con forma de manifest"))
+        self.assertTrue(self.sbac.checkout("master"))
+        self.assertFalse(os.path.exists("manifest.txt"))
+
+        self.assertTrue(self.sbac.checkout("newbranch"))
+        with open("manifest.txt", 'rb') as f:
+            self.assertEqual(f.read(), content)
+        content_hash = self.sbac.objects.hash_file("manifest.txt")
+        self.assertEqual(self.sbac.objects.read_blob(content_hash), content)
+        self.assertEqual(self.sbac.objects.blob_size(content_hash), len(content))
+
+    def test_checkout_refuses_to_overwrite_local_changes(self):
+        with open(self.file1, 'w') as f:
+            f.write("Cambio local")
+        self.assertTrue(self.sbac.create_branch("otra"))
+        self.assertTrue(self.sbac.checkout("otra"))
+
+        # newbranch no cambia file1, pero sí file2: crear file2 sin rastrear
+        with open(self.file2, 'w') as f:
+            f.write("Archivo local")
+        self.assertFalse(self.sbac.checkout("newbranch"))
+
+        # Nada cambió: HEAD sigue en la rama actual y los archivos se conservan
+        with open(HEAD_FILE, 'r') as f:
+            self.assertEqual(f.read().strip(), "ref: refs/heads/otra")
+        with open(self.file2, 'r') as f:
+            self.assertEqual(f.read(), "Archivo local")
+        with open(self.file1, 'r') as f:
+            self.assertEqual(f.read(), "Cambio local")
+
+    def test_checkout_file_permissions(self):
+        old_umask = os.umask(0o022)
+        try:
+            # Un archivo nuevo se crea con 0666 menos la umask, como con open()
+            self.assertTrue(self.sbac.checkout("newbranch"))
+            self.assertEqual(os.stat(self.file2).st_mode & 0o777, 0o644)
+
+            self.assertTrue(self.sbac.create_branch("otra"))
+            self.assertTrue(self.sbac.checkout("otra"))
+            with open(self.file2, 'w') as f:
+                f.write("Cambio en otra")
+            self.sbac.add([self.file2])
+            self.assertTrue(self.sbac.commit("Cambio en otra"))
+
+            # Al reemplazar un archivo se conservan sus permisos
+            os.chmod(self.file2, 0o755)
+            self.assertTrue(self.sbac.checkout("newbranch"))
+            with open(self.file2, 'r') as f:
+                self.assertEqual(f.read(), "Contenido en newbranch")
+            self.assertEqual(os.stat(self.file2).st_mode & 0o777, 0o755)
+        finally:
+            os.umask(old_umask)
+
+    def test_checkout_with_hardlinks(self):
+        self.assertTrue(self.sbac.checkout("newbranch", link="hardlink"))
+
+        with open(self.file2, 'r') as f:
+            self.assertEqual(f.read(), "Contenido en newbranch")
+        with open(os.path.join(HEADS_DIR, "newbranch"), 'r') as f:
+            commit_data = json.loads(self.sbac.objects.read(f.read().strip()))
+        blob_hash = json.loads(self.sbac.objects.read(commit_data["tree"]))[self.file2]
+        raw_path = self.sbac.objects.raw_path(blob_hash)
+        self.assertTrue(os.path.samefile(self.file2, raw_path))
+
+        # La copia compartida es de sólo lectura y sobrevive al checkout
+        self.assertFalse(os.stat(raw_path).st_mode & 0o222)
+        self.assertTrue(self.sbac.checkout("master", link="hardlink"))
+        self.assertFalse(os.path.exists(self.file2))
+        self.assertTrue(os.path.exists(raw_path))
+
+    def test_hardlink_does_not_reuse_modified_raw_copy(self):
+        self.assertTrue(self.sbac.checkout("newbranch", link="hardlink"))
+        with open(os.path.join(HEADS_DIR, "newbranch"), 'r') as f:
+            commit_data = json.loads(self.sbac.objects.read(f.read().strip()))
+        blob_hash = json.loads(self.sbac.objects.read(commit_data["tree"]))[self.file2]
+
+        # Editar el archivo enlazado también modifica la copia compartida
+        os.chmod(self.file2, 0o644)
+        with open(self.file2, 'w') as f:
+            f.write("Editado en el lugar")
+
+        self.assertEqual(self.sbac.objects.link_blob_to(blob_hash, "otra_copia.txt", "hardlink"), "hardlink")
+        with open("otra_copia.txt", 'r') as f:
+            self.assertEqual(f.read(), "Contenido en newbranch")
+        self.assertFalse(os.path.samefile(self.file2, "otra_copia.txt"))
+        with open(self.file2, 'r') as f:
+            self.assertEqual(f.read(), "Editado en el lugar")
+
+    def test_hardlink_skips_rehash_of_unchanged_raw_copy(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        self.assertTrue(self.sbac.checkout("newbranch", link="hardlink"))
+        with open(os.path.join(HEADS_DIR, "newbranch"), 'r') as f:
+            commit_data = json.loads(self.sbac.objects.read(f.read().strip()))
+        blob_hash = json.loads(self.sbac.objects.read(commit_data["tree"]))[self.file2]
+        self.assertTrue(os.path.exists(self.sbac.objects.raw_path(blob_hash) + ".stat"))
+
+        # Con el mismo tamaño, mtime e inodo la copia no se vuelve a leer
+        with patch.object(ObjectStore, 'hash_file', side_effect=AssertionError("rehash")):
+            self.assertEqual(self.sbac.objects.link_blob_to(blob_hash, "otra_copia.txt", "hardlink"), "hardlink")
+
+        # Si la copia cambió, se verifica su hash
+        raw_path = self.sbac.objects.raw_path(blob_hash)
+        os.utime(raw_path, ns=(0, 0))
+        with patch.object(ObjectStore, 'hash_file', wraps=self.sbac.objects.hash_file) as hash_file:
+            self.assertEqual(self.sbac.objects.link_blob_to(blob_hash, "tercera_copia.txt", "hardlink"), "hardlink")
+        hash_file.assert_called_once()
+        self.assertTrue(os.path.samefile(raw_path, "tercera_copia.txt"))
+
+    def test_checkout_link_falls_back_to_copy(self):
+        from unittest.mock import patch
+
+        with patch("os.link", side_effect=OSError("cross-device link")), \
+                patch("src.classes.object_store.reflink", return_value=False):
+            self.assertTrue(self.sbac.checkout("newbranch", link="hardlink"))
+
+        with open(self.file2, 'r') as f:
+            self.assertEqual(f.read(), "Contenido en newbranch")
+        self.assertEqual(os.stat(self.file2).st_nlink, 1)
+
+    def test_checkout_by_abbreviated_hash(self):
+        with open(os.path.join(HEADS_DIR, "newbranch"), 'r') as f:
+            commit_hash = f.read().strip()
+
+        self.assertTrue(self.sbac.checkout(commit_hash[:7]))
+        with open(HEAD_FILE, 'r') as f:
+            self.assertEqual(f.read().strip(), commit_hash)
+        self.assertTrue(os.path.exists(self.file2))
+
+    def test_checkout_ambiguous_abbreviated_hash(self):
+        import io
+        from contextlib import redirect_stdout
+        for suffix in ("0", "1"):
+            self.sbac.objects.write("abcd" + suffix * 36, b"{}")
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertFalse(self.sbac.checkout("abcd"))
+        self.assertIn("short object ID abcd is ambiguous", output.getvalue())
+        self.assertIn("abcd" + "1" * 36, output.getvalue())
+
+        # Un prefijo más largo es único; uno demasiado corto no se resuelve
+        self.assertEqual(self.sbac.objects.expand("abcd0"), "abcd" + "0" * 36)
+        self.assertIsNone(self.sbac.objects.expand("abc"))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
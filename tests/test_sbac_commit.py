@@ -3,8 +3,10 @@ import unittest
 import tempfile
 import shutil
 import json
+from unittest.mock import patch
 from src.classes.sbac import SBAC
-from src.config import SBAC_DIR, OBJECTS_DIR, INDEX_FILE, HEAD_FILE, HEADS_DIR
+from src.classes.index import Index
+from src.config import SBAC_DIR, INDEX_FILE, INDEX_JOURNAL_FILE, HEAD_FILE, HEADS_DIR
 
 class TestCommitCommand(unittest.TestCase):
     def setUp(self):
@@ -52,16 +54,48 @@ class TestCommitCommand(unittest.TestCase):
             commit_hash = head_ref
         
         # Verificar que se creó el objeto commit
-        commit_path = os.path.join(OBJECTS_DIR, commit_hash)
+        commit_path = self.sbac.objects.object_path(commit_hash)
         self.assertTrue(os.path.exists(commit_path), 
                     f"Commit object not found at {commit_path}")
         
-        # Verificar que el staging area está limpio
-        self.assertFalse(os.path.exists(INDEX_FILE))
+        # Verificar que el staging area está limpio, pero el índice conserva el stat
+        self.assertTrue(os.path.exists(INDEX_FILE))
+        index = Index.load()
+        self.assertEqual(index.hashes(), {})
+        self.assertFalse(index.get(self.file1).staged)
     
+    def test_commit_includes_journal_entries(self):
+        # El segundo add queda en el journal del índice
+        self.sbac.add([self.file1])
+        self.sbac.add([self.file2])
+        self.assertTrue(os.path.exists(INDEX_JOURNAL_FILE))
+
+        self.assertTrue(self.sbac.commit("Commit desde el journal"))
+        self.assertEqual(sorted(self.sbac.staged_files), [])
+        self.assertEqual(sorted(Index.load()), [self.file1, self.file2])
+
+        with open(os.path.join(HEADS_DIR, "master")) as f:
+            commit = json.loads(self.sbac.objects.read(f.read().strip()))
+        tree = json.loads(self.sbac.objects.read(commit["tree"]))
+        self.assertEqual(sorted(tree), [self.file1, self.file2])
+
+    def test_add_after_commit_uses_stat_cache(self):
+        self.sbac.add([self.file1, self.file2])
+        self.assertTrue(self.sbac.commit("Primer commit"))
+
+        # Los archivos sin cambios no se vuelven a leer ni a guardar
+        from src.classes.object_store import ObjectStore
+        sbac = SBAC()
+        with patch.object(ObjectStore, 'write_file', side_effect=AssertionError("write_file")), \
+                patch.object(ObjectStore, 'hash_file', side_effect=AssertionError("hash_file")):
+            self.assertTrue(sbac.add([self.file1, self.file2]))
+            self.assertTrue(sbac.status())
+        self.assertEqual(sorted(Index.load().hashes()), [self.file1, self.file2])
+
     def test_commit_without_staged_changes(self):
         # Intentar commit sin cambios
-        result = self.sbac.commit("Commit sin cambios")
+        with patch.object(Index, 'hashes', side_effect=AssertionError("hashes")):
+            result = self.sbac.commit("Commit sin cambios")
         self.assertFalse(result)
     
     def test_commit_creates_tree_object(self):
@@ -75,20 +109,49 @@ class TestCommitCommand(unittest.TestCase):
             commit_hash = f.read().strip()
         
         # Leer objeto commit
-        commit_path = os.path.join(OBJECTS_DIR, commit_hash)
-        with open(commit_path, 'r') as f:
-            commit_data = json.load(f)
+        commit_data = json.loads(self.sbac.objects.read(commit_hash))
         
         # Verificar que existe el tree object
-        tree_path = os.path.join(OBJECTS_DIR, commit_data["tree"])
+        tree_path = self.sbac.objects.object_path(commit_data["tree"])
         self.assertTrue(os.path.exists(tree_path))
         
         # Verificar contenido del tree
-        with open(tree_path, 'r') as f:
-            tree_data = json.load(f)
+        tree_data = json.loads(self.sbac.objects.read(commit_data["tree"]))
         self.assertIn(self.file1, tree_data)
         self.assertIn(self.file2, tree_data)
     
+    def head_tree(self):
+        with open(os.path.join(HEADS_DIR, "master"), 'r') as f:
+            commit_data = json.loads(self.sbac.objects.read(f.read().strip()))
+        return json.loads(self.sbac.objects.read(commit_data["tree"]))
+
+    def test_commit_creates_tree_per_directory(self):
+        for d in ["src", "docs"]:
+            os.makedirs(d)
+        paths = [os.path.join("src", "main.py"), os.path.join("docs", "guia.txt")]
+        for path in paths:
+            with open(path, 'w') as f:
+                f.write(f"Contenido de {path}")
+
+        self.sbac.add([self.file1] + paths)
+        self.assertTrue(self.sbac.commit("Commit con directorios"))
+
+        root = self.head_tree()
+        self.assertEqual(sorted(root), ["docs/", "file1.txt", "src/"])
+        src_tree = json.loads(self.sbac.objects.read(root["src/"]))
+        self.assertEqual(list(src_tree), ["main.py"])
+
+        # Cambiar un archivo de src: el subárbol de docs se reutiliza
+        with open(paths[0], 'a') as f:
+            f.write("\nCambio")
+        self.sbac.add([self.file1] + paths)
+        self.assertTrue(self.sbac.commit("Cambio en src"))
+
+        new_root = self.head_tree()
+        self.assertEqual(new_root["docs/"], root["docs/"])
+        self.assertEqual(new_root["file1.txt"], root["file1.txt"])
+        self.assertNotEqual(new_root["src/"], root["src/"])
+
     def test_commit_with_parent(self):
         # Primer commit
         self.sbac.add([self.file1])
@@ -104,11 +167,48 @@ class TestCommitCommand(unittest.TestCase):
         with open(os.path.join(HEADS_DIR, "master"), 'r') as f:
             second_commit_hash = f.read().strip()
         
-        with open(os.path.join(OBJECTS_DIR, second_commit_hash), 'r') as f:
-            second_commit_data = json.load(f)
+        second_commit_data = json.loads(self.sbac.objects.read(second_commit_hash))
         
         self.assertIsNotNone(second_commit_data["parent"])
     
+    def test_commit_records_full_snapshot(self):
+        self.sbac.add([self.file1])
+        self.assertTrue(self.sbac.commit("Primer commit"))
+
+        # El segundo commit sólo agrega file2: file1 sigue en el árbol
+        self.sbac.add([self.file2])
+        self.assertTrue(self.sbac.commit("Segundo commit"))
+        self.assertEqual(sorted(self.head_tree()), [self.file1, self.file2])
+        self.assertEqual(self.sbac.get_untracked_files(), [])
+
+    def test_commit_only_rewrites_changed_directories(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        paths = []
+        for d in ["a", "b", "c"]:
+            os.makedirs(d)
+            path = os.path.join(d, "f.txt")
+            with open(path, 'w') as f:
+                f.write(f"Contenido de {d}")
+            paths.append(path)
+        self.sbac.add(paths)
+        self.assertTrue(self.sbac.commit("Primer commit"))
+        root = self.head_tree()
+
+        with open(paths[0], 'a') as f:
+            f.write("\nCambio")
+        self.sbac.add([paths[0]])
+        with patch.object(ObjectStore, 'write', wraps=self.sbac.objects.write) as write:
+            self.assertTrue(self.sbac.commit("Cambio en a"))
+
+        # Sólo se escriben el subárbol de 'a', la raíz y el commit
+        self.assertEqual(write.call_count, 3)
+        new_root = self.head_tree()
+        self.assertNotEqual(new_root["a/"], root["a/"])
+        self.assertEqual(new_root["b/"], root["b/"])
+        self.assertEqual(new_root["c/"], root["c/"])
+
     def test_commit_without_repository(self):
         # Crear nuevo SBAC sin init
         temp_dir = tempfile.mkdtemp()
@@ -137,8 +237,7 @@ class TestCommitCommand(unittest.TestCase):
         with open(os.path.join(HEADS_DIR, "master"), 'r') as f:
             commit_hash = f.read().strip()
         
-        with open(os.path.join(OBJECTS_DIR, commit_hash), 'r') as f:
-            commit_data = json.load(f)
+        commit_data = json.loads(self.sbac.objects.read(commit_hash))
         
         self.assertEqual(commit_data["author"], "test_author")
 
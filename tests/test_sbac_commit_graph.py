@@ -0,0 +1,166 @@
+import os
+import io
+import unittest
+import tempfile
+import shutil
+import json
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.classes.sbac import SBAC
+from src.classes.commit_graph import CommitGraph
+from src.classes.object_store import ObjectStore
+from src.config import SBAC_DIR, HEADS_DIR, COMMIT_GRAPH_FILE
+
+class TestCommitGraphCommand(unittest.TestCase):
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio
+        self.sbac = SBAC()
+        self.sbac.init()
+
+        self.file1 = "file1.txt"
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def create_commits(self, count):
+        hashes = []
+        for i in range(count):
+            with open(self.file1, 'w') as f:
+                f.write(f"Version {i}")
+            self.sbac.add([self.file1])
+            self.assertTrue(self.sbac.commit(f"Commit {i}"))
+            with open(os.path.join(HEADS_DIR, "master")) as f:
+                hashes.append(f.read().strip())
+        return hashes
+
+    def log_output(self):
+        f = io.StringIO()
+        with redirect_stdout(f):
+            self.assertTrue(self.sbac.log())
+        return f.getvalue()
+
+    def test_commit_appends_to_graph(self):
+        hashes = self.create_commits(3)
+
+        graph = CommitGraph()
+        self.assertEqual(len(graph), 3)
+        for generation, commit_hash in enumerate(hashes, start=1):
+            entry = graph.entry(graph.find(commit_hash))
+            self.assertEqual(entry.generation, generation)
+            commit_data = json.loads(self.sbac.objects.read(commit_hash))
+            self.assertEqual(entry.tree, commit_data["tree"])
+        self.assertEqual([entry.hash for entry in graph.walk(hashes[-1])], hashes[::-1])
+        self.assertIsNone(graph.find("0" * 40))
+        graph.close()
+
+    def test_find_uses_sorted_lookup_table(self):
+        with patch("src.classes.commit_graph.COMMIT_GRAPH_LOOKUP_TAIL", 2):
+            hashes = self.create_commits(3)
+            # Al pasar de 2 filas sin tabla, 'commit' escribe la tabla ordenada
+            self.assertTrue(os.path.exists(COMMIT_GRAPH_FILE + ".lookup"))
+            hashes += self.create_commits(2)
+
+        graph = CommitGraph()
+        # Las filas de la tabla y las agregadas después se encuentran igual
+        self.assertEqual([graph.find(commit_hash) for commit_hash in hashes], list(range(5)))
+        # El hash de un árbol aparece en el archivo, pero no es una fila
+        self.assertIsNone(graph.find(graph.entry(0).tree))
+        self.assertIsNone(graph.find("0" * 40))
+        self.assertIsNone(graph.find("no es un hash"))
+        graph.close()
+
+    def test_stale_lookup_table_is_ignored(self):
+        hashes = self.create_commits(2)
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.sbac.commit_graph())
+        with open(COMMIT_GRAPH_FILE + ".lookup", 'rb') as f:
+            stale = f.read()
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.sbac.commit_graph())
+        # Una tabla de otro grafo (otro identificador) no se usa
+        with open(COMMIT_GRAPH_FILE + ".lookup", 'wb') as f:
+            f.write(stale)
+        graph = CommitGraph()
+        self.assertEqual([graph.find(commit_hash) for commit_hash in hashes], [0, 1])
+        graph.close()
+
+    def test_rebuild_graph(self):
+        hashes = self.create_commits(3)
+        os.remove(COMMIT_GRAPH_FILE)
+
+        self.assertTrue(self.sbac.commit_graph())
+
+        graph = CommitGraph()
+        self.assertEqual([entry.hash for entry in graph.walk(hashes[-1])], hashes[::-1])
+        graph.close()
+
+    def test_missing_ancestors_are_added_on_commit(self):
+        hashes = self.create_commits(2)
+        os.remove(COMMIT_GRAPH_FILE)
+
+        hashes += self.create_commits(1)
+
+        graph = CommitGraph()
+        self.assertEqual(len(graph), 3)
+        self.assertEqual(graph.entry(graph.find(hashes[-1])).generation, 3)
+        graph.close()
+
+    def test_log_walks_graph(self):
+        self.create_commits(3)
+        expected = self.log_output()
+
+        # Con el grafo, log sólo lee cada commit una vez para mostrarlo (en
+        # una instancia nueva: los commits leídos se memorizan por instancia)
+        self.sbac = SBAC()
+        with patch.object(ObjectStore, 'read', wraps=self.sbac.objects.read) as read:
+            self.assertEqual(self.log_output(), expected)
+        self.assertEqual(read.call_count, 3)
+
+        # Sin el grafo, el resultado es el mismo
+        os.remove(COMMIT_GRAPH_FILE)
+        self.assertEqual(self.log_output(), expected)
+
+    def test_commit_stores_changed_path_filters(self):
+        os.makedirs("src", exist_ok=True)
+        nested = os.path.join("src", "main.py")
+        with open(nested, 'w') as f:
+            f.write("print('hola')")
+        self.sbac.add([nested])
+        self.assertTrue(self.sbac.commit("Agregar src"))
+        self.create_commits(1)
+
+        graph = CommitGraph()
+        first = graph.entry(0)
+        bloom = graph.changed_paths_filter(first)
+        self.assertTrue(bloom.might_contain(nested))
+        self.assertTrue(bloom.might_contain("src"))
+
+        # El segundo commit sólo agrega file1.txt: src/main.py no cambia
+        bloom = graph.changed_paths_filter(graph.entry(1))
+        self.assertTrue(bloom.might_contain(self.file1))
+        self.assertFalse(bloom.might_contain(nested))
+        graph.close()
+
+        # La reconstrucción vuelve a calcular los filtros
+        self.assertTrue(self.sbac.commit_graph())
+        graph = CommitGraph()
+        self.assertTrue(graph.changed_paths_filter(graph.entry(0)).might_contain(nested))
+        graph.close()
+
+    def test_commit_graph_without_repo(self):
+        temp_dir = tempfile.mkdtemp()
+        os.chdir(temp_dir)
+        try:
+            self.assertFalse(SBAC().commit_graph())
+        finally:
+            os.chdir(self.test_dir)
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
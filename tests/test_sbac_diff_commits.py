@@ -60,6 +60,32 @@ class TestDiffCommits(unittest.TestCase):
         result = self.sbac.diff_commits("invalid1", "invalid2")
         self.assertFalse(result)
 
+    def test_diff_revisions(self):
+        """Los commits se indican con revisiones como HEAD~1 o ramas"""
+        from io import StringIO
+        from contextlib import redirect_stdout
+
+        try:
+            for content in ("uno\n", "dos\n"):
+                with open("test_diff_rev.txt", "w") as f:
+                    f.write(content)
+                self.sbac.add(["test_diff_rev.txt"])
+                self.assertTrue(self.sbac.commit(f"commit {content.strip()}"))
+
+            output = StringIO()
+            with redirect_stdout(output):
+                self.assertTrue(self.sbac.diff_commits("HEAD~1", "master"))
+            self.assertIn("Changes in test_diff_rev.txt:", output.getvalue())
+            self.assertIn("+dos", output.getvalue())
+
+            output = StringIO()
+            with redirect_stdout(output):
+                self.assertFalse(self.sbac.diff_commits("HEAD~5", "HEAD"))
+            self.assertIn("unknown revision or path 'HEAD~5'", output.getvalue())
+        finally:
+            if os.path.exists("test_diff_rev.txt"):
+                os.remove("test_diff_rev.txt")
+
     def test_diff_identical_commits(self):
         """Test con commits idénticos"""
         tree_data = {"file1.txt": "hash1", "file2.txt": "hash2"}
@@ -223,5 +249,219 @@ class TestDiffCommits(unittest.TestCase):
         self.assertIn("-original content", output)              # file1.txt (removed)
         self.assertIn("+modified content", output)              # file1.txt (added)
 
+
+    def test_diff_skips_equal_subtrees(self):
+        """Los subárboles con el mismo hash no se leen"""
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+        from src.classes.tree import write_tree
+
+        blob1 = hashlib.sha1(b"uno").hexdigest()
+        blob2 = hashlib.sha1(b"dos").hexdigest()
+        self.sbac.objects.write(blob1, b"uno")
+        self.sbac.objects.write(blob2, b"dos")
+        shared = {os.path.join("lib", f"mod{i}.py"): blob1 for i in range(3)}
+
+        tree1 = write_tree(self.sbac.objects, {**shared, os.path.join("src", "main.py"): blob1})
+        tree2 = write_tree(self.sbac.objects, {**shared, os.path.join("src", "main.py"): blob2})
+        lib_tree = json.loads(self.sbac.objects.read(tree1))["lib/"]
+        for commit_hash, tree_hash in [(self.commit1, tree1), (self.commit2, tree2)]:
+            self.sbac.objects.write(commit_hash, json.dumps({"tree": tree_hash, "parent": None}).encode(), "commit")
+
+        from io import StringIO
+        from contextlib import redirect_stdout
+        output = StringIO()
+        with patch.object(ObjectStore, 'read', wraps=self.sbac.objects.read) as read:
+            with redirect_stdout(output):
+                self.assertTrue(self.sbac.diff_commits(self.commit1, self.commit2))
+
+        self.assertIn(f"Changes in {os.path.join('src', 'main.py')}:", output.getvalue())
+        self.assertNotIn("lib", output.getvalue())
+        self.assertNotIn(lib_tree, [call.args[0] for call in read.call_args_list])
+
+    def test_diff_legacy_flat_tree_with_hierarchical_tree(self):
+        """Un árbol plano antiguo se compara con uno por directorios"""
+        from src.classes.tree import write_tree
+
+        blob1 = hashlib.sha1(b"uno").hexdigest()
+        self.sbac.objects.write(blob1, b"uno")
+        nested = os.path.join("docs", "a.txt")
+        self.create_test_commit(self.commit1, {nested: blob1, "b.txt": "hash_b"})
+        tree2 = write_tree(self.sbac.objects, {nested: blob1, "c.txt": blob1})
+        self.sbac.objects.write(self.commit2, json.dumps({"tree": tree2, "parent": None}).encode(), "commit")
+
+        from io import StringIO
+        from contextlib import redirect_stdout
+        output = StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(self.sbac.diff_commits(self.commit1, self.commit2))
+
+        self.assertNotIn(f"Changes in {nested}", output.getvalue())
+        self.assertIn("Changes in b.txt:", output.getvalue())
+        self.assertIn("Changes in c.txt:", output.getvalue())
+
+    def diff_output(self, content1, content2, **kwargs):
+        """Salida de diff_commits entre dos commits con un único archivo"""
+        from io import StringIO
+        from contextlib import redirect_stdout
+
+        hashes = []
+        for content in (content1, content2):
+            blob = hashlib.sha1(content.encode()).hexdigest()
+            self.sbac.objects.write(blob, content.encode())
+            hashes.append(blob)
+        self.create_test_commit(self.commit1, {"test.txt": hashes[0]})
+        self.create_test_commit(self.commit2, {"test.txt": hashes[1]})
+
+        output = StringIO()
+        with redirect_stdout(output):
+            result = self.sbac.diff_commits(self.commit1, self.commit2, **kwargs)
+        return result, output.getvalue()
+
+    def test_diff_algorithms_match_difflib_format(self):
+        """Con un único alineamiento posible, todos los algoritmos dan la salida de difflib"""
+        import difflib
+
+        lines1 = [f"line {i}" for i in range(40)]
+        lines2 = lines1[:5] + ["inserted"] + lines1[5:20] + ["changed"] + lines1[21:35] + lines1[36:]
+        expected = "\n".join(difflib.unified_diff(lines1, lines2, fromfile=f"test.txt ({self.commit1[:7]})",
+                                                  tofile=f"test.txt ({self.commit2[:7]})", lineterm=""))
+        for algorithm in ["myers", "patience", "histogram"]:
+            result, output = self.diff_output("\n".join(lines1), "\n".join(lines2), algorithm=algorithm)
+            self.assertTrue(result)
+            self.assertEqual(output, f"Changes in test.txt:\n{expected}\n")
+
+    def test_diff_algorithms_produce_valid_minimal_diffs(self):
+        """Cada diff reconstruye ambos archivos; el de Myers es mínimo"""
+        import random
+        from src.classes.line_diff import DIFF_ALGORITHMS, matching_blocks, unified_diff
+
+        def lcs_length(a, b):
+            previous = [0] * (len(b) + 1)
+            for x in a:
+                current = [0]
+                for j, y in enumerate(b):
+                    current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+                previous = current
+            return previous[-1]
+
+        rng = random.Random(7)
+        for _ in range(300):
+            a = [rng.choice("abcde") for _ in range(rng.randint(0, 25))]
+            b = [rng.choice("abcdef") for _ in range(rng.randint(0, 25))]
+            for algorithm in DIFF_ALGORITHMS:
+                lines = list(unified_diff(a, b, n=100, lineterm="", algorithm=algorithm))[3:]
+                if a != b:
+                    self.assertEqual([line[1:] for line in lines if line[0] in " -"], a)
+                    self.assertEqual([line[1:] for line in lines if line[0] in " +"], b)
+            matched = sum(size for _, _, size in matching_blocks(a, b, "myers"))
+            self.assertEqual(matched, lcs_length(a, b))
+
+    def test_diff_algorithm_from_config(self):
+        """El algoritmo por defecto se toma de diff_algorithm en .sbac/config"""
+        from unittest.mock import patch
+        import src.classes.sbac as sbac_module
+
+        with open(CONFIG_FILE, 'w') as f:
+            json.dump({"author": "test", "diff_algorithm": "histogram"}, f)
+        with patch.object(sbac_module, "unified_diff", wraps=sbac_module.unified_diff) as diff:
+            result, _ = self.diff_output("a\nb\n", "a\nc\n")
+        self.assertTrue(result)
+        self.assertEqual(diff.call_args.kwargs["algorithm"], "histogram")
+
+    def test_diff_unknown_algorithm(self):
+        result, output = self.diff_output("a\n", "b\n", algorithm="quadratic")
+        self.assertFalse(result)
+        self.assertIn("error: unknown diff algorithm 'quadratic'", output)
+
+    def create_many_changes(self, count):
+        """Commits con 'count' archivos modificados, más uno añadido y uno eliminado"""
+        tree1, tree2 = {}, {}
+        for i in range(count):
+            content1 = "".join(f"line {k}\n" for k in range(50))
+            content2 = content1.replace("line 7\n", f"line 7 of file {i}\n")
+            for tree, content in ((tree1, content1), (tree2, content2)):
+                blob = hashlib.sha1(content.encode()).hexdigest()
+                self.sbac.objects.write(blob, content.encode())
+                tree[f"file{i:02d}.txt"] = blob
+        tree1["removed.txt"] = tree1["file00.txt"]
+        tree2["added.txt"] = tree2["file00.txt"]
+        self.create_test_commit(self.commit1, tree1)
+        self.create_test_commit(self.commit2, tree2)
+
+    def test_diff_parallel_output_matches_sequential(self):
+        """Con varios procesos la salida es la misma y en el mismo orden"""
+        from io import StringIO
+        from contextlib import redirect_stdout
+
+        self.create_many_changes(12)
+        outputs = []
+        for jobs in (1, 4):
+            output = StringIO()
+            with redirect_stdout(output):
+                self.assertTrue(self.sbac.diff_commits(self.commit1, self.commit2, jobs=jobs))
+            outputs.append(output.getvalue())
+
+        self.assertEqual(outputs[0], outputs[1])
+        files = [line for line in outputs[1].splitlines() if line.startswith("Changes in ")]
+        self.assertEqual(files, sorted(files))
+        self.assertEqual(len(files), 14)
+        self.assertIn("+line 7 of file 11", outputs[1])
+
+    def test_diff_streams_files_in_order(self):
+        """Cada archivo se muestra sin esperar a que terminen los siguientes"""
+        import time
+        import threading
+        from io import StringIO
+        from concurrent.futures import Future
+        from contextlib import redirect_stdout
+        from unittest.mock import patch
+        import src.classes.sbac as sbac_module
+
+        class ManualExecutor:
+            """Pool que sólo completa una tarea cuando la prueba lo indica"""
+            def __init__(self, max_workers, initializer):
+                initializer()
+                self.tasks = []
+                executors.append(self)
+
+            def submit(self, fn, *args):
+                future = Future()
+                self.tasks.append((future, fn, args))
+                return future
+
+            def shutdown(self, cancel_futures=False):
+                pass
+
+        def wait_for(condition):
+            deadline = time.monotonic() + 5
+            while not condition():
+                if time.monotonic() > deadline:
+                    return False
+                time.sleep(0.001)
+            return True
+
+        executors = []
+        streamed = []
+        output = StringIO()
+
+        def complete_tasks():
+            wait_for(lambda: executors)
+            executor = executors[0]
+            for i in range(12):
+                wait_for(lambda: len(executor.tasks) > i)
+                future, fn, args = executor.tasks[i]
+                future.set_result(fn(*args))
+                # Antes de completar la siguiente tarea el archivo ya se mostró
+                streamed.append(wait_for(lambda: f"Changes in file{i:02d}.txt:" in output.getvalue()))
+
+        self.create_many_changes(12)
+        worker = threading.Thread(target=complete_tasks)
+        with patch.object(sbac_module, "ProcessPoolExecutor", ManualExecutor), redirect_stdout(output):
+            worker.start()
+            self.assertTrue(self.sbac.diff_commits(self.commit1, self.commit2, jobs=2))
+        worker.join()
+        self.assertEqual(streamed, [True] * 12)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -88,7 +88,7 @@ class TestDiffTags(unittest.TestCase):
         result = self.sbac.diff_tags(self.tag1, self.tag2)
         
         self.assertTrue(result)
-        mock_diff_commits.assert_called_once_with(self.commit1, self.commit2)
+        mock_diff_commits.assert_called_once_with(self.commit1, self.commit2, algorithm=None, jobs=None)
 
     def test_diff_tags_with_changes(self):
         """Test integración completa con cambios reales"""
@@ -104,5 +104,125 @@ class TestLogCommand(unittest.TestCase):
         self.assertIn(author, output)
         self.assertIn(message, output)
 
+    def log_output(self, **options):
+        import io
+        from contextlib import redirect_stdout
+
+        f = io.StringIO()
+        with redirect_stdout(f):
+            self.assertTrue(self.sbac.log(**options))
+        return f.getvalue()
+
+    def create_history(self):
+        messages = ["Primer commit", "Segundo commit", "Tercer commit"]
+        for i, msg in enumerate(messages):
+            self.assertTrue(self.create_commit(msg, author=f"autor{i % 2}"))
+        return messages
+
+    def test_log_max_count(self):
+        messages = self.create_history()
+
+        output = self.log_output(max_count=2)
+        self.assertEqual(output.count("commit "), 2)
+        self.assertIn(messages[2], output)
+        self.assertIn(messages[1], output)
+        self.assertNotIn(messages[0], output)
+
+    def test_log_oneline_and_jsonl(self):
+        messages = self.create_history()
+
+        lines = self.log_output(oneline=True).splitlines()
+        self.assertEqual([line.split(" ", 1)[1] for line in lines], messages[::-1])
+        self.assertTrue(all(len(line.split(" ", 1)[0]) == 7 for line in lines))
+
+        entries = [json.loads(line) for line in self.log_output(format="jsonl").splitlines()]
+        self.assertEqual([entry["message"] for entry in entries], messages[::-1])
+        self.assertEqual(entries[0]["parent"], entries[1]["hash"])
+
+    def test_log_filters_by_author_and_date(self):
+        messages = self.create_history()
+        entries = [json.loads(line) for line in self.log_output(format="jsonl").splitlines()]
+
+        output = self.log_output(author="autor1", oneline=True)
+        self.assertEqual(output.splitlines(), [f"{entries[1]['hash'][:7]} {messages[1]}"])
+
+        # Fechas límite inclusivas: desde el segundo commit y hasta el segundo commit
+        since = self.log_output(since=entries[1]["timestamp"], oneline=True).splitlines()
+        self.assertEqual([line.split(" ", 1)[1] for line in since], [messages[2], messages[1]])
+        until = self.log_output(until=entries[1]["timestamp"], oneline=True).splitlines()
+        self.assertEqual([line.split(" ", 1)[1] for line in until], [messages[1], messages[0]])
+
+        self.assertFalse(self.sbac.log(since="ayer"))
+
+    def test_log_stops_on_broken_pipe(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+        from src.config import LOG_BATCH_SIZE
+
+        for i in range(LOG_BATCH_SIZE + 10):
+            self.assertTrue(self.create_commit(f"Commit {i}"))
+
+        class ClosedPipe:
+            def write(self, data):
+                raise BrokenPipeError()
+
+            def flush(self):
+                pass
+
+        # Una instancia nueva: los commits leídos se memorizan por instancia
+        self.sbac = SBAC()
+        with patch("sys.stdout", ClosedPipe()):
+            with patch.object(ObjectStore, 'read', wraps=self.sbac.objects.read) as read:
+                self.assertTrue(self.sbac.log())
+        # Sólo se leyó el primer lote antes de detenerse
+        self.assertEqual(read.call_count, LOG_BATCH_SIZE)
+
+    def create_path_history(self):
+        # Historia donde cada commit cambia un archivo distinto
+        os.makedirs("docs", exist_ok=True)
+        files = [self.file1, os.path.join("docs", "guia.txt"), "otro.txt"]
+        for path in files:
+            with open(path, 'w') as f:
+                f.write(f"Contenido de {path}")
+
+        changes = [None, files[1], files[2], files[1], self.file1]
+        for i, changed in enumerate(changes):
+            if changed:
+                with open(changed, 'a') as f:
+                    f.write(f"\nCambio {i}")
+            self.sbac.add(files)
+            self.assertTrue(self.sbac.commit(f"Commit {i}"))
+        return files
+
+    def test_log_limited_to_path(self):
+        files = self.create_path_history()
+
+        def messages(*paths):
+            output = self.log_output(oneline=True, paths=list(paths))
+            return [line.split(" ", 1)[1] for line in output.splitlines()]
+
+        self.assertEqual(messages(files[1]), ["Commit 3", "Commit 1", "Commit 0"])
+        self.assertEqual(messages("docs"), ["Commit 3", "Commit 1", "Commit 0"])
+        self.assertEqual(messages("docs/"), ["Commit 3", "Commit 1", "Commit 0"])
+        self.assertEqual(messages(self.file1), ["Commit 4", "Commit 0"])
+        self.assertEqual(messages(files[2], self.file1), ["Commit 4", "Commit 2", "Commit 0"])
+        self.assertEqual(messages("no_existe.txt"), [])
+
+    def test_log_path_uses_bloom_filters(self):
+        from unittest.mock import patch
+        from src.config import COMMIT_GRAPH_FILE
+
+        files = self.create_path_history()
+        expected = self.log_output(paths=[files[2]])
+
+        # Los commits descartados por su filtro no comparan árboles
+        with patch.object(SBAC, '_changed_paths', wraps=self.sbac._changed_paths) as changed_paths:
+            self.assertEqual(self.log_output(paths=[files[2]]), expected)
+        self.assertEqual(changed_paths.call_count, 2)
+
+        # Sin commit-graph el resultado es el mismo
+        os.remove(COMMIT_GRAPH_FILE)
+        self.assertEqual(self.log_output(paths=[files[2]]), expected)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import io
+import unittest
+import tempfile
+import shutil
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.classes.sbac import SBAC
+from src.classes.object_store import ObjectStore
+from src.config import HEAD_FILE, HEADS_DIR, COMMIT_GRAPH_FILE
+
+class BranchHistoryTestCase(unittest.TestCase):
+    """Repositorio con dos ramas, compartido por merge-base e is-ancestor"""
+
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio
+        self.sbac = SBAC()
+        self.sbac.init()
+        self.file1 = "file1.txt"
+
+        # Historia: c0 - c1 - c2 (master)
+        #                  \
+        #                   f1 - f2 (feature)
+        self.commits = {}
+        for name in ["c0", "c1"]:
+            self.commits[name] = self.create_commit(name)
+        self.sbac.create_branch("feature")
+        self.commits["c2"] = self.create_commit("c2")
+        self.sbac.checkout("feature")
+        for name in ["f1", "f2"]:
+            self.commits[name] = self.create_commit(name)
+        self.sbac.checkout("master")
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def create_commit(self, message):
+        with open(self.file1, 'w') as f:
+            f.write(message)
+        self.sbac.add([self.file1])
+        self.assertTrue(self.sbac.commit(message))
+        with open(HEAD_FILE) as f:
+            branch = f.read().strip().split("/")[-1]
+        with open(os.path.join(HEADS_DIR, branch)) as f:
+            return f.read().strip()
+
+class TestMergeBaseCommand(BranchHistoryTestCase):
+    def merge_base(self, rev1, rev2):
+        f = io.StringIO()
+        with redirect_stdout(f):
+            result = self.sbac.merge_base(rev1, rev2)
+        return result, f.getvalue().strip()
+
+    def test_merge_base_of_branches(self):
+        self.assertEqual(self.merge_base("master", "feature"), (True, self.commits["c1"]))
+        self.assertEqual(self.merge_base("feature", "master"), (True, self.commits["c1"]))
+
+    def test_merge_base_with_hashes_and_tags(self):
+        self.sbac.tag("v1")
+        self.assertEqual(self.merge_base(self.commits["f1"], "v1"), (True, self.commits["c1"]))
+        self.assertEqual(self.merge_base(self.commits["c0"], "feature"), (True, self.commits["c0"]))
+        self.assertEqual(self.merge_base("HEAD", "HEAD"), (True, self.commits["c2"]))
+
+    def test_merge_base_without_commit_graph(self):
+        os.remove(COMMIT_GRAPH_FILE)
+        self.assertEqual(self.merge_base("master", "feature"), (True, self.commits["c1"]))
+
+    def test_merge_base_unknown_revision(self):
+        result, output = self.merge_base("master", "no_existe")
+        self.assertFalse(result)
+        self.assertIn("unknown revision", output)
+
+class TestIsAncestorCommand(BranchHistoryTestCase):
+    def is_ancestor(self, rev1, rev2):
+        with redirect_stdout(io.StringIO()):
+            return self.sbac.is_ancestor(rev1, rev2)
+
+    def test_is_ancestor(self):
+        self.assertTrue(self.is_ancestor(self.commits["c0"], "master"))
+        self.assertTrue(self.is_ancestor(self.commits["c1"], "feature"))
+        self.assertTrue(self.is_ancestor("master", "master"))
+        self.assertFalse(self.is_ancestor("master", "feature"))
+        self.assertFalse(self.is_ancestor("feature", "master"))
+        self.assertFalse(self.is_ancestor("master", self.commits["c0"]))
+
+    def test_is_ancestor_does_not_read_objects(self):
+        # Con el commit-graph, la consulta no abre objetos de commits
+        with patch.object(ObjectStore, 'read', wraps=self.sbac.objects.read) as read:
+            self.assertTrue(self.is_ancestor(self.commits["c0"], "master"))
+            self.assertFalse(self.is_ancestor(self.commits["f1"], "master"))
+        read.assert_not_called()
+
+    def test_is_ancestor_without_commit_graph(self):
+        os.remove(COMMIT_GRAPH_FILE)
+        self.assertTrue(self.is_ancestor(self.commits["c0"], "master"))
+        self.assertFalse(self.is_ancestor("feature", "master"))
+
+    def test_is_ancestor_unknown_revision(self):
+        self.assertFalse(self.is_ancestor("no_existe", "master"))
+
+if __name__ == '__main__':
+    unittest.main()
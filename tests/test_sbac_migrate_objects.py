@@ -0,0 +1,85 @@
+import os
+import unittest
+import tempfile
+import shutil
+import json
+import hashlib
+from src.classes.sbac import SBAC
+from src.config import OBJECTS_DIR
+
+class TestMigrateObjectsCommand(unittest.TestCase):
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio
+        self.sbac = SBAC()
+        self.sbac.init()
+
+        self.file1 = "file1.txt"
+        with open(self.file1, 'w') as f:
+            f.write("Contenido inicial")
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def write_flat_object(self, content):
+        # Simula un objeto guardado con el esquema plano anterior
+        object_hash = hashlib.sha1(content).hexdigest()
+        with open(os.path.join(OBJECTS_DIR, object_hash), 'wb') as f:
+            f.write(content)
+        return object_hash
+
+    def test_add_uses_fanout_layout(self):
+        self.assertTrue(self.sbac.add([self.file1]))
+
+        object_hash = hashlib.sha1(b"Contenido inicial").hexdigest()
+        self.assertTrue(os.path.isfile(os.path.join(OBJECTS_DIR, object_hash[:2], object_hash[2:])))
+        self.assertFalse(os.path.exists(os.path.join(OBJECTS_DIR, object_hash)))
+
+    def test_flat_objects_are_readable(self):
+        object_hash = self.write_flat_object(b"contenido plano")
+
+        self.assertTrue(self.sbac.objects.exists(object_hash))
+        self.assertEqual(self.sbac.objects.read(object_hash), b"contenido plano")
+
+    def test_migrate_moves_flat_objects(self):
+        hashes = [self.write_flat_object(f"objeto {i}".encode()) for i in range(5)]
+
+        self.assertTrue(self.sbac.migrate_objects())
+
+        for object_hash in hashes:
+            self.assertFalse(os.path.exists(os.path.join(OBJECTS_DIR, object_hash)))
+            self.assertTrue(os.path.isfile(self.sbac.objects.object_path(object_hash)))
+            self.assertTrue(self.sbac.objects.exists(object_hash))
+
+    def test_migrate_keeps_history_usable(self):
+        # Commit con objetos planos: se simula un repositorio antiguo
+        tree = {self.file1: self.write_flat_object(b"Contenido inicial")}
+        tree_hash = self.write_flat_object(json.dumps(tree).encode())
+        commit_data = {"message": "Antiguo", "author": "test", "timestamp": "2023-01-01T00:00:00",
+                       "parent": None, "tree": tree_hash, "hash": "0" * 40}
+        commit_hash = self.write_flat_object(json.dumps(commit_data).encode())
+        with open(os.path.join(".sbac", "refs", "heads", "master"), 'w') as f:
+            f.write(commit_hash)
+
+        self.assertTrue(self.sbac.migrate_objects())
+        self.assertTrue(self.sbac.log())
+        self.assertNotIn(self.file1, self.sbac.get_untracked_files())
+
+    def test_migrate_without_repository(self):
+        temp_dir = tempfile.mkdtemp()
+        os.chdir(temp_dir)
+
+        try:
+            sbac = SBAC()
+            self.assertFalse(sbac.migrate_objects())
+        finally:
+            os.chdir(self.test_dir)
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
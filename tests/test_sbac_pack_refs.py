@@ -0,0 +1,121 @@
+import os
+import io
+import unittest
+import tempfile
+import shutil
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.classes.sbac import SBAC
+from src.classes.refs import RefStore
+from src.config import HEADS_DIR, TAGS_DIR, PACKED_REFS_FILE
+
+class TestPackRefsCommand(unittest.TestCase):
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio con un commit, dos ramas y varios tags
+        self.sbac = SBAC()
+        self.sbac.init()
+        with open("file1.txt", 'w') as f:
+            f.write("Contenido inicial")
+        self.sbac.add(["file1.txt"])
+        self.assertTrue(self.sbac.commit("Commit inicial"))
+        with open(os.path.join(HEADS_DIR, "master")) as f:
+            self.commit_hash = f.read().strip()
+        self.assertTrue(self.sbac.create_branch("feature"))
+        for i in range(20):
+            self.assertTrue(self.sbac.tag(f"build-{i:03d}"))
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def output(self, method, *args):
+        f = io.StringIO()
+        with redirect_stdout(f):
+            result = method(*args)
+        return result, f.getvalue()
+
+    def test_pack_refs_moves_loose_refs(self):
+        self.assertTrue(self.sbac.pack_refs())
+
+        self.assertEqual(os.listdir(TAGS_DIR), [])
+        self.assertEqual(os.listdir(HEADS_DIR), [])
+        with open(PACKED_REFS_FILE, 'r') as f:
+            lines = f.read().splitlines()[1:]
+        self.assertEqual(lines, sorted(lines, key=lambda line: line.split(" ")[1]))
+        self.assertIn(f"{self.commit_hash} refs/tags/build-007", lines)
+
+        # Las operaciones siguen viendo las referencias empaquetadas
+        sbac = SBAC()
+        result, output = self.output(sbac.list_tags)
+        self.assertTrue(result)
+        self.assertIn(f"build-019 ({self.commit_hash[:7]})", output)
+        result, output = self.output(sbac.list_branches)
+        self.assertIn("* master", output)
+        self.assertIn("  feature", output)
+        self.assertTrue(sbac.checkout("build-003"))
+        self.assertTrue(sbac.checkout("feature"))
+        self.assertTrue(sbac.diff_tags("build-000", "build-001"))
+
+    def test_list_reads_packed_refs_once(self):
+        self.assertTrue(self.sbac.pack_refs())
+
+        sbac = SBAC()
+        real_open = open
+        opened = []
+        def tracking_open(path, *args, **kwargs):
+            opened.append(path)
+            return real_open(path, *args, **kwargs)
+
+        with patch("builtins.open", side_effect=tracking_open):
+            self.output(sbac.list_tags)
+            for i in range(20):
+                self.assertEqual(sbac.refs.read(f"refs/tags/build-{i:03d}"), self.commit_hash)
+        self.assertEqual(opened.count(PACKED_REFS_FILE), 1)
+
+    def test_loose_ref_overrides_packed(self):
+        self.assertTrue(self.sbac.pack_refs())
+        with open(os.path.join(HEADS_DIR, "feature"), 'w') as f:
+            f.write("a" * 40)
+
+        self.assertEqual(SBAC().refs.read("refs/heads/feature"), "a" * 40)
+
+        # Un nuevo commit en master se escribe como referencia suelta
+        with open("file1.txt", 'a') as f:
+            f.write("\nCambio")
+        sbac = SBAC()
+        sbac.add(["file1.txt"])
+        self.assertTrue(sbac.commit("Segundo commit"))
+        with open(os.path.join(HEADS_DIR, "master")) as f:
+            new_hash = f.read().strip()
+        self.assertEqual(SBAC().refs.read("refs/heads/master"), new_hash)
+
+    def test_delete_branch_removes_packed_entry(self):
+        self.assertTrue(self.sbac.pack_refs())
+
+        sbac = SBAC()
+        self.assertTrue(sbac.delete_branch("feature"))
+        self.assertIsNone(RefStore().read("refs/heads/feature"))
+        with open(PACKED_REFS_FILE, 'r') as f:
+            self.assertNotIn("refs/heads/feature", f.read())
+        self.assertFalse(sbac.delete_branch("feature"))
+
+    def test_create_existing_packed_branch(self):
+        self.assertTrue(self.sbac.pack_refs())
+        self.assertFalse(SBAC().create_branch("feature"))
+
+    def test_pack_refs_without_repo(self):
+        temp_dir = tempfile.mkdtemp()
+        os.chdir(temp_dir)
+        try:
+            self.assertFalse(SBAC().pack_refs())
+        finally:
+            os.chdir(self.test_dir)
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
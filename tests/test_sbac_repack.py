@@ -0,0 +1,222 @@
+import os
+import unittest
+import tempfile
+import shutil
+import json
+import io
+import hashlib
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.classes.sbac import SBAC
+from src.classes.object_store import ObjectStore
+from src.classes.delta import create_delta, apply_delta
+from src.config import OBJECTS_DIR, PACK_DIR, HEADS_DIR, CONFIG_FILE
+
+class TestRepackCommand(unittest.TestCase):
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio con algunos commits
+        self.sbac = SBAC()
+        self.sbac.init()
+
+        self.file1 = "file1.txt"
+        for i in range(3):
+            with open(self.file1, 'w') as f:
+                f.write(f"line1\nversion {i}\n")
+            self.sbac.add([self.file1])
+            self.sbac.commit(f"Commit {i}")
+
+    def tearDown(self):
+        self.sbac.objects.close_packs()
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def head_commit(self):
+        with open(os.path.join(HEADS_DIR, "master"), 'r') as f:
+            return f.read().strip()
+
+    def test_repack_removes_loose_objects(self):
+        loose_before = list(self.sbac.objects.loose_objects())
+        self.assertTrue(self.sbac.repack())
+
+        self.assertEqual(list(self.sbac.objects.loose_objects()), [])
+        packs = [name for name in os.listdir(PACK_DIR) if name.endswith(".pack")]
+        self.assertEqual(len(packs), 1)
+
+        # Todos los objetos siguen siendo legibles desde el pack
+        for object_hash, _ in loose_before:
+            self.assertTrue(self.sbac.objects.exists(object_hash))
+            self.assertIsNotNone(self.sbac.objects.read(object_hash))
+
+    def test_history_readable_after_repack(self):
+        self.assertTrue(self.sbac.repack())
+
+        # Una instancia nueva abre el pack desde cero
+        sbac = SBAC()
+        f = io.StringIO()
+        with redirect_stdout(f):
+            self.assertTrue(sbac.log())
+        self.assertEqual(f.getvalue().count("commit "), 3)
+
+        commit_data = json.loads(sbac.objects.read(self.head_commit()))
+        tree = json.loads(sbac.objects.read(commit_data["tree"]))
+        self.assertEqual(sbac.objects.read(tree[self.file1]), b"line1\nversion 2\n")
+        sbac.objects.close_packs()
+
+    def test_repack_consolidates_packs(self):
+        self.assertTrue(self.sbac.repack())
+
+        with open(self.file1, 'w') as f:
+            f.write("otra version\n")
+        self.sbac.add([self.file1])
+        self.sbac.commit("Commit despues del repack")
+        self.assertTrue(self.sbac.repack())
+
+        packs = [name for name in os.listdir(PACK_DIR) if name.endswith(".idx")]
+        self.assertEqual(len(packs), 1)
+        self.assertTrue(self.sbac.objects.exists(self.head_commit()))
+
+    def test_repack_nothing_to_pack(self):
+        self.assertTrue(self.sbac.repack())
+
+        f = io.StringIO()
+        with redirect_stdout(f):
+            self.assertTrue(self.sbac.repack())
+        self.assertIn("Nothing to pack.", f.getvalue())
+
+    def commit_versions(self, count):
+        # Archivo de configuración grande que cambia pocas líneas por commit
+        lines = [f"option_{i} = {i * 7}" for i in range(2000)]
+        contents = []
+        for version in range(count):
+            lines[(version * 37) % len(lines)] = f"option_changed = {version}"
+            content = "\n".join(lines) + "\n"
+            with open("settings.conf", 'w') as f:
+                f.write(content)
+            self.sbac.add(["settings.conf"])
+            self.sbac.commit(f"Version {version}")
+            contents.append(content.encode())
+        return contents
+
+    def disk_usage(self):
+        total = 0
+        for root, dirs, files in os.walk(OBJECTS_DIR):
+            for file in files:
+                total += os.path.getsize(os.path.join(root, file))
+        return total
+
+    def test_path_hints_skip_seen_subtrees(self):
+        # Muchos archivos y commits que cambian uno solo
+        paths = [os.path.join(f"lib{i % 10}", f"mod{i}.py") for i in range(50)]
+        for path in paths:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(f"Contenido de {path}")
+        self.sbac.add(paths)
+        self.sbac.commit("Agregar lib")
+        for i in range(10):
+            with open(paths[i], 'a') as f:
+                f.write("\nCambio")
+            self.sbac.add([paths[i]])
+            self.sbac.commit(f"Cambio {i}")
+
+        sbac = SBAC()
+        with patch.object(ObjectStore, 'read_object', autospec=True,
+                          side_effect=ObjectStore.read_object) as read_object:
+            hints = sbac._blob_paths()
+        # Los árboles de lib* se leen una vez; después, cada commit lee su raíz
+        # y el directorio que cambió (recorriendo cada árbol completo serían 3 + 11 * 11)
+        tree_reads = [call for call in read_object.call_args_list if call.args[2] == "tree"]
+        self.assertLessEqual(len(tree_reads), 3 + 11 + 10 * 2)
+        self.assertEqual(hints[ObjectStore.hash_file(paths[-1])], paths[-1])
+        self.assertEqual(hints[ObjectStore.hash_file(paths[0])], paths[0])
+
+    def test_repack_stores_blob_versions_as_deltas(self):
+        contents = self.commit_versions(15)
+        loose_size = self.disk_usage()
+
+        self.assertTrue(self.sbac.repack())
+        self.assertLess(self.disk_usage() * 5, loose_size)
+
+        # Cada versión se reconstruye exactamente
+        sbac = SBAC()
+        for content in contents:
+            object_hash = hashlib.sha1(content).hexdigest()
+            self.assertEqual(sbac.objects.read(object_hash), content)
+        sbac.objects.close_packs()
+
+    def test_delta_chain_depth_is_capped(self):
+        with open(CONFIG_FILE, 'w') as f:
+            json.dump({"author": "test", "pack_delta_depth": 2}, f)
+        self.commit_versions(12)
+
+        self.assertTrue(self.sbac.repack())
+
+        pack = self.sbac.objects.packs()[0]
+        depths = [pack.delta_depth(pack.find(h)) for h in pack.hashes()]
+        self.assertEqual(max(depths), 2)
+
+    def test_delta_roundtrip(self):
+        base = b"".join(f"line {i}\n".encode() for i in range(500))
+        target = base.replace(b"line 250\n", b"line modificada\n") + b"final\n"
+
+        delta = create_delta(base, target)
+        self.assertLess(len(delta), len(target) // 10)
+        self.assertEqual(apply_delta(base, delta), target)
+
+        # Un delta que no cabe en el límite se descarta
+        self.assertIsNone(create_delta(b"a" * 100, bytes(range(256)), max_size=10))
+
+    def test_missing_object_not_found(self):
+        self.assertTrue(self.sbac.repack())
+        self.assertFalse(self.sbac.objects.exists("f" * 40))
+        self.assertIsNone(self.sbac.objects.read("0" * 40))
+
+    def test_abbreviated_hashes_use_object_name_index(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        commit_hash = self.head_commit()
+        self.assertEqual(self.sbac.objects.expand(commit_hash[:7]), commit_hash)
+        self.assertTrue(os.path.exists(self.sbac.objects.names.path))
+
+        # Los objetos nuevos se registran en el log, sin volver a listar objects/
+        with open(self.file1, 'w') as f:
+            f.write("line1\nversion nueva\n")
+        self.sbac.add([self.file1])
+        self.sbac.commit("Commit nuevo")
+        new_hash = self.head_commit()
+        with patch.object(ObjectStore, 'loose_objects', side_effect=AssertionError("scan")):
+            self.assertEqual(self.sbac.objects.expand(new_hash[:7]), new_hash)
+
+    def test_object_name_log_is_compacted(self):
+        from unittest.mock import patch
+
+        names = self.sbac.objects.names
+        self.sbac.objects.expand(self.head_commit()[:7])
+        hashes = [hashlib.sha1(f"objeto {i}".encode()).hexdigest() for i in range(5)]
+        for object_hash in hashes:
+            self.sbac.objects.write(object_hash, b"contenido")
+        self.assertEqual(os.path.getsize(names.log_path), 5 * 20)
+
+        with patch("src.classes.object_names.OBJECT_NAMES_LOG_LIMIT", 2):
+            self.assertEqual(self.sbac.objects.find_prefix(hashes[3][:8]), [hashes[3]])
+        self.assertEqual(os.path.getsize(names.log_path), 0)
+        self.assertEqual(self.sbac.objects.find_prefix(hashes[4][:8]), [hashes[4]])
+
+    def test_abbreviated_hashes_after_repack(self):
+        commit_hash = self.head_commit()
+        self.sbac.objects.expand(commit_hash[:7])
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(self.sbac.repack())
+
+        # Los objetos empaquetados se buscan en el índice del pack
+        self.assertEqual(self.sbac.objects.find_prefix(commit_hash[:7]), [commit_hash])
+        self.assertEqual(self.sbac.objects.expand(commit_hash[:5]), commit_hash)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import io
+import unittest
+import tempfile
+import shutil
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.classes.sbac import SBAC
+from src.classes.object_store import ObjectStore
+from src.config import HEADS_DIR, HEAD_FILE
+
+class TestRevParseCommand(unittest.TestCase):
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio con cuatro commits y un tag en el segundo
+        self.sbac = SBAC()
+        self.sbac.init()
+        self.file1 = "file1.txt"
+        self.hashes = []
+        for i in range(4):
+            with open(self.file1, 'w') as f:
+                f.write(f"Version {i}")
+            self.sbac.add([self.file1])
+            self.assertTrue(self.sbac.commit(f"Commit {i}"))
+            with open(os.path.join(HEADS_DIR, "master")) as f:
+                self.hashes.append(f.read().strip())
+            if i == 1:
+                self.assertTrue(self.sbac.tag("v1.0"))
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def rev_parse_output(self, *revs):
+        f = io.StringIO()
+        with redirect_stdout(f):
+            result = self.sbac.rev_parse(list(revs))
+        return result, f.getvalue().splitlines()
+
+    def test_rev_parse_names(self):
+        result, output = self.rev_parse_output("HEAD", "master", "v1.0", self.hashes[0], self.hashes[2][:7])
+        self.assertTrue(result)
+        self.assertEqual(output, [self.hashes[3], self.hashes[3], self.hashes[1], self.hashes[0], self.hashes[2]])
+
+    def test_rev_parse_ancestors(self):
+        result, output = self.rev_parse_output("HEAD~", "HEAD~2", "master^^", "v1.0^", "HEAD~2^", "HEAD^0", "HEAD~0")
+        self.assertTrue(result)
+        self.assertEqual(output, [self.hashes[2], self.hashes[1], self.hashes[1], self.hashes[0],
+                                  self.hashes[0], self.hashes[3], self.hashes[3]])
+
+    def test_rev_parse_invalid(self):
+        for rev in ["HEAD~4", "noexiste", "HEAD^2", "~1"]:
+            result, output = self.rev_parse_output(rev)
+            self.assertFalse(result)
+            self.assertEqual(output, [f"error: unknown revision or path '{rev}'"])
+
+    def test_checkout_and_branch_accept_expressions(self):
+        self.assertTrue(self.sbac.checkout("HEAD~2"))
+        with open(HEAD_FILE, 'r') as f:
+            self.assertEqual(f.read().strip(), self.hashes[1])
+        with open(self.file1, 'r') as f:
+            self.assertEqual(f.read(), "Version 1")
+
+        self.assertTrue(self.sbac.create_branch("desde-tag", "v1.0^"))
+        with open(os.path.join(HEADS_DIR, "desde-tag"), 'r') as f:
+            self.assertEqual(f.read().strip(), self.hashes[0])
+
+    def test_resolution_is_memoized(self):
+        sbac = SBAC()
+        real_open = open
+        opened = []
+        def tracking_open(path, *args, **kwargs):
+            opened.append(path)
+            return real_open(path, *args, **kwargs)
+
+        with patch("builtins.open", side_effect=tracking_open), \
+                patch.object(ObjectStore, 'read', wraps=sbac.objects.read) as read:
+            with redirect_stdout(io.StringIO()):
+                for _ in range(10):
+                    self.assertTrue(sbac.rev_parse(["HEAD", "HEAD~3", "master^", "v1.0"]))
+        self.assertEqual(opened.count(HEAD_FILE), 1)
+        self.assertEqual(opened.count(os.path.join(HEADS_DIR, "master")), 1)
+        # Cada commit de la historia se lee una sola vez
+        self.assertEqual(read.call_count, 3)
+
+    def test_commit_updates_memoized_head(self):
+        self.assertTrue(self.sbac.checkout("HEAD~1"))
+        with open(self.file1, 'w') as f:
+            f.write("Version separada")
+        self.sbac.add([self.file1])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(self.sbac.commit("Commit separado"))
+        self.assertIn("[detached HEAD ", output.getvalue())
+
+        with open(HEAD_FILE, 'r') as f:
+            detached = f.read().strip()
+        self.assertEqual(self.sbac._rev_parse("HEAD"), detached)
+        self.assertEqual(self.sbac._rev_parse("HEAD^"), self.hashes[2])
+
+    def test_rev_parse_without_repo(self):
+        temp_dir = tempfile.mkdtemp()
+        os.chdir(temp_dir)
+        try:
+            self.assertFalse(SBAC().rev_parse(["HEAD"]))
+        finally:
+            os.chdir(self.test_dir)
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
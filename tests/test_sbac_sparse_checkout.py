@@ -0,0 +1,148 @@
+import os
+import io
+import unittest
+import tempfile
+import shutil
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.classes.sbac import SBAC
+from src.classes.sparse import SparseCheckout
+from src.config import SPARSE_CHECKOUT_FILE
+
+class TestSparseCheckoutCommand(unittest.TestCase):
+    def setUp(self):
+        # Crear directorio temporal
+        self.test_dir = tempfile.mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.test_dir)
+
+        # Inicializar repositorio
+        self.sbac = SBAC()
+        self.sbac.init()
+
+        # Un archivo en cada directorio
+        self.files = {}
+        for directory in ["app", "docs", os.path.join("services", "pagos", "api"), os.path.join("services", "pagos", "db")]:
+            os.makedirs(directory)
+            path = os.path.join(directory, "archivo.txt")
+            with open(path, 'w') as f:
+                f.write(f"Contenido de {directory}")
+            self.files[directory] = path
+        with open("README.md", 'w') as f:
+            f.write("Léeme")
+        self.sbac.add(list(self.files.values()) + ["README.md"])
+        self.assertTrue(self.sbac.commit("Commit inicial"))
+
+    def tearDown(self):
+        os.chdir(self.original_dir)
+        shutil.rmtree(self.test_dir)
+
+    def test_patterns(self):
+        sparse = SparseCheckout(["app", "services/*/api/"])
+        self.assertTrue(sparse.matches(os.path.join("app", "a.txt")))
+        self.assertTrue(sparse.matches(os.path.join("services", "pagos", "api", "a.txt")))
+        self.assertFalse(sparse.matches(os.path.join("services", "pagos", "db", "a.txt")))
+        self.assertTrue(sparse.matches("README.md"))
+        self.assertTrue(sparse.includes_dir("services"))
+        self.assertTrue(sparse.includes_dir(os.path.join("app", "sub")))
+        self.assertFalse(sparse.includes_dir("docs"))
+        self.assertTrue(SparseCheckout().matches("cualquier.txt"))
+
+    def test_set_removes_and_restores_files(self):
+        self.assertTrue(self.sbac.sparse_checkout_set(["app", "services/*/api"]))
+        with open(SPARSE_CHECKOUT_FILE, 'r') as f:
+            self.assertEqual(f.read().splitlines(), ["app", "services/*/api"])
+        self.assertTrue(os.path.exists(self.files["app"]))
+        self.assertTrue(os.path.exists(self.files[os.path.join("services", "pagos", "api")]))
+        self.assertFalse(os.path.exists(self.files["docs"]))
+        self.assertFalse(os.path.exists("docs"))
+
+        self.assertTrue(self.sbac.sparse_checkout_set(["docs"]))
+        self.assertFalse(os.path.exists(self.files["app"]))
+        with open(self.files["docs"], 'r') as f:
+            self.assertEqual(f.read(), "Contenido de docs")
+
+        self.assertTrue(self.sbac.sparse_checkout_disable())
+        self.assertFalse(os.path.exists(SPARSE_CHECKOUT_FILE))
+        for path in self.files.values():
+            self.assertTrue(os.path.exists(path))
+
+    def test_set_keeps_root_files(self):
+        self.assertTrue(self.sbac.sparse_checkout_set(["app"]))
+        with open("README.md", 'r') as f:
+            self.assertEqual(f.read(), "Léeme")
+        self.assertTrue(self.sbac.sparse_checkout_disable())
+        self.assertTrue(os.path.exists("README.md"))
+
+    def test_set_keeps_modified_files(self):
+        with open(self.files["docs"], 'w') as f:
+            f.write("Cambio local")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(self.sbac.sparse_checkout_set(["app"]))
+        self.assertIn(f"not removing '{self.files['docs']}'", output.getvalue())
+        self.assertTrue(os.path.exists(self.files["docs"]))
+
+    def test_list(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(self.sbac.sparse_checkout_list())
+            self.assertTrue(self.sbac.sparse_checkout_set(["app"]))
+            self.assertTrue(self.sbac.sparse_checkout_list())
+        self.assertIn("Sparse checkout is disabled.", output.getvalue())
+        self.assertEqual(output.getvalue().splitlines()[-1], "app")
+
+    def test_untracked_files_only_scan_included_directories(self):
+        self.assertTrue(self.sbac.sparse_checkout_set(["app"]))
+        os.makedirs("docs")
+        with open(os.path.join("docs", "nuevo.txt"), 'w') as f:
+            f.write("No rastreado")
+        with open(os.path.join("app", "nuevo.txt"), 'w') as f:
+            f.write("No rastreado")
+        with open("nuevo.txt", 'w') as f:
+            f.write("No rastreado")
+
+        walked = []
+        real_walk = os.walk
+        def walk(top):
+            for root, dirs, files in real_walk(top):
+                walked.append(os.path.normpath(root))
+                yield root, dirs, files
+
+        with patch("os.walk", side_effect=walk):
+            untracked = self.sbac.get_untracked_files()
+        self.assertEqual(sorted(untracked), [os.path.join("app", "nuevo.txt"), "nuevo.txt"])
+        self.assertNotIn("docs", walked)
+
+    def test_checkout_only_materializes_included_paths(self):
+        self.assertTrue(self.sbac.create_branch("feature"))
+        self.assertTrue(self.sbac.checkout("feature"))
+        for path in [self.files["app"], self.files["docs"]]:
+            with open(path, 'a') as f:
+                f.write("\nCambio en feature")
+        self.sbac.add([self.files["app"], self.files["docs"]])
+        self.assertTrue(self.sbac.commit("Cambios en feature"))
+        self.assertTrue(self.sbac.checkout("master"))
+
+        self.assertTrue(self.sbac.sparse_checkout_set(["app"]))
+        self.assertTrue(self.sbac.checkout("feature"))
+        with open(self.files["app"], 'r') as f:
+            self.assertIn("Cambio en feature", f.read())
+        self.assertFalse(os.path.exists(self.files["docs"]))
+
+    def test_set_without_patterns(self):
+        self.assertFalse(self.sbac.sparse_checkout_set([]))
+
+    def test_sparse_checkout_without_repo(self):
+        temp_dir = tempfile.mkdtemp()
+        os.chdir(temp_dir)
+        try:
+            self.assertFalse(SBAC().sparse_checkout_set(["app"]))
+            self.assertFalse(SBAC().sparse_checkout_list())
+            self.assertFalse(SBAC().sparse_checkout_disable())
+        finally:
+            os.chdir(self.test_dir)
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
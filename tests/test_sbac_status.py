@@ -2,8 +2,8 @@ import os
 import unittest
 import tempfile
 import shutil
-import json
 from src.classes.sbac import SBAC
+from src.classes.index import Index
 from src.config import SBAC_DIR, INDEX_FILE
 
 class TestStatusCommand(unittest.TestCase):
@@ -54,8 +54,7 @@ class TestStatusCommand(unittest.TestCase):
         
         # Verificar que el archivo está en staging
         self.assertTrue(os.path.exists(INDEX_FILE))
-        with open(INDEX_FILE, 'r') as f:
-            staged_files = json.load(f)
+        staged_files = Index.load().hashes()
         self.assertIn(self.staged_file, staged_files)
     
     def test_status_with_untracked_files(self):
@@ -99,5 +98,119 @@ class TestStatusCommand(unittest.TestCase):
         # Verificar que el archivo modificado se detecta correctamente
         # (esto depende de cómo implementes la detección de cambios)
 
+    def set_old_mtime(self, path):
+        # Mtime claramente anterior al índice para que la entrada no sea "racy"
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10 * 10**9))
+
+    def status_output(self):
+        import io
+        from contextlib import redirect_stdout
+        f = io.StringIO()
+        with redirect_stdout(f):
+            self.assertTrue(self.sbac.status())
+        return f.getvalue()
+
+    def test_status_reports_modified_and_deleted_files(self):
+        self.set_old_mtime(self.tracked_file)
+        self.set_old_mtime(self.staged_file)
+        self.sbac.add([self.tracked_file, self.staged_file])
+
+        self.assertNotIn("Changes not staged for commit", self.status_output())
+
+        with open(self.tracked_file, 'a') as f:
+            f.write("\nNuevo contenido")
+        os.remove(self.staged_file)
+
+        output = self.status_output()
+        self.assertIn("Changes not staged for commit", output)
+        self.assertIn(f"modified: {self.tracked_file}", output)
+        self.assertIn(f"deleted: {self.staged_file}", output)
+
+    def test_status_skips_files_with_unchanged_stat(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        self.set_old_mtime(self.tracked_file)
+        self.sbac.add([self.tracked_file])
+
+        with patch.object(ObjectStore, 'hash_file', wraps=ObjectStore.hash_file) as hash_file:
+            self.status_output()
+        hash_file.assert_not_called()
+
+    def test_status_rehashes_racy_entries(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        # Mtime posterior al índice: el stat no es confiable y hay que leer el archivo
+        st = os.stat(self.tracked_file)
+        os.utime(self.tracked_file, ns=(st.st_atime_ns, st.st_mtime_ns + 3600 * 10**9))
+        self.sbac.add([self.tracked_file])
+
+        with patch.object(ObjectStore, 'hash_file', wraps=ObjectStore.hash_file) as hash_file:
+            output = self.status_output()
+        hash_file.assert_called_once()
+        self.assertNotIn("Changes not staged for commit", output)
+
+    def test_touched_file_is_refreshed(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        self.set_old_mtime(self.tracked_file)
+        self.sbac.add([self.tracked_file])
+
+        # Cambiar sólo el mtime: el contenido se compara una vez y se actualiza el stat
+        self.set_old_mtime(self.tracked_file)
+        self.assertNotIn("Changes not staged for commit", self.status_output())
+        with patch.object(ObjectStore, 'hash_file', wraps=ObjectStore.hash_file) as hash_file:
+            self.status_output()
+        hash_file.assert_not_called()
+
+    def test_status_sees_journal_entries(self):
+        self.set_old_mtime(self.tracked_file)
+        self.set_old_mtime(self.staged_file)
+        self.sbac.add([self.tracked_file])
+        self.sbac.add([self.staged_file])
+
+        output = self.status_output()
+        self.assertIn(f"  {self.tracked_file}", output)
+        self.assertIn(f"  {self.staged_file}", output)
+        self.assertNotIn("Changes not staged for commit", output)
+
+        with open(self.staged_file, 'a') as f:
+            f.write("\nNuevo contenido")
+        self.assertIn(f"modified: {self.staged_file}", self.status_output())
+
+    def test_status_after_commit_and_checkout(self):
+        from unittest.mock import patch
+        from src.classes.object_store import ObjectStore
+
+        self.set_old_mtime(self.tracked_file)
+        self.sbac.add([self.tracked_file])
+        self.assertTrue(self.sbac.commit("Primer commit"))
+        self.assertTrue(self.sbac.create_branch("otra"))
+        self.assertTrue(self.sbac.checkout("otra"))
+        with open(self.tracked_file, 'w') as f:
+            f.write("Versión de otra")
+        self.sbac.add([self.tracked_file])
+        self.assertTrue(self.sbac.commit("Cambio en otra"))
+        self.assertTrue(self.sbac.checkout("master"))
+
+        # Los archivos de HEAD se comparan por stat, sin leerlos
+        self.set_old_mtime(self.tracked_file)
+        self.status_output()
+        with patch.object(ObjectStore, 'hash_file', wraps=ObjectStore.hash_file) as hash_file:
+            output = self.status_output()
+        hash_file.assert_not_called()
+        self.assertIn("(no files staged)", output)
+        self.assertNotIn("Changes not staged for commit", output)
+
+        # Un archivo de HEAD modificado o eliminado aparece aunque no esté en staging
+        with open(self.tracked_file, 'a') as f:
+            f.write("\nNuevo contenido")
+        self.assertIn(f"modified: {self.tracked_file}", self.status_output())
+        os.remove(self.tracked_file)
+        self.assertIn(f"deleted: {self.tracked_file}", self.status_output())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file